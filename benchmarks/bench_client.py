@@ -0,0 +1,153 @@
+"""
+IxBrowser各API方法的基準測試，使用本地的MockIxBrowserServer，不需要安裝ixBrowser
+
+分別以單執行緒與多執行緒呼叫每個方法，輸出吞吐量與p50/p99延遲
+
+    python benchmarks/bench_client.py --calls 200 --workers 16 --latency 0.005
+    python benchmarks/bench_client.py --json > result.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ixBrowser.client import IxBrowser  # noqa: E402
+from ixBrowser.discovery import ApiOnlyDiscovery  # noqa: E402
+from ixBrowser.testing import MockIxBrowserServer  # noqa: E402
+from ixBrowser.transport import TransportConfig  # noqa: E402
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def measure(func, args: list, workers: int) -> dict:
+    """
+    以workers個執行緒呼叫func(arg)，回傳吞吐量與延遲統計
+    """
+    latencies = []
+    errors = 0
+
+    def call(arg):
+        start = time.perf_counter()
+        try:
+            res = func(arg)
+        except Exception as e:
+            # 注入的錯誤或逾時只算一次失敗，不中斷整個測試
+            res = {"result": False, "error": {"code": -1, "message": str(e)}}
+        return time.perf_counter() - start, res
+
+    start = time.perf_counter()
+    if workers <= 1:
+        results = [call(arg) for arg in args]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(call, args))
+    elapsed = time.perf_counter() - start
+
+    for latency, res in results:
+        latencies.append(latency)
+        if isinstance(res, dict) and not res.get("result", True):
+            errors += 1
+    return {
+        "calls": len(args),
+        "errors": errors,
+        "throughput": len(args) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def measure_iter(ixbrowser: IxBrowser, page_size: int) -> dict:
+    """
+    走訪全部Profile的吞吐量，某一頁失敗時記錄錯誤並停止，不中斷整個測試
+    """
+    total = 0
+    errors = 0
+    start = time.perf_counter()
+    try:
+        for _ in ixbrowser.iter_browsers(page_size=page_size):
+            total += 1
+    except Exception:
+        errors += 1
+    elapsed = time.perf_counter() - start
+    return {"calls": total, "errors": errors, "throughput": total / elapsed if elapsed else 0.0,
+            "p50_ms": 0.0, "p99_ms": 0.0}
+
+
+def cases(ixbrowser: IxBrowser, calls: int, page_size: int):
+    """
+    (名稱, 函數, 參數列表)，依序執行，後面的案例會用到前面建立/開啟的Profile
+    """
+    ids = list(range(1, calls + 1))
+    # 第i次建立 -> 建立的profile_id，建立失敗的不在其中
+    created = {}
+
+    def create(i):
+        res = ixbrowser.api_browser_create(name=f"bench-{i}")
+        if res.get("result"):
+            created[i] = res["data"]
+        return res
+
+    def delete(i):
+        if i not in created:
+            return {"result": False, "error": {"code": -1, "message": f"第{i}次建立失敗，沒有可刪除的Profile"}}
+        return ixbrowser.api_browser_delete(created[i])
+
+    return [
+        ("api_group_list", lambda i: ixbrowser.api_group_list(limit=100), ids),
+        ("api_browser_list", lambda i: ixbrowser.api_browser_list(page=i % 10 + 1, limit=page_size), ids),
+        ("api_browser_open", lambda i: ixbrowser.api_browser_open(i), ids),
+        ("api_browser_close", lambda i: ixbrowser.api_browser_close(i), ids),
+        ("api_browser_cache_clear", lambda i: ixbrowser.api_browser_cache_clear(i), ids),
+        ("api_browser_update", lambda i: ixbrowser.api_browser_update(i, name=f"renamed-{i}"), ids),
+        ("api_browser_random_info", lambda i: ixbrowser.api_browser_random_info(i), ids),
+        ("api_browser_create", create, ids),
+        ("api_browser_delete", delete, ids),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", type=int, default=1000, help="mock server上的Profile數量")
+    parser.add_argument("--calls", type=int, default=200, help="每個方法呼叫的次數")
+    parser.add_argument("--workers", type=int, default=16, help="多執行緒測試的執行緒數")
+    parser.add_argument("--latency", type=float, default=0.0, help="mock server每個請求的延遲秒數")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="mock server回傳錯誤的機率")
+    parser.add_argument("--page-size", type=int, default=100, help="api_browser_list每頁數量")
+    parser.add_argument("--json", action="store_true", help="以JSON輸出結果")
+    args = parser.parse_args()
+
+    report = {}
+    for mode, workers in (("serial", 1), ("concurrent", args.workers)):
+        # 每個模式使用新的server，避免前一輪的狀態(已開啟、已刪除)影響結果
+        with MockIxBrowserServer(profiles=max(args.profiles, args.calls), latency=args.latency,
+                                 error_rate=args.error_rate, seed=0) as server:
+            transport = TransportConfig(pool_maxsize=max(workers, 10))
+            ixbrowser = IxBrowser(api_port=server.port, discovery=ApiOnlyDiscovery(), transport=transport)
+            for name, func, case_args in cases(ixbrowser, args.calls, args.page_size):
+                report.setdefault(name, {})[mode] = measure(func, case_args, workers)
+            report.setdefault("iter_browsers", {})[mode] = measure_iter(ixbrowser, args.page_size)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"calls: {args.calls}, workers: {args.workers}, latency: {args.latency * 1000:.1f} ms, "
+          f"error rate: {args.error_rate}")
+    print(f"{'method':<26}{'mode':<12}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, modes in report.items():
+        for mode, r in modes.items():
+            print(f"{name:<26}{mode:<12}{r['throughput']:>10.0f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+                  f"{r['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
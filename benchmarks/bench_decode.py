@@ -0,0 +1,92 @@
+"""
+browser-list響應解析的微基準測試
+
+比較舊的 stdlib json + 遞歸normalize 與目前的 json_codec.loads + normalize_api_response
+
+    python benchmarks/bench_decode.py --profiles 10000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ixBrowser.client import normalize_api_response  # noqa: E402
+from ixBrowser.utils import json_codec  # noqa: E402
+
+
+def legacy_normalize(response):
+    """
+    舊版__api_response，每次呼叫都重新定義遞歸函數
+    """
+
+    def get_deepest_data(data_obj):
+        if isinstance(data_obj, dict):
+            if "data" in data_obj:
+                return get_deepest_data(data_obj["data"])
+            else:
+                return data_obj
+        elif isinstance(data_obj, list):
+            return data_obj
+        else:
+            return None
+
+    result = {}
+    if "error" in response and "data" in response:
+        if response["error"]["code"] == 0:
+            result["result"] = True
+        else:
+            result["result"] = False
+            result["error"] = response["error"]
+            return result
+        result["data"] = response["data"]
+        deepest_data = get_deepest_data(response["data"])
+        if deepest_data is not None:
+            result["data"] = deepest_data
+    return result
+
+
+def make_payload(profiles: int) -> bytes:
+    browsers = [{
+        "profile_id": i,
+        "name": f"profile-{i}",
+        "group_id": i % 20,
+        "group_name": f"group-{i % 20}",
+        "note": "",
+        "color": "#CC9966",
+        "proxy_mode": 2,
+        "proxy_type": "direct",
+        "proxy_ip": "",
+        "proxy_port": "",
+        "site_url": "https://google.com/",
+        "last_open_time": "2023-07-01 12:00:00",
+        "created_time": "2023-06-01 12:00:00",
+        "tag": ["a", "b"],
+        "ua_info": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                   "Chrome/114.0.0.0 Safari/537.36",
+    } for i in range(profiles)]
+    return json.dumps({"error": {"code": 0, "message": "success"},
+                       "data": {"total": profiles, "data": browsers}}).encode("utf8")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = make_payload(args.profiles)
+    assert legacy_normalize(json.loads(payload)) == normalize_api_response(json_codec.loads(payload))
+
+    legacy = min(timeit.repeat(lambda: legacy_normalize(json.loads(payload)), number=1, repeat=args.repeat))
+    current = min(timeit.repeat(lambda: normalize_api_response(json_codec.loads(payload)), number=1,
+                                repeat=args.repeat))
+    print(f"profiles: {args.profiles}, payload: {len(payload) / 1024:.0f} KB, decoder: {json_codec.BACKEND}")
+    print(f"legacy:  {legacy * 1000:8.2f} ms")
+    print(f"current: {current * 1000:8.2f} ms ({legacy / current:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
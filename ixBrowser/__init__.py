@@ -1,2 +1,3 @@
 from . import client
+from . import async_client
 from .utils import *
\ No newline at end of file
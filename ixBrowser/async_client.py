@@ -0,0 +1,358 @@
+import asyncio
+from typing import Union, List
+
+from .client import normalize_api_response, _browser_open_params, _project_browser_list, \
+    _browser_create_values, _browser_update_values
+from .cdp import CdpConnection, CdpSession
+from .metrics import Metrics
+from .utils.json_codec import loads, dumps
+from .utils.ttl_cache import TTLCache
+from .utils.use_logger import WrapperRichLogger
+
+
+class AsyncIxBrowser:
+    """
+    非同步版本的ixBrowser客戶端
+
+    所有api_*方法與IxBrowser相同，但皆為coroutine，適合搭配asyncio.gather同時操作大量Profile。
+    需要安裝aiohttp: pip install ixBrowser[async]
+
+    使用方式:
+        async with AsyncIxBrowser(max_concurrency=50) as ix:
+            results = await asyncio.gather(*[ix.api_browser_open(pid) for pid in profile_ids])
+    """
+
+    def __init__(self, api_port: int = 53200, max_concurrency: int = 100, connection_limit: int = 100,
+                 timeout: float = None, group_cache_ttl: float = 300, metrics: Metrics = None):
+        """
+        :param api_port:            ixBrowser API的Port
+        :param max_concurrency:     同時進行中的API請求上限
+        :param connection_limit:    共用連線池的連線數上限
+        :param timeout:             每個請求的總逾時秒數，None為不限制
+        :param group_cache_ttl:     組名稱→組ID快取的存活秒數
+        :param metrics:             記錄每個API的延遲與錯誤，None則不記錄
+        """
+        self.ixbrowser_api_host = f"http://127.0.0.1:{api_port}/api/"
+        self.logger = WrapperRichLogger()
+        self.ses = None
+        self.current_browser_list: dict = {}
+        # profile_id -> CdpSession，get_cdp_session重複取得同一個Profile時重用
+        self.cdp_sessions: dict = {}
+        self.group_cache = TTLCache(maxsize=256, ttl=group_cache_ttl)
+        self.headers = {
+            "Content-Type": "application/json"
+        }
+        self.max_concurrency = max_concurrency
+        self.connection_limit = connection_limit
+        self.timeout = timeout
+        self.metrics = metrics
+        # 多個客戶端共用Metrics時以node標籤區分
+        self.metrics_node = f"127.0.0.1:{api_port}"
+        if metrics is not None:
+            metrics.add_gauge("open_browsers", lambda: len(self.current_browser_list), "Browsers opened by this client",
+                              node=self.metrics_node)
+        # Semaphore需要在事件迴圈中建立，因此延遲到第一次請求
+        self.__semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """
+        關閉共用的連線池與所有CDP連線
+        """
+        for pid in list(self.cdp_sessions):
+            await self.release_cdp_session(pid)
+        if self.ses is not None:
+            await self.ses.close()
+            self.ses = None
+
+    def __get_session(self):
+        """
+        取得共用的aiohttp Session，所有請求共用同一個連線池
+        """
+        if self.ses is None:
+            import aiohttp
+            connector = aiohttp.TCPConnector(limit=self.connection_limit)
+            self.ses = aiohttp.ClientSession(connector=connector, headers=self.headers,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.ses
+
+    async def __api_post(self, endpoint: str, params: dict):
+        """
+        發送API請求並處理響應
+
+        :param endpoint:    API名稱，例如 "browser-list"
+        :param params:      請求參數
+        :return: 處理後的結果字典
+        """
+        return await self.api_request(endpoint, params)
+
+    async def api_request(self, endpoint: str, params: dict, raw: bool = False):
+        """
+        發送任意API請求
+
+        :param endpoint:    API名稱，例如 "browser-list"
+        :param params:      請求參數
+        :param raw:         True則直接回傳API的原始數據，不經過normalize_api_response處理
+        :return:
+        """
+        ses = self.__get_session()
+        async with self.__semaphore:
+            if self.metrics is None:
+                payload = await self.__post(ses, endpoint, params)
+            else:
+                start = self.metrics.begin(endpoint, params, self.metrics_node)
+                try:
+                    payload = await self.__post(ses, endpoint, params)
+                except BaseException as e:
+                    self.metrics.end(endpoint, params, start, error=e, node=self.metrics_node)
+                    raise
+                self.metrics.end(endpoint, params, start, payload, node=self.metrics_node)
+        if raw:
+            return payload
+        return normalize_api_response(payload)
+
+    async def __post(self, ses, endpoint: str, params: dict):
+        async with ses.post(self.ixbrowser_api_host + endpoint, data=dumps(params)) as response:
+            # ixBrowser回傳的Content-Type不一定是application/json，有安裝orjson時使用orjson解析
+            return loads(await response.read())
+
+    # region iXBrowser API
+    async def api_group_list(self, page: int = 1, limit: int = 1000, title: str = ""):
+        """
+        獲取ixBrowser的組列表
+
+        :param page:
+        :param limit:
+        :param title: 組名稱
+        :return: {'result': True, 'data': [{'title': 'ixb', 'id': 6628}]}
+        """
+        params = {
+            "page": page,
+            "limit": limit,
+            "title": title
+        }
+        return await self.__api_post("group-list", params)
+
+    async def resolve_group_id(self, group: Union[str, int, None]) -> int:
+        """
+        將組名稱或組ID轉換為組ID，組名稱的查詢結果會快取group_cache_ttl秒
+
+        :param group:   組名稱或是組ID，""或None代表不篩選組
+        :return: 組ID，0代表不篩選組
+        """
+        if group is None or group == "":
+            return 0
+        if isinstance(group, int) and not isinstance(group, bool):
+            return group
+        if not isinstance(group, str):
+            raise Exception("錯誤的group參數")
+
+        group_id = self.group_cache.get(group)
+        if group_id is None:
+            # 找不到組時維持原本行為，不篩選組
+            res = await self.api_group_list(title=group)
+            if not res["result"]:
+                return 0
+            group_id = res["data"][0]["id"] if len(res["data"]) > 0 else 0
+            self.group_cache.set(group, group_id)
+        return group_id
+
+    def invalidate_group_cache(self, group: str = None):
+        """
+        清除組名稱→組ID快取，組被建立、改名或刪除後呼叫
+
+        :param group:   組名稱，不指定則清除全部
+        """
+        if group is None:
+            self.group_cache.invalidate()
+        else:
+            self.group_cache.invalidate(group)
+
+    async def api_browser_list(self, page: int = 1, limit: int = 1000, group: Union[str, int] = "",
+                               name: str = "", include_fields: List[str] = None, exclude_fields: List[str] = None,
+                               result_type: str = "dict"):
+        """
+        獲取ixBrowser的瀏覽器列表
+
+        :param page:            頁碼
+        :param limit:           每頁顯示的數量
+        :param group:           組名稱或是組ID，支持多型態
+        :param name:            瀏覽器名稱
+        :param include_fields:  只回傳想要的瀏覽器配置
+        :param exclude_fields:  排除不想回傳的瀏覽器配置
+        :param result_type:     "dict": 字典列表(預設) "record": ProfileRecord列表 "table": ProfileTable
+        :return:
+        """
+        if result_type not in ("dict", "record", "table"):
+            raise ValueError("result_type 必須是 dict、record 或 table")
+        group_id = await self.resolve_group_id(group)
+        params = {
+            "page": page,
+            "limit": limit,
+            "group_id": group_id,
+            "name": name
+        }
+
+        response = await self.__api_post("browser-list", params)
+
+        if response["result"]:
+            _project_browser_list(response, include_fields, exclude_fields, result_type)
+        return response
+
+    async def api_browser_open(self, profile_id: int, browser_open_random=False, args: list = None,
+                               load_extensions: bool = False,
+                               load_default_page: bool = False, proxy_mode: str = "2", dynamic_proxy_id: int = None,
+                               country: str = "TW",
+                               proxy_ip: str = None, proxy_port: str = None, proxy_type: str = "socks5",
+                               proxy_user: str = None, proxy_password: str = None, headless: bool = False):
+        """
+        開啟ixBrowser，參數與IxBrowser.api_browser_open相同
+
+        :param profile_id:  Profile的ID
+        :return:
+        """
+        endpoint, params = _browser_open_params(profile_id, browser_open_random, args, load_extensions,
+                                                load_default_page, proxy_mode, dynamic_proxy_id, country,
+                                                proxy_ip, proxy_port, proxy_type, proxy_user, proxy_password,
+                                                headless)
+        res = await self.__api_post(endpoint, params)
+        if res["result"]:
+            self.current_browser_list[profile_id] = res["data"]
+        return res
+
+    async def api_browser_close(self, profile_id: Union[int, List[int]]):
+        """
+        關閉ixBrowser
+
+        profile_id 是int也可以是一個list，關閉多個ixBrowser
+
+        :param profile_id:  profile_id的ID
+        :return:
+        """
+        if isinstance(profile_id, int):
+            profile_id = [profile_id]
+        params = {
+            "profile_id": profile_id
+        }
+        res = await self.__api_post("browser-close-all", params)
+        if res["result"]:
+            for pid in profile_id:
+                self.current_browser_list.pop(pid, None)
+                await self.release_cdp_session(pid)
+
+        return res
+
+    async def api_browser_cache_clear(self, profile_id: Union[int, List[int]]):
+        """
+        清除ixBrowser快取
+
+        :param profile_id:  profile_id的ID
+        :return: {'result': Bool } 不必關注結果，因為沒有緩存也會回傳False
+        """
+        if isinstance(profile_id, int):
+            profile_id = [profile_id]
+        params = {
+            "profile_id": profile_id
+        }
+        return await self.__api_post("browser-cache-clear", params)
+
+    async def api_browser_create(self, config: dict = None, **kwargs):
+        """
+        建立ixBrowser，參數與IxBrowser.api_browser_create相同
+
+        :param config:
+        :param kwargs:    建立ixBrowser的參數
+        :return:
+        """
+        base_values = _browser_create_values(config, kwargs)
+        return await self.__api_post("browser-create", base_values)
+
+    async def api_browser_update(self, profile_id: int, config: dict = None, **kwargs):
+        """
+        更新ixBrowser信息v2
+
+        :param profile_id:  ixBrowser的profile_id
+        :param config:  Profile配置信息
+        :return:
+        """
+        base_values = _browser_update_values(profile_id, config, kwargs)
+        return await self.__api_post("browser-update", base_values)
+
+    async def api_browser_delete(self, profile_id: Union[int, List[int]]):
+        """
+        删除ixBrowser
+
+        :param profile_id:  ixBrowser的profile_id
+        :return:
+        """
+        if isinstance(profile_id, int):
+            profile_id = [profile_id]
+        params = {
+            "profile_id": profile_id
+        }
+        return await self.__api_post("browser-deleted", params)
+
+    async def api_browser_random_info(self, profile_id: int):
+        """
+        隨機ixBrowser信息
+
+        :param profile_id:  ixProfile ID
+        :return:
+        """
+        params = {
+            "profile_id": profile_id
+        }
+        return await self.__api_post("random-browser-info", params)
+    # endregion
+
+    # region CDP
+    async def get_cdp_session(self, profile_id: int, **open_kwargs) -> CdpSession:
+        """
+        直接以DevTools WebSocket連接Profile的第一個分頁，不經過Selenium與chromedriver
+
+        尚未開啟時先開啟，同一個Profile重複呼叫時重用連線，所有連線共用同一個aiohttp Session
+
+            page = await ix.get_cdp_session(1)
+            await page.navigate("https://example.com")
+            title = await page.evaluate("document.title")
+
+        :param profile_id:  Profile的ID
+        :param open_kwargs: 尚未開啟時傳給api_browser_open的參數
+        :return:
+        """
+        page = self.cdp_sessions.get(profile_id)
+        if page is not None and not page.connection.closed:
+            return page
+
+        if profile_id not in self.current_browser_list:
+            res = await self.api_browser_open(profile_id, **open_kwargs)
+            if not res["result"]:
+                err_msg = "開啟ixBrowser失敗，原因：{}".format(res["error"])
+                self.logger.error(err_msg)
+                raise Exception(err_msg)
+        debugging_address = self.current_browser_list[profile_id]["debugging_address"]
+        connection = await CdpConnection.connect(debugging_address, self.__get_session(),
+                                                 timeout=self.timeout or 30)
+        try:
+            page = await connection.attach()
+        except BaseException:
+            await connection.close()
+            raise
+        self.cdp_sessions[profile_id] = page
+        return page
+
+    async def release_cdp_session(self, profile_id: int):
+        """
+        關閉Profile的CDP連線，不會關閉瀏覽器
+        """
+        page = self.cdp_sessions.pop(profile_id, None)
+        if page is not None:
+            await page.connection.close()
+    # endregion
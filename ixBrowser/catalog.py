@@ -0,0 +1,229 @@
+import threading
+from typing import Dict, List, Set, Union, Iterator
+
+
+class ProfileCatalog:
+    """
+    本地Profile目錄
+
+    透過browser-list載入一次後，以profile_id、組ID、名稱與開啟狀態建立索引，之後的查詢都在本地完成。
+    建立時會綁定到IxBrowser，api_browser_create/update/delete/open/close成功後會同步更新目錄。
+
+        catalog = ProfileCatalog(ixbrowser, refresh_interval=60)
+        catalog.by_group(6628)
+        catalog.open_profiles()
+    """
+
+    def __init__(self, client, refresh_interval: float = None, page_size: int = 200,
+                 include_fields: List[str] = None, autoload: bool = True):
+        """
+        :param client:              IxBrowser實例
+        :param refresh_interval:    背景增量刷新的間隔秒數，None為不自動刷新
+        :param page_size:           載入時每頁的數量
+        :param include_fields:      只保留的欄位，profile_id、group_id、name 一定會保留
+        :param autoload:            建立時立即載入
+        """
+        self.client = client
+        self.page_size = page_size
+        self.include_fields = None
+        if include_fields is not None:
+            self.include_fields = list(set(include_fields) | {"profile_id", "group_id", "name"})
+        self.refresh_interval = refresh_interval
+        self.__lock = threading.RLock()
+        self.__profiles: Dict[int, dict] = {}
+        self.__by_group: Dict[int, Set[int]] = {}
+        self.__by_name: Dict[str, Set[int]] = {}
+        self.__open: Set[int] = set()
+        self.__stop_event = threading.Event()
+        self.__thread = None
+
+        client.catalog = self
+        with client.browser_list_lock:
+            self.__open.update(client.current_browser_list.keys())
+        if autoload:
+            self.refresh()
+        if refresh_interval:
+            self.start()
+
+    # region Index
+    def __index(self, profile: dict):
+        pid = profile["profile_id"]
+        self.__profiles[pid] = profile
+        self.__by_group.setdefault(profile.get("group_id"), set()).add(pid)
+        self.__by_name.setdefault(profile.get("name"), set()).add(pid)
+
+    def __unindex(self, pid: int):
+        profile = self.__profiles.pop(pid, None)
+        if profile is None:
+            return None
+        for index, key in ((self.__by_group, profile.get("group_id")), (self.__by_name, profile.get("name"))):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(pid)
+                if not ids:
+                    del index[key]
+        return profile
+
+    # endregion
+    # region Refresh
+    def refresh(self) -> Dict[str, List[int]]:
+        """
+        重新掃描browser-list，依照profile_id比對差異後更新索引
+
+        :return: {"added": [...], "updated": [...], "removed": [...]}
+        """
+        seen = set()
+        added, updated = [], []
+        for profile in self.client.iter_browsers(include_fields=self.include_fields, page_size=self.page_size):
+            pid = profile["profile_id"]
+            seen.add(pid)
+            with self.__lock:
+                old = self.__profiles.get(pid)
+                if old == profile:
+                    continue
+                if old is None:
+                    added.append(pid)
+                else:
+                    self.__unindex(pid)
+                    updated.append(pid)
+                self.__index(profile)
+
+        with self.__lock:
+            removed = [pid for pid in self.__profiles if pid not in seen]
+            for pid in removed:
+                self.__unindex(pid)
+                self.__open.discard(pid)
+
+        return {"added": added, "updated": updated, "removed": removed}
+
+    def start(self):
+        """
+        啟動背景刷新執行緒
+        """
+        if self.__thread is not None and self.__thread.is_alive():
+            return
+        if not self.refresh_interval:
+            raise ValueError("refresh_interval 必須大於 0")
+        self.__stop_event.clear()
+        self.__thread = threading.Thread(target=self.__refresh_loop, name="ixBrowser-catalog", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        停止背景刷新執行緒
+        """
+        self.__stop_event.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __refresh_loop(self):
+        while not self.__stop_event.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception:
+                self.client.logger.exception("刷新Profile目錄失敗")
+
+    # endregion
+    # region Lookup
+    def get(self, profile_id: int) -> Union[dict, None]:
+        """
+        以profile_id取得Profile
+        """
+        with self.__lock:
+            return self.__profiles.get(profile_id)
+
+    def by_group(self, group_id: int) -> List[dict]:
+        """
+        取得組內所有Profile
+        """
+        with self.__lock:
+            return [self.__profiles[pid] for pid in self.__by_group.get(group_id, ())]
+
+    def by_name(self, name: str) -> List[dict]:
+        """
+        取得名稱完全相同的Profile
+        """
+        with self.__lock:
+            return [self.__profiles[pid] for pid in self.__by_name.get(name, ())]
+
+    def search_name(self, keyword: str) -> List[dict]:
+        """
+        取得名稱包含keyword的Profile，只掃描不重複的名稱
+        """
+        with self.__lock:
+            return [self.__profiles[pid] for name, ids in self.__by_name.items()
+                    if name is not None and keyword in name for pid in ids]
+
+    def is_open(self, profile_id: int) -> bool:
+        with self.__lock:
+            return profile_id in self.__open
+
+    def open_profiles(self) -> List[dict]:
+        """
+        取得目前開啟中的Profile，不在目錄中的Profile只回傳profile_id
+        """
+        with self.__lock:
+            return [self.__profiles.get(pid, {"profile_id": pid}) for pid in self.__open]
+
+    def __contains__(self, profile_id: int):
+        with self.__lock:
+            return profile_id in self.__profiles
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__profiles)
+
+    def __iter__(self) -> Iterator[dict]:
+        with self.__lock:
+            return iter(list(self.__profiles.values()))
+
+    # endregion
+    # region Write-through
+    def on_created(self, profile_id: int, values: dict):
+        """
+        api_browser_create成功後呼叫
+        """
+        profile = {k: v for k, v in values.items() if k != "config"}
+        profile["profile_id"] = profile_id
+        if self.include_fields is not None:
+            profile = {k: v for k, v in profile.items() if k in self.include_fields}
+        with self.__lock:
+            self.__unindex(profile_id)
+            self.__index(profile)
+
+    def on_updated(self, profile_id: int, values: dict):
+        """
+        api_browser_update成功後呼叫，只更新目錄中已存在的欄位
+        """
+        with self.__lock:
+            old = self.__unindex(profile_id)
+            if old is None:
+                return
+            profile = dict(old)
+            profile.update({k: v for k, v in values.items() if k in old})
+            self.__index(profile)
+
+    def on_deleted(self, profile_ids: List[int]):
+        """
+        api_browser_delete成功後呼叫
+        """
+        with self.__lock:
+            for pid in profile_ids:
+                self.__unindex(pid)
+                self.__open.discard(pid)
+
+    def on_opened(self, profile_id: int):
+        """
+        api_browser_open成功後呼叫
+        """
+        with self.__lock:
+            self.__open.add(profile_id)
+
+    def on_closed(self, profile_ids: List[int]):
+        """
+        api_browser_close成功後呼叫
+        """
+        with self.__lock:
+            self.__open.difference_update(profile_ids)
+    # endregion
@@ -0,0 +1,391 @@
+import asyncio
+import base64
+import inspect
+import itertools
+from typing import Awaitable, Callable, Dict, List, Union
+
+from .utils.json_codec import loads, dumps
+from .utils.use_logger import WrapperRichLogger
+
+
+class CdpError(Exception):
+    """
+    CDP指令回傳錯誤，或頁面執行JavaScript時拋出例外
+    """
+
+    def __init__(self, message: str, code: int = None):
+        super().__init__(message)
+        self.code = code
+
+
+EventHandler = Callable[[dict], Union[None, Awaitable[None]]]
+
+
+class CdpConnection:
+    """
+    連接瀏覽器DevTools的WebSocket，不經過chromedriver
+
+    一個瀏覽器使用一個連線，所有分頁的session以sessionId在同一個連線上多工。
+    需要安裝aiohttp: pip install ixBrowser[async]
+
+        connection = await CdpConnection.connect("127.0.0.1:9222")
+        page = await connection.attach()
+        await page.navigate("https://example.com")
+        title = await page.evaluate("document.title")
+        await connection.close()
+    """
+
+    def __init__(self, ws, http_session=None, owns_session: bool = False, timeout: float = 30):
+        """
+        :param ws:              aiohttp的ClientWebSocketResponse
+        :param http_session:    建立ws的aiohttp.ClientSession
+        :param owns_session:    關閉連線時是否一併關閉http_session
+        :param timeout:         指令預設的逾時秒數
+        """
+        self.ws = ws
+        self.http_session = http_session
+        self.owns_session = owns_session
+        self.timeout = timeout
+        self.logger = WrapperRichLogger()
+        # 讀取迴圈結束後為True，即使ws尚未關閉也不再送出指令
+        self.__closed = False
+        self.__ids = itertools.count(1)
+        self.__pending: Dict[int, asyncio.Future] = {}
+        # (sessionId, method) -> [handler]，sessionId為None代表瀏覽器層級的事件
+        self.__handlers: Dict[tuple, List[EventHandler]] = {}
+        self.__waiters: List[tuple] = []
+        # 執行中的coroutine事件處理，保留參照避免被回收
+        self.__tasks = set()
+        self.__reader = asyncio.ensure_future(self.__read_loop())
+
+    @classmethod
+    async def connect(cls, debugging_address: str, session=None, timeout: float = 30) -> "CdpConnection":
+        """
+        以ixBrowser回傳的debugging_address連接瀏覽器
+
+        :param debugging_address:   例如 "127.0.0.1:9222"
+        :param session:             共用的aiohttp.ClientSession，None則自行建立
+        :param timeout:             指令預設的逾時秒數
+        :return:
+        """
+        import aiohttp
+        owns_session = session is None
+        if owns_session:
+            session = aiohttp.ClientSession()
+        try:
+            async with session.get(f"http://{debugging_address}/json/version",
+                                   timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                info = loads(await response.read())
+            ws = await session.ws_connect(info["webSocketDebuggerUrl"], max_msg_size=0)
+        except BaseException:
+            if owns_session:
+                await session.close()
+            raise
+        return cls(ws, session, owns_session, timeout)
+
+    @property
+    def closed(self) -> bool:
+        return self.__closed or self.ws.closed
+
+    async def close(self):
+        """
+        關閉WebSocket，不會關閉瀏覽器
+        """
+        await self.ws.close()
+        self.__reader.cancel()
+        try:
+            await self.__reader
+        except (asyncio.CancelledError, Exception):
+            pass
+        if self.owns_session and self.http_session is not None:
+            await self.http_session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    # region Command / Event
+    async def send(self, method: str, params: dict = None, session_id: str = None, timeout: float = None) -> dict:
+        """
+        送出CDP指令並等待結果
+
+        :param method:      例如 "Page.navigate"
+        :param params:      指令參數
+        :param session_id:  分頁的sessionId，None為瀏覽器層級
+        :param timeout:     逾時秒數，預設使用連線的timeout
+        :return: 指令的result
+        """
+        if self.closed:
+            raise CdpError("DevTools連線已關閉")
+        command_id = next(self.__ids)
+        message = {"id": command_id, "method": method, "params": params or {}}
+        if session_id is not None:
+            message["sessionId"] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self.__pending[command_id] = future
+        try:
+            await self.ws.send_str(dumps(message).decode("utf8"))
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        finally:
+            self.__pending.pop(command_id, None)
+
+    def on(self, method: str, handler: EventHandler, session_id: str = None):
+        """
+        註冊事件處理函數，可以是一般函數或coroutine函數
+        """
+        self.__handlers.setdefault((session_id, method), []).append(handler)
+
+    def off(self, method: str, handler: EventHandler, session_id: str = None):
+        handlers = self.__handlers.get((session_id, method), [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def wait_for(self, method: str, session_id: str = None, predicate: Callable[[dict], bool] = None,
+                 timeout: float = None) -> "asyncio.Future":
+        """
+        等待下一個符合條件的事件，需要在觸發事件的指令送出前呼叫，不再需要時可以cancel()
+
+            load = connection.wait_for("Page.loadEventFired", session_id)
+            await connection.send("Page.navigate", {"url": url}, session_id)
+            await load
+
+        :return: 事件的params
+        """
+        future = asyncio.get_running_loop().create_future()
+        waiter = (session_id, method, predicate, future)
+        self.__waiters.append(waiter)
+
+        async def wait():
+            try:
+                return await asyncio.wait_for(future, timeout or self.timeout)
+            finally:
+                if waiter in self.__waiters:
+                    self.__waiters.remove(waiter)
+
+        return asyncio.ensure_future(wait())
+
+    async def attach(self, target_id: str = None) -> "CdpSession":
+        """
+        連接分頁，建立以sessionId區分的CdpSession
+
+        :param target_id:   分頁的targetId，None則使用第一個分頁，沒有分頁時開新分頁
+        :return:
+        """
+        if target_id is None:
+            targets = (await self.send("Target.getTargets"))["targetInfos"]
+            pages = [t for t in targets if t.get("type") == "page"]
+            if pages:
+                target_id = pages[0]["targetId"]
+            else:
+                target_id = (await self.send("Target.createTarget", {"url": "about:blank"}))["targetId"]
+        res = await self.send("Target.attachToTarget", {"targetId": target_id, "flatten": True})
+        return CdpSession(self, res["sessionId"], target_id)
+
+    async def new_page(self, url: str = "about:blank") -> "CdpSession":
+        """
+        開新分頁並連接
+        """
+        target_id = (await self.send("Target.createTarget", {"url": url}))["targetId"]
+        return await self.attach(target_id)
+
+    async def __read_loop(self):
+        import aiohttp
+        try:
+            async for msg in self.ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    if msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSE):
+                        break
+                    continue
+                data = loads(msg.data)
+                if "id" in data:
+                    future = self.__pending.get(data["id"])
+                    if future is None or future.done():
+                        continue
+                    if "error" in data:
+                        future.set_exception(CdpError(data["error"].get("message", ""), data["error"].get("code")))
+                    else:
+                        future.set_result(data.get("result", {}))
+                elif "method" in data:
+                    self.__dispatch(data.get("sessionId"), data["method"], data.get("params", {}))
+        except Exception:
+            self.logger.exception("DevTools連線讀取失敗")
+        finally:
+            # 讀取迴圈結束後沒有人會設定指令結果，標記為已關閉讓send立即失敗
+            self.__closed = True
+            for future in self.__pending.values():
+                if not future.done():
+                    future.set_exception(CdpError("DevTools連線已關閉"))
+            if not self.ws.closed:
+                try:
+                    await self.ws.close()
+                except Exception:
+                    pass
+
+    def __dispatch(self, session_id, method: str, params: dict):
+        # 使用者的predicate與事件處理拋出例外時只影響該次呼叫，不能中斷讀取迴圈
+        for waiter in list(self.__waiters):
+            w_session, w_method, predicate, future = waiter
+            if w_session != session_id or w_method != method or future.done():
+                continue
+            try:
+                matched = predicate is None or predicate(params)
+            except Exception as e:
+                future.set_exception(e)
+                self.__waiters.remove(waiter)
+                continue
+            if matched:
+                future.set_result(params)
+                self.__waiters.remove(waiter)
+        for handler in list(self.__handlers.get((session_id, method), ())):
+            try:
+                result = handler(params)
+            except Exception:
+                self.logger.exception(f"{method} 事件處理失敗")
+                continue
+            if inspect.isawaitable(result):
+                task = asyncio.ensure_future(result)
+                self.__tasks.add(task)
+                task.add_done_callback(self.__tasks.discard)
+                task.add_done_callback(lambda t: self.__log_task_error(method, t))
+
+    def __log_task_error(self, method: str, task: "asyncio.Future"):
+        if not task.cancelled() and task.exception() is not None:
+            error = task.exception()
+            self.logger.error(f"{method} 事件處理失敗: {type(error).__name__}: {error}")
+    # endregion
+
+
+class CdpSession:
+    """
+    一個分頁的CDP session
+    """
+
+    def __init__(self, connection: CdpConnection, session_id: str, target_id: str):
+        self.connection = connection
+        self.session_id = session_id
+        self.target_id = target_id
+        self.__enabled = set()
+        self.__interceptor = None
+
+    async def send(self, method: str, params: dict = None, timeout: float = None) -> dict:
+        return await self.connection.send(method, params, self.session_id, timeout)
+
+    def on(self, method: str, handler: EventHandler):
+        self.connection.on(method, handler, self.session_id)
+
+    def off(self, method: str, handler: EventHandler):
+        self.connection.off(method, handler, self.session_id)
+
+    def wait_for(self, method: str, predicate: Callable[[dict], bool] = None, timeout: float = None):
+        return self.connection.wait_for(method, self.session_id, predicate, timeout)
+
+    async def enable(self, domain: str):
+        """
+        啟用CDP domain，例如 "Page"、"Network"，重複呼叫只送出一次
+        """
+        if domain not in self.__enabled:
+            await self.send(f"{domain}.enable")
+            self.__enabled.add(domain)
+
+    async def navigate(self, url: str, wait_load: bool = True, timeout: float = None) -> dict:
+        """
+        前往網址
+
+        :param url:         網址
+        :param wait_load:   是否等待load事件
+        :param timeout:     等待load事件的逾時秒數
+        :return: Page.navigate的result
+        """
+        await self.enable("Page")
+        load = self.wait_for("Page.loadEventFired", timeout=timeout) if wait_load else None
+        try:
+            res = await self.send("Page.navigate", {"url": url})
+            if res.get("errorText"):
+                raise CdpError(f"前往 {url} 失敗: {res['errorText']}")
+            if load is not None:
+                await load
+                load = None
+            return res
+        finally:
+            if load is not None:
+                load.cancel()
+
+    async def evaluate(self, expression: str, await_promise: bool = False):
+        """
+        在頁面執行JavaScript並回傳結果
+
+        :param expression:      JavaScript運算式
+        :param await_promise:   結果為Promise時等待完成
+        :return: 結果的值
+        """
+        res = await self.send("Runtime.evaluate", {"expression": expression, "returnByValue": True,
+                                                   "awaitPromise": await_promise})
+        if "exceptionDetails" in res:
+            details = res["exceptionDetails"]
+            message = details.get("exception", {}).get("description") or details.get("text", "")
+            raise CdpError(f"執行JavaScript失敗: {message}")
+        return res.get("result", {}).get("value")
+
+    async def intercept(self, handler: Callable[[dict], Union[None, dict, Awaitable]],
+                        patterns: List[dict] = None):
+        """
+        攔截網路請求(Fetch domain)
+
+        handler(event) 接收Fetch.requestPaused事件，可以是coroutine函數，回傳:
+            None                                        繼續送出請求
+            {"fail": "BlockedByClient"}                 讓請求失敗
+            {"status": 200, "body": "...", "headers": {...}}    直接回應
+
+        :param handler:     處理函數
+        :param patterns:    攔截的請求，預設為全部，例如 [{"urlPattern": "*.png"}]
+        """
+        if self.__interceptor is not None:
+            self.off("Fetch.requestPaused", self.__interceptor)
+
+        async def on_paused(event: dict):
+            try:
+                action = handler(event)
+                if inspect.isawaitable(action):
+                    action = await action
+            except Exception:
+                # 處理函數失敗時繼續送出請求，避免請求一直停在暫停狀態
+                self.connection.logger.exception("攔截請求的處理函數失敗")
+                action = None
+            try:
+                await self.__resolve_request(event["requestId"], action)
+            except CdpError:
+                # 分頁已關閉或請求已被取消
+                pass
+
+        self.__interceptor = on_paused
+        self.on("Fetch.requestPaused", on_paused)
+        await self.send("Fetch.enable", {"patterns": patterns or [{"urlPattern": "*"}]})
+
+    async def stop_intercept(self):
+        if self.__interceptor is not None:
+            self.off("Fetch.requestPaused", self.__interceptor)
+            self.__interceptor = None
+        await self.send("Fetch.disable")
+
+    async def __resolve_request(self, request_id: str, action: Union[None, dict]):
+        if not action:
+            await self.send("Fetch.continueRequest", {"requestId": request_id})
+        elif "fail" in action:
+            await self.send("Fetch.failRequest", {"requestId": request_id, "errorReason": action["fail"]})
+        else:
+            body = action.get("body", b"")
+            if isinstance(body, str):
+                body = body.encode("utf8")
+            headers = [{"name": k, "value": str(v)} for k, v in action.get("headers", {}).items()]
+            await self.send("Fetch.fulfillRequest", {"requestId": request_id,
+                                                     "responseCode": action.get("status", 200),
+                                                     "responseHeaders": headers,
+                                                     "body": base64.b64encode(body).decode("ascii")})
+
+    async def detach(self):
+        """
+        中斷與分頁的連接，不會關閉分頁
+        """
+        await self.connection.send("Target.detachFromTarget", {"sessionId": self.session_id})
@@ -1,29 +1,423 @@
+import os
 import random
+import threading
 import time
 import uuid
-import winreg
-from typing import Union, List
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Union, List, Iterable, Iterator, Tuple
 import requests
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 
-from core.ixBrowser.utils.use_logger import WrapperRichLogger
+from .discovery import Discovery, RegistryDiscovery, default_discovery
+from .lease import LeaseRegistry, LEASE_CONFLICT_CODE
+from .metrics import Metrics
+from .monitor import LOCAL_HOSTS
+from .readiness import ReadinessProbe
+from .records import build_records, ProfileRecord, ProfileTable
+from .session_store import SessionStore
+from .transport import TransportConfig
+from .utils.batcher import Batcher
+from .utils.checkpoint import Checkpoint
+from .utils.json_codec import loads
+from .utils.probe import split_address, tcp_probe, devtools_probe
+from .utils.rate_limit import RateLimiter
+from .utils.single_flight import SingleFlight
+from .utils.ttl_cache import TTLCache
+from .utils.use_logger import WrapperRichLogger
+
+
+def unwrap_data(data_obj):
+    """
+    迭代查詢最底層的"data"
+
+    :param data_obj: 要查詢的數據對象，可以是字典或列表
+    :return: 最底層的"data"字典或列表，如果最底層既不是字典也不是列表則返回None
+    """
+    # 如果是{"data": {"data": ...}}，則繼續往下
+    while isinstance(data_obj, dict) and "data" in data_obj:
+        data_obj = data_obj["data"]
+    if isinstance(data_obj, (dict, list)):
+        return data_obj
+    return None
+
+
+def _page_total(response) -> Union[int, None]:
+    """
+    分頁API回應中的總筆數，例如 {"data": {"total": 25, "data": [...]}}
+
+    :param response: API的原始回應
+    :return: 總筆數，找不到時返回None
+    """
+    data = response.get("data") if isinstance(response, dict) else None
+    while isinstance(data, dict):
+        total = data.get("total")
+        if isinstance(total, int) and not isinstance(total, bool):
+            return total
+        data = data.get("data")
+    return None
+
+
+def normalize_api_response(response):
+    """
+    API響應處理函數，同步與非同步客戶端共用
+
+    :param response: API的響應數據
+    :return: 處理後的結果字典
+    """
+    # 檢查是否有"error"和"data"鍵
+    if "error" not in response or "data" not in response:
+        return {}
+
+    # 檢查error code是否為0
+    error = response["error"]
+    if error["code"] != 0:
+        return {"result": False, "error": error}
+
+    # 如果有更底層的"data"，則使用最底層的"data"
+    data = response["data"]
+    deepest_data = unwrap_data(data)
+    return {"result": True, "data": data if deepest_data is None else deepest_data}
+
+
+def _browser_open_params(profile_id: int, browser_open_random=False, args: list = None,
+                         load_extensions: bool = False, load_default_page: bool = False, proxy_mode: str = "2",
+                         dynamic_proxy_id: int = None, country: str = "TW", proxy_ip: str = None,
+                         proxy_port: str = None, proxy_type: str = "socks5", proxy_user: str = None,
+                         proxy_password: str = None, headless: bool = False):
+    """
+    組合開啟ixBrowser的API名稱與參數
+
+    :return: (API名稱, 參數)
+    """
+    if profile_id < 1:
+        raise ValueError("Profile ID 必須大於 0")
+
+    if args is None:
+        args = [
+            "--disable-extension-welcome-page"
+        ]
+        if headless:
+            args.append("--headless")
+
+    if browser_open_random:
+        params = {
+            "profile_id": profile_id,
+            "args": args,
+            "load_extensions": load_extensions,
+            "load_default_page": load_default_page,
+            "dynamic_proxy_id": dynamic_proxy_id,
+            "country": country,
+            "proxy_ip": proxy_ip,
+            "proxy_mode": proxy_mode,
+            "proxy_port": proxy_port,
+            "proxy_type": proxy_type,
+            "proxy_user": proxy_user,
+            "proxy_password": proxy_password,
+        }
+        return "browser-open-random", params
+    else:
+        params = {
+            "profile_id": profile_id,
+            "args": args,
+            "load_extensions": load_extensions,
+            "load_default_page": load_default_page,
+        }
+        return "browser-open", params
+
+
+def _filter_browser_fields(response: dict, include_fields: List[str] = None, exclude_fields: List[str] = None):
+    """
+    依照include_fields/exclude_fields刪除瀏覽器列表中的欄位
+
+    :param response:        api_browser_list的回傳結果
+    :param include_fields:  只回傳想要的瀏覽器配置
+    :param exclude_fields:  排除不想回傳的瀏覽器配置
+    """
+    # 如果有指定的欄位，則將其餘不包含的欄位刪除
+    if include_fields is not None:
+        include_fields = set(include_fields)
+        for browser in response["data"]:
+            for key in [k for k in browser if k not in include_fields]:
+                del browser[key]
+
+    # 如果有指定要排除的欄位，則將其餘欄位刪除
+    if exclude_fields is not None:
+        for browser in response["data"]:
+            for key in exclude_fields:
+                browser.pop(key, None)
+
+
+def _project_browser_list(response: dict, include_fields: List[str] = None, exclude_fields: List[str] = None,
+                          result_type: str = "dict"):
+    """
+    依照result_type轉換瀏覽器列表並套用欄位投影
+
+    :param response:        api_browser_list的回傳結果
+    :param include_fields:  只回傳想要的瀏覽器配置
+    :param exclude_fields:  排除不想回傳的瀏覽器配置
+    :param result_type:     "dict": 字典列表 "record": ProfileRecord列表 "table": ProfileTable
+    """
+    if result_type == "dict":
+        _filter_browser_fields(response, include_fields, exclude_fields)
+    elif result_type == "record":
+        response["data"] = build_records(response["data"], include_fields, exclude_fields)
+    elif result_type == "table":
+        response["data"] = ProfileTable.from_browsers(response["data"], include_fields, exclude_fields)
+    else:
+        raise ValueError("result_type 必須是 dict、record 或 table")
+
+
+def _browser_create_values(config: dict = None, kwargs: dict = None):
+    """
+    組合建立ixBrowser的預設參數，並以config與kwargs覆蓋
+
+    :return: 建立ixBrowser的參數
+    """
+
+    def random_color():
+        return "#{:02x}{:02x}{:02x}".format(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
+
+    def random_ip_address():
+        return ".".join([str(random.randint(0, 255)) for _ in range(4)])
+
+    config = config or {}
+    # 隨機顏色
+
+    base_values = {
+        "color": random_color(),
+        "site_url": "https://google.com/",
+        "name": uuid.uuid4().hex[:8], "note": "", "group_id": 1, "username": "", "password": "",
+        "proxy_mode": 2, "proxy_type": "direct", "proxy_ip": "", "proxy_port": "", "proxy_user": "",
+        "proxy_password": "", "cookie": "", "open_url": "", "display_url": "", "proxy_id": "",
+        'config': {
+            "hardware_concurrency": "4",
+            "device_memory": "8",
+            "is_cookies_cache": "1",
+            "is_tabs_cache": "0",
+            "is_proxy_check": "0",
+            "is_proxy_change": False,
+            "ua_type": 1,
+            "platform": "Windows",
+            "br_version": "",
+            "ua_info": "Mozilla/5.0 (Windows NT 6.2; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/104.0.0.0 Safari/537.36",
+            "language_type": "1",
+            "language": "cn",
+            "timezone_type": "1",
+            "timezone": "Asia/Taipei",
+            "location": "1",
+            "location_type": "1",
+            "longitude": 25.7247,
+            "latitude": 119.3712,
+            "accuracy": 1000,
+            "resolving_power_type": "1",
+            "resolving_power": "1920,1080",
+            "fonts_type": "1",
+            "fonts": [],
+            "webrtc": "1",
+            "webgl_image": "1",
+            "canvas_type": "1",
+            "webgl_data_type": "1",
+            "webgl_factory": "Google Inc.",
+            "webgl_info": "ANGLE (AMD, ATI Radeon HD 4200 Direct3D9Ex vs_3_0 ps_3_0, atiumd64.dll-8.14.10.678)",
+            "audio_context": "1",
+            "media_equipment": "1",
+            "client_rects": "1",
+            "speech_voices": "1",
+            "product_type": "1",
+            "track": "1",
+            "allow_scan_ports": "0",
+            "allow_scan_ports_content": "",
+            "real_ip": random_ip_address()
+        }}
+
+    # 使用传入的kwargs参数更新默认值
+    base_values.update(config)
+    base_values.update(kwargs or {})
+    return base_values
+
+
+def _browser_update_values(profile_id: int, config: dict = None, kwargs: dict = None):
+    """
+    組合更新ixBrowser的預設參數，並以config與kwargs覆蓋
+
+    :return: 更新ixBrowser的參數
+    """
+    config = config or {}
+    base_values = {
+        "profile_id": profile_id,
+        "site_url": "",
+        "name": "",
+        "note": "",
+        "group_id": 1,
+        "username": "",
+        "password": "",
+        "cookie": "",
+        "language_type": "2",
+        "language": "cn",
+        "timezone_type": "2",
+        "timezone": "Asia/Taiwan",
+        "location": "1",
+        "location_type": "1",
+        "longitude": "25.7247",
+        "latitude": "119.3712",
+        "cookies_cache": "0",
+        "disable_image": "0",
+        "disable_audio": "0",
+        "webgl_factory": "Google Inc.",
+        "webgl_info": "ANGLE (AMD, ATI Radeon HD 4200 Direct3D9Ex vs_3_0 ps_3_0, atiumd64.dll-8.14.10.678)",
+        "user_agent": {
+            "ua_info": "Mozilla/5.0 (Windows NT 6.2; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/104.0.0.0 Safari/537.36"
+        }
+    }
+    base_values.update(config)
+    base_values.update(kwargs or {})
+    return base_values
+
+
+def _created_profile_id(data):
+    """
+    從browser-create的回傳數據取得新的profile_id
+
+    :return: profile_id，無法取得時返回None
+    """
+    profile_id = data.get("profile_id") if isinstance(data, dict) else data
+    if isinstance(profile_id, int) and not isinstance(profile_id, bool):
+        return profile_id
+    return None
+
+
+def _diff_fields(current: Union[dict, None], changes: dict) -> dict:
+    """
+    取得與目前狀態不同的欄位，目前狀態中沒有的欄位視為有變更
+
+    :param current: 目前的Profile資料
+    :param changes: 想要更新的欄位
+    :return: 有變更的欄位
+    """
+    if not current:
+        return dict(changes)
+    missing = object()
+    return {k: v for k, v in changes.items() if current.get(k, missing) != v}
+
+
+def _iter_specs(specs: Union[str, Iterable[dict]]) -> Iterator[dict]:
+    """
+    逐筆讀取建立參數，specs可以是JSONL檔案路徑或是字典的迭代器
+    """
+    if isinstance(specs, str):
+        with open(specs, encoding="utf8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield loads(line)
+    else:
+        yield from specs
 
 
 class IxBrowser:
-    def __init__(self, api_port: int = 53200):
-        self.ixbrowser_install_dir: str
-        self.ixbrowser_exe_path: str
-        self.ixbrowser_version: str
-        self.ixbrowser_api_host = f"http://127.0.0.1:{api_port}/api/"
+    def __init__(self, api_port: int = 53200, group_cache_ttl: float = 300, lazy: bool = False,
+                 discovery: Discovery = None, api_host: str = "127.0.0.1", transport: TransportConfig = None,
+                 metrics: Metrics = None, lease_registry: LeaseRegistry = None, batch_window: float = None,
+                 max_batch: int = 100, session_store: SessionStore = None):
+        """
+        :param api_port:        ixBrowser API的Port
+        :param group_cache_ttl: 組名稱→組ID快取的存活秒數
+        :param lazy:            延遲初始化，第一次呼叫API時才查詢安裝位置並啟動ixBrowser
+        :param discovery:       查詢ixBrowser安裝位置的策略，預設為 環境變數 -> 登錄檔 並快取在磁碟上
+                                只連接遠端API時使用 ApiOnlyDiscovery()
+        :param api_host:        ixBrowser API的主機
+        :param transport:       連線池、逾時、重試與每個執行緒獨立Session的設定
+        :param metrics:         記錄每個API的延遲與錯誤，None則不記錄
+        :param lease_registry:  跨程序共用的Profile租約，開啟前先取得租約，避免多個程序開啟同一個Profile
+        :param batch_window:    合併多個執行緒的單一Profile關閉/清除快取請求，最多等待的秒數，None則不合併
+        :param max_batch:       每次最多合併的Profile數量
+        :param session_store:   保存開啟中的瀏覽器，初始化時重新連接上次仍在執行的瀏覽器
+        """
+        self.ixbrowser_install_dir: str = ""
+        self.ixbrowser_exe_path: str = ""
+        self.ixbrowser_version: str = ""
+        self.ixbrowser_api_only = False
+        self.ixbrowser_pid = None
+        self.readiness_report = None
+        self.ixbrowser_api_host = f"http://{api_host}:{api_port}/api/"
+        self.discovery = discovery or default_discovery()
         self.logger = WrapperRichLogger()
-        self.ses = requests.Session()
-        self.current_browser_list: dict = {}
         self.headers = {
             "Content-Type": "application/json"
         }
-        self.ses.headers.update(self.headers)
-        self.init()
+        self.transport = transport or TransportConfig()
+        self.__local = threading.local()
+        self.ses = self.transport.create_session(self.headers)
+        self.current_browser_list: dict = {}
+        # 保護current_browser_list，讓open_many/close_many可以在多執行緒中更新
+        self.browser_list_lock = threading.RLock()
+        self.group_cache = TTLCache(maxsize=256, ttl=group_cache_ttl)
+        # 由ProfileCatalog綁定，API成功後同步更新
+        self.catalog = None
+        # profile_id -> (debugging_address, WebDriver)，重複連接同一個Profile時重用
+        self.driver_cache: dict = {}
+        # 同一個Profile同時開啟或建立driver時只執行一次
+        self.open_flight = SingleFlight()
+        # profile_id -> 開啟時傳入的參數，BrowserMonitor重新開啟時沿用
+        self.open_kwargs: Dict[int, dict] = {}
+        self.driver_flight = SingleFlight()
+        self.lease_registry = lease_registry
+        # 瀏覽器關閉或被移除開啟紀錄後呼叫 hook(profile_ids)
+        self.close_hooks: List[Callable[[List[int]], None]] = []
+        # 合併單一profile_id的browser-close-all / browser-cache-clear請求
+        self.close_batcher = None
+        self.cache_clear_batcher = None
+        if batch_window is not None:
+            self.close_batcher = Batcher(self.__browser_close, batch_window, max_batch, "ixBrowser-close")
+            self.cache_clear_batcher = Batcher(self.__browser_cache_clear, batch_window, max_batch,
+                                               "ixBrowser-cache-clear")
+        self.metrics = metrics
+        # 多個客戶端共用Metrics時以node標籤區分
+        self.metrics_node = f"{api_host}:{api_port}"
+        if metrics is not None:
+            metrics.add_gauge("open_browsers", lambda: len(self.current_browser_list), "Browsers opened by this client",
+                              node=self.metrics_node)
+        self.__initialized = False
+        self.__initializing = False
+        self.__init_lock = threading.RLock()
+        # lazy模式下延遲到初始化時才重新連接，建立時不做任何I/O
+        self.session_store = session_store
+        if not lazy:
+            self.ensure_initialized()
+
+    @property
+    def ses(self) -> requests.Session:
+        """
+        目前執行緒使用的Session，session_per_thread時每個執行緒各自建立
+        """
+        if self.transport.session_per_thread:
+            ses = getattr(self.__local, "ses", None)
+            if ses is None:
+                ses = self.__local.ses = self.transport.create_session(self.headers)
+            return ses
+        return self.__ses
+
+    @ses.setter
+    def ses(self, value: requests.Session):
+        self.__ses = value
+
+    def ensure_initialized(self):
+        """
+        確保已經初始化，lazy模式下由第一次API呼叫觸發
+        """
+        if self.__initialized:
+            return
+        with self.__init_lock:
+            # init()內部也會呼叫API，避免遞迴初始化
+            if self.__initialized or self.__initializing:
+                return
+            self.__initializing = True
+            try:
+                self.init()
+                if self.session_store is not None:
+                    self.restore_sessions()
+                self.__initialized = True
+            finally:
+                self.__initializing = False
 
     def init(self):
         """
@@ -31,6 +425,9 @@ class IxBrowser:
         """
 
         self.__update_ixbrowser_info()
+        if self.ixbrowser_api_only:
+            self.logger.log(f"只使用ixBrowser API: {self.ixbrowser_api_host}")
+            return
         if not self.ixbrowser_install_dir:
             raise Exception("未安裝ixBrowser")
         self.logger.bullet("ixBrowser資訊", [
@@ -52,63 +449,45 @@ class IxBrowser:
                         "install_path": "C:\\Program Files\\ixBrowser\\"
                     }
         """
-        try:
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE,
-                                r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall") as key:
-                num_sub_keys = winreg.QueryInfoKey(key)[0]
-                for i in range(num_sub_keys):
-                    sub_key_name = winreg.EnumKey(key, i)
-                    with winreg.OpenKey(key, sub_key_name) as sub_key:
-                        try:
-                            name = winreg.QueryValueEx(sub_key, "DisplayName")[0]
-                            if str(name).startswith("ixBrowser"):
-                                version = winreg.QueryValueEx(sub_key, "DisplayVersion")[0]
-                                uninstall_string = winreg.QueryValueEx(sub_key, "UninstallString")[0]
-                                start_index = uninstall_string.find('"') + 1
-                                end_index = uninstall_string.find('"', start_index)
-                                install_path = uninstall_string[start_index:end_index].replace(
-                                    "Uninstall ixBrowser.exe", "")
-
-                                return {
-                                    "name": name,
-                                    "version": version,
-                                    "install_path": install_path
-                                }
-                        except FileNotFoundError as e:
-                            return {}
-        except FileNotFoundError:
-            pass
-
-        return False
+        return RegistryDiscovery().discover() or False
 
-    def launch_ixbrowser(self):
+    def launch_ixbrowser(self, deadline: float = 60):
         """
-        啟動ixBrowser
+        啟動ixBrowser，並等待API可以使用
+
+        以TCP連線與輕量API請求搭配指數退避檢查，結果記錄在 self.readiness_report
+
+        :param deadline:    等待的總秒數
+        :return: True: ixBrowser已可使用 False: 啟動失敗或逾時
         """
-        import subprocess
-        count = 0
-        while True:
-            count += 1
-            if count > 5:
-                self.logger.error("啟動ixBrowser超時")
-                return False
-            try:
-                # 檢查ixBrowser主程式
-                if not self.__check_ixbrowser_app_is_running():
-                    subprocess.Popen(self.ixbrowser_exe_path)
-                    time.sleep(3)
-
-                # 檢查ixBrowser服務
-                if not self.__check_ixbrowser_service_is_running():
-                    if self.__check_ixbrowser_app_is_running():
-                        self.logger.log("ixBrowser主程式已啟動，等待ixBrowser服務啟動...(可能是沒有登入)")
-                        time.sleep(3)
-                else:
-                    return True
+        probe = ReadinessProbe(self.ixbrowser_api_host, deadline=deadline)
+        if self.ixbrowser_api_only:
+            self.readiness_report = probe.wait(self.__check_ixbrowser_service_is_running)
+            return self.readiness_report.ready
 
-            except Exception:
-                self.logger.exception("啟動ixBrowser失敗")
-                return False
+        import subprocess
+        process = None
+        launch_time = 0.0
+        try:
+            # API Port已經可以連線時不必掃描所有程序
+            if not tcp_probe(self.ixbrowser_api_host) and not self.__check_ixbrowser_app_is_running():
+                start = time.monotonic()
+                process = subprocess.Popen(self.ixbrowser_exe_path)
+                launch_time = time.monotonic() - start
+                self.ixbrowser_pid = process.pid
+
+            report = probe.wait(self.__check_ixbrowser_service_is_running, process=process)
+        except Exception:
+            self.logger.exception("啟動ixBrowser失敗")
+            return False
+
+        report.phases = {"launch": launch_time, **report.phases}
+        self.readiness_report = report
+        if not report.ready:
+            self.logger.error(f"啟動ixBrowser失敗，原因：{report.error}")
+            return False
+        self.logger.log("ixBrowser就緒，" + "，".join(f"{k}: {v:.2f}s" for k, v in report.phases.items()))
+        return True
 
     @staticmethod
     def close_ixbrowser():
@@ -127,14 +506,16 @@ class IxBrowser:
         """
         更新ixBrowser資訊
         """
-        ixbrowser_info = self.get_ixbrowser_info()
+        ixbrowser_info = self.discovery.discover()
         if ixbrowser_info:
             self.ixbrowser_install_dir = ixbrowser_info["install_path"]
             self.ixbrowser_version = ixbrowser_info["version"]
-            self.ixbrowser_exe_path = self.ixbrowser_install_dir + "ixBrowser.exe"
+            self.ixbrowser_api_only = bool(ixbrowser_info.get("api_only"))
+            self.ixbrowser_exe_path = self.ixbrowser_install_dir + "ixBrowser.exe" if self.ixbrowser_install_dir else ""
         else:
             self.ixbrowser_install_dir = ""
             self.ixbrowser_version = ""
+            self.ixbrowser_api_only = False
             self.ixbrowser_exe_path = ""
 
     @staticmethod
@@ -154,14 +535,17 @@ class IxBrowser:
                 pass
         return False
 
-    def __check_ixbrowser_service_is_running(self):
+    def __check_ixbrowser_service_is_running(self, timeout: float = None):
         """
         檢查ixBrowser服務是否正在執行，或是有沒有登入
 
+        :param timeout:     請求逾時秒數，None則使用transport的設定
         :return:    True: ixbrowser服務正在執行
                     False: ixbrowser服務沒有執行
         """
-        res = self.api_browser_list()
+        # 只取一筆，降低檢查的成本；由ReadinessProbe負責重試，這裡不重試
+        params = {"page": 1, "limit": 1, "group_id": 0, "name": ""}
+        res = self.api_request("browser-list", params, timeout=timeout, retries=0)
         if res["result"]:
             return True
         return False
@@ -174,50 +558,46 @@ class IxBrowser:
         :param response: API的響應數據
         :return: 處理後的結果字典
         """
-
-        def get_deepest_data(data_obj):
-            """
-            遞歸查詢最底層的"data"，返回該"data"字典
-
-            :param data_obj: 要查詢的數據對象，可以是字典或列表
-            :return: 最底層的"data"字典或None
-            """
-            if isinstance(data_obj, dict):
-                if "data" in data_obj:
-                    # 如果是{"data": {"data": ...}}，則繼續遞歸
-                    return get_deepest_data(data_obj["data"])
-                else:
-                    # 否則直接返回該字典
-                    return data_obj
-            elif isinstance(data_obj, list):
-                # 如果是[{"data": ...}, {"data": ...}]
-                return data_obj
-            else:
-                # 如果既不是字典也不是列表，則返回None
-                return None
-
         # self.logger.log(response)
-        result = {}
+        return normalize_api_response(response)
 
-        # 檢查是否有"error"和"data"鍵
-        if "error" in response and "data" in response:
-            # 檢查error code是否為0
-            if response["error"]["code"] == 0:
-                result["result"] = True
-            else:
-                result["result"] = False
-                result["error"] = response["error"]
-                return result
+    def __api_post(self, endpoint: str, params: dict):
+        """
+        發送API請求並處理響應
 
-            # 將原始的"data"內容放入新的"data"字典中
-            result["data"] = response["data"]
+        :param endpoint:    API名稱，例如 "browser-list"
+        :param params:      請求參數
+        :return: 處理後的結果字典
+        """
+        return self.api_request(endpoint, params)
 
-            # 遞歸處理"data"，如果有更底層的"data"，則覆蓋之前的"data"
-            deepest_data = get_deepest_data(response["data"])
-            if deepest_data is not None:
-                result["data"] = deepest_data
+    def __post(self, endpoint: str, params: dict, timeout: float = None, retries: int = None):
+        response = self.transport.post(self.ses, self.ixbrowser_api_host + endpoint, endpoint, params,
+                                       timeout, retries)
+        # 有安裝orjson時使用orjson解析
+        return loads(response.content)
+
+    def api_request(self, endpoint: str, params: dict, raw: bool = False, timeout: float = None,
+                    retries: int = None):
+        """
+        發送任意API請求
 
-        return result
+        :param endpoint:    API名稱，例如 "browser-list"
+        :param params:      請求參數
+        :param raw:         True則直接回傳API的原始數據，不經過__api_response處理
+        :param timeout:     這次請求的逾時秒數，None則使用transport的設定
+        :param retries:     這次請求的最多重試次數，None則使用transport的設定
+        :return:
+        """
+        self.ensure_initialized()
+        if self.metrics is None:
+            payload = self.__post(endpoint, params, timeout, retries)
+        else:
+            payload = self.metrics.call(endpoint, params, self.__post, endpoint, params, timeout, retries,
+                                        node=self.metrics_node)
+        if raw:
+            return payload
+        return self.__api_response(payload)
 
     def api_group_list(self, page: int = 1, limit: int = 1000, title: str = ""):
         """
@@ -234,10 +614,46 @@ class IxBrowser:
             "limit": limit,
             "title": title
         }
-        return self.__api_response(self.ses.post(self.ixbrowser_api_host + "group-list", json=params).json())
+        return self.__api_post("group-list", params)
+
+    def resolve_group_id(self, group: Union[str, int, None]) -> int:
+        """
+        將組名稱或組ID轉換為組ID，組名稱的查詢結果會快取group_cache_ttl秒
+
+        :param group:   組名稱或是組ID，""或None代表不篩選組
+        :return: 組ID，0代表不篩選組
+        """
+        if group is None or group == "":
+            return 0
+        if isinstance(group, int) and not isinstance(group, bool):
+            return group
+        if not isinstance(group, str):
+            raise Exception("錯誤的group參數")
+
+        group_id = self.group_cache.get(group)
+        if group_id is None:
+            # 找不到組時維持原本行為，不篩選組
+            res = self.api_group_list(title=group)
+            if not res["result"]:
+                return 0
+            group_id = res["data"][0]["id"] if len(res["data"]) > 0 else 0
+            self.group_cache.set(group, group_id)
+        return group_id
+
+    def invalidate_group_cache(self, group: str = None):
+        """
+        清除組名稱→組ID快取，組被建立、改名或刪除後呼叫
+
+        :param group:   組名稱，不指定則清除全部
+        """
+        if group is None:
+            self.group_cache.invalidate()
+        else:
+            self.group_cache.invalidate(group)
 
     def api_browser_list(self, page: int = 1, limit: int = 1000, group: Union[str, int] = "",
-                         name: str = "", include_fields: List[str] = None, exclude_fields: List[str] = None):
+                         name: str = "", include_fields: List[str] = None, exclude_fields: List[str] = None,
+                         result_type: str = "dict"):
         """
         獲取ixBrowser的瀏覽器列表
         :param page:            頁碼
@@ -246,42 +662,37 @@ class IxBrowser:
         :param name:            瀏覽器名稱
         :param include_fields:  只回傳想要的瀏覽器配置
         :param exclude_fields:  排除不想回傳的瀏覽器配置
+        :param result_type:     "dict": 字典列表(預設)
+                                "record": ProfileRecord列表，佔用記憶體較少
+                                "table": 以欄為主的ProfileTable，適合大量掃描
         :return:
         """
-        group_id = 0
-        # 透過組名稱尋找組ID
-        if isinstance(group, str):
-            res = self.api_group_list(title=group)
-            if res["result"]:
-                if len(res["data"]) > 0:
-                    group_id = res["data"][0]["id"]
-        else:
-            raise Exception("錯誤的group參數")
+        if result_type not in ("dict", "record", "table"):
+            raise ValueError("result_type 必須是 dict、record 或 table")
+        group_id = self.resolve_group_id(group)
+        response = self.__api_browser_list_page(page, limit, group_id, name)
+
+        if response["result"]:
+            _project_browser_list(response, include_fields, exclude_fields, result_type)
+        return response
+
+    def __api_browser_list_page(self, page: int, limit: int, group_id: int, name: str):
+        """
+        以組ID查詢一頁瀏覽器列表
 
+        :param page:        頁碼
+        :param limit:       每頁顯示的數量
+        :param group_id:    組ID，0為不限制
+        :param name:        瀏覽器名稱
+        :return:
+        """
         params = {
             "page": page,
             "limit": limit,
             "group_id": group_id,
             "name": name
         }
-
-        response = self.__api_response(self.ses.post(self.ixbrowser_api_host + "browser-list", json=params).json())
-
-        # 如果有指定的欄位，則將其餘不包含的欄位刪除
-        if include_fields is not None:
-            for browser in response["data"]:
-                for key in list(browser.keys()):
-                    if key not in include_fields:
-                        del browser[key]
-
-        # 如果有指定要排除的欄位，則將其餘欄位刪除
-        if exclude_fields is not None:
-            for browser in response["data"]:
-                for key in list(browser.keys()):
-                    if key in exclude_fields:
-                        del browser[key]
-
-        return response
+        return self.__api_post("browser-list", params)
 
     def api_browser_open(self, profile_id: int, browser_open_random=False, args: list = None,
                          load_extensions: bool = False,
@@ -310,45 +721,57 @@ class IxBrowser:
 
         :return:
         """
-        if profile_id < 1:
-            raise ValueError("Profile ID 必須大於 0")
-
-        if args is None:
-            args = [
-                "--disable-extension-welcome-page"
-            ]
-            if headless:
-                args.append("--headless")
-
-        if browser_open_random:
-            params = {
-                "profile_id": profile_id,
-                "args": args,
-                "load_extensions": load_extensions,
-                "load_default_page": load_default_page,
-                "dynamic_proxy_id": dynamic_proxy_id,
-                "country": country,
-                "proxy_ip": proxy_ip,
-                "proxy_mode": proxy_mode,
-                "proxy_port": proxy_port,
-                "proxy_type": proxy_type,
-                "proxy_user": proxy_user,
-                "proxy_password": proxy_password,
-            }
-            res = self.__api_response(
-                self.ses.post(self.ixbrowser_api_host + "browser-open-random", json=params).json())
-        else:
-            params = {
-                "profile_id": profile_id,
-                "args": args,
-                "load_extensions": load_extensions,
-                "load_default_page": load_default_page,
+        # 先完成初始化，讓session_store重新連接的瀏覽器在開啟前就出現在current_browser_list
+        self.ensure_initialized()
+        endpoint, params = _browser_open_params(profile_id, browser_open_random, args, load_extensions,
+                                                load_default_page, proxy_mode, dynamic_proxy_id, country,
+                                                proxy_ip, proxy_port, proxy_type, proxy_user, proxy_password,
+                                                headless)
+        open_kwargs = dict(browser_open_random=browser_open_random, args=args, load_extensions=load_extensions,
+                           load_default_page=load_default_page, proxy_mode=proxy_mode,
+                           dynamic_proxy_id=dynamic_proxy_id, country=country, proxy_ip=proxy_ip,
+                           proxy_port=proxy_port, proxy_type=proxy_type, proxy_user=proxy_user,
+                           proxy_password=proxy_password, headless=headless)
+        # 同一個Profile同時只送出一個開啟請求，其他執行緒等待並取得相同結果
+        res = self.open_flight.do(profile_id, self.__browser_open, profile_id, endpoint, params, open_kwargs)
+        # 所有呼叫者共用同一個結果字典，各自回傳副本，data也複製一份，避免修改影響其他呼叫者與current_browser_list
+        res = dict(res)
+        if isinstance(res.get("data"), dict):
+            res["data"] = dict(res["data"])
+        return res
+
+    def __browser_open(self, profile_id: int, endpoint: str, params: dict, open_kwargs: dict):
+        registry = self.lease_registry
+        if registry is not None and not registry.acquire(profile_id):
+            return {
+                "result": False,
+                "error": {"code": LEASE_CONFLICT_CODE,
+                          "message": f"Profile {profile_id} 已被 {registry.holder(profile_id)} 使用"}
             }
-            res = self.__api_response(self.ses.post(self.ixbrowser_api_host + "browser-open", json=params).json())
+        try:
+            res = self.__api_post(endpoint, params)
+        except Exception:
+            self.__release_lease_if_closed(profile_id)
+            raise
         if res["result"]:
-            self.current_browser_list[profile_id] = res["data"]
+            with self.browser_list_lock:
+                self.current_browser_list[profile_id] = dict(res["data"])
+                self.open_kwargs[profile_id] = open_kwargs
+            if self.session_store is not None:
+                self.session_store.save(self.ixbrowser_api_host, profile_id, res["data"])
+            if self.catalog is not None:
+                self.catalog.on_opened(profile_id)
+        else:
+            self.__release_lease_if_closed(profile_id)
         return res
 
+    def __release_lease_if_closed(self, profile_id: int):
+        """
+        開啟失敗時釋放租約，已經由自己開啟的Profile保留租約
+        """
+        if self.lease_registry is not None and profile_id not in self.current_browser_list:
+            self.lease_registry.release(profile_id)
+
     def api_browser_close(self, profile_id: Union[int, List[int]]):
         """
         關閉ixBrowser
@@ -359,15 +782,47 @@ class IxBrowser:
         :return:
         """
         if isinstance(profile_id, int):
+            if self.close_batcher is not None:
+                # 同一批的呼叫者共用結果字典，回傳副本避免互相影響
+                return dict(self.close_batcher.submit(profile_id).result())
             profile_id = [profile_id]
+        return self.__browser_close(profile_id)
+
+    def __browser_close(self, profile_id: List[int]):
+        registry = self.lease_registry
+        if registry is not None:
+            # 其他程序持有租約的Profile不能由這裡關閉，與開啟時相同回傳LEASE_CONFLICT_CODE
+            conflicts = {}
+            for pid in profile_id:
+                holder = registry.holder(pid)
+                if holder is not None and holder != registry.owner:
+                    conflicts[pid] = holder
+            if conflicts:
+                return {
+                    "result": False,
+                    "error": {"code": LEASE_CONFLICT_CODE,
+                              "message": "、".join(f"Profile {pid} 已被 {holder} 使用"
+                                                  for pid, holder in conflicts.items())}
+                }
         params = {
             "profile_id": profile_id
         }
-        res = self.__api_response(self.ses.post(self.ixbrowser_api_host + "browser-close-all", json=params).json())
+        res = self.__api_post("browser-close-all", params)
         if res["result"]:
+            with self.browser_list_lock:
+                for pid in profile_id:
+                    if pid in self.current_browser_list:
+                        self.current_browser_list.pop(pid, None)
+                    self.open_kwargs.pop(pid, None)
             for pid in profile_id:
-                if pid in self.current_browser_list:
-                    self.current_browser_list.pop(pid, None)
+                self.release_selenium_driver(pid)
+            if self.lease_registry is not None:
+                self.lease_registry.release(profile_id)
+            if self.session_store is not None:
+                self.session_store.remove(self.ixbrowser_api_host, profile_id)
+            if self.catalog is not None:
+                self.catalog.on_closed(profile_id)
+            self.__run_close_hooks(profile_id)
 
         return res
 
@@ -382,11 +837,17 @@ class IxBrowser:
 
         """
         if isinstance(profile_id, int):
+            if self.cache_clear_batcher is not None:
+                # 同一批的呼叫者共用結果字典，回傳副本避免互相影響
+                return dict(self.cache_clear_batcher.submit(profile_id).result())
             profile_id = [profile_id]
+        return self.__browser_cache_clear(profile_id)
+
+    def __browser_cache_clear(self, profile_id: List[int]):
         params = {
             "profile_id": profile_id
         }
-        return self.__api_response(self.ses.post(self.ixbrowser_api_host + "browser-cache-clear", json=params).json())
+        return self.__api_post("browser-cache-clear", params)
 
     def api_browser_create(self, config: dict = None, **kwargs):
         """
@@ -457,105 +918,42 @@ class IxBrowser:
         :return:
         """
 
-        def random_color():
-            return "#{:02x}{:02x}{:02x}".format(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-
-        def random_ip_address():
-            return ".".join([str(random.randint(0, 255)) for _ in range(4)])
-
-        config = config or {}
-        # 隨機顏色
-
-        base_values = {
-            "color": random_color(),
-            "site_url": "https://google.com/",
-            "name": uuid.uuid4().hex[:8], "note": "", "group_id": 1, "username": "", "password": "",
-            "proxy_mode": 2, "proxy_type": "direct", "proxy_ip": "", "proxy_port": "", "proxy_user": "",
-            "proxy_password": "", "cookie": "", "open_url": "", "display_url": "", "proxy_id": "",
-            'config': {
-                "hardware_concurrency": "4",
-                "device_memory": "8",
-                "is_cookies_cache": "1",
-                "is_tabs_cache": "0",
-                "is_proxy_check": "0",
-                "is_proxy_change": False,
-                "ua_type": 1,
-                "platform": "Windows",
-                "br_version": "",
-                "ua_info": "Mozilla/5.0 (Windows NT 6.2; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/104.0.0.0 Safari/537.36",
-                "language_type": "1",
-                "language": "cn",
-                "timezone_type": "1",
-                "timezone": "Asia/Taipei",
-                "location": "1",
-                "location_type": "1",
-                "longitude": 25.7247,
-                "latitude": 119.3712,
-                "accuracy": 1000,
-                "resolving_power_type": "1",
-                "resolving_power": "1920,1080",
-                "fonts_type": "1",
-                "fonts": [],
-                "webrtc": "1",
-                "webgl_image": "1",
-                "canvas_type": "1",
-                "webgl_data_type": "1",
-                "webgl_factory": "Google Inc.",
-                "webgl_info": "ANGLE (AMD, ATI Radeon HD 4200 Direct3D9Ex vs_3_0 ps_3_0, atiumd64.dll-8.14.10.678)",
-                "audio_context": "1",
-                "media_equipment": "1",
-                "client_rects": "1",
-                "speech_voices": "1",
-                "product_type": "1",
-                "track": "1",
-                "allow_scan_ports": "0",
-                "allow_scan_ports_content": "",
-                "real_ip": random_ip_address()
-            }}
-
-        # 使用传入的kwargs参数更新默认值
-        base_values.update(config)
-        base_values.update(kwargs)
-        return self.__api_response(self.ses.post(self.ixbrowser_api_host + "browser-create", json=base_values).json())
-
-    def api_browser_update(self, profile_id: int, config: dict = None, **kwargs):
+        base_values = _browser_create_values(config, kwargs)
+        res = self.__api_post("browser-create", base_values)
+        if res["result"] and self.catalog is not None:
+            profile_id = _created_profile_id(res["data"])
+            if profile_id is not None:
+                self.catalog.on_created(profile_id, base_values)
+        return res
+
+    def api_browser_update(self, profile_id: int, config: dict = None, diff: bool = False, current: dict = None,
+                           **kwargs):
         """
         更新ixBrowser信息v2
 
+        diff=False時會送出完整的預設值，未指定的欄位會被重設。
+        diff=True時只送出與目前狀態不同的欄位，沒有任何變更時不送出請求，
+        回傳 {'result': True, 'data': {}, 'skipped': True}
+
         :param profile_id:  ixBrowser的profile_id
         :param config:  Profile配置信息
+        :param diff:    是否只送出有變更的欄位
+        :param current: 目前的Profile資料，diff=True且未指定時從ProfileCatalog或browser-list讀取
         :return:
         """
-        config = config or {}
-        base_values = {
-            "profile_id": profile_id,
-            "site_url": "",
-            "name": "",
-            "note": "",
-            "group_id": 1,
-            "username": "",
-            "password": "",
-            "cookie": "",
-            "language_type": "2",
-            "language": "cn",
-            "timezone_type": "2",
-            "timezone": "Asia/Taiwan",
-            "location": "1",
-            "location_type": "1",
-            "longitude": "25.7247",
-            "latitude": "119.3712",
-            "cookies_cache": "0",
-            "disable_image": "0",
-            "disable_audio": "0",
-            "webgl_factory": "Google Inc.",
-            "webgl_info": "ANGLE (AMD, ATI Radeon HD 4200 Direct3D9Ex vs_3_0 ps_3_0, atiumd64.dll-8.14.10.678)",
-            "user_agent": {
-                "ua_info": "Mozilla/5.0 (Windows NT 6.2; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/104.0.0.0 Safari/537.36"
-            }
-        }
-        base_values.update(config)
-        base_values.update(kwargs)
-        return self.__api_response(self.ses.post(self.ixbrowser_api_host + "browser-update", json=base_values).json())
+        if diff:
+            if current is None:
+                current = self.get_profile(profile_id)
+            changes = _diff_fields(current, {**(config or {}), **kwargs})
+            if not changes:
+                return {"result": True, "data": {}, "skipped": True}
+            base_values = {"profile_id": profile_id, **changes}
+        else:
+            base_values = _browser_update_values(profile_id, config, kwargs)
+        res = self.__api_post("browser-update", base_values)
+        if res["result"] and self.catalog is not None:
+            self.catalog.on_updated(profile_id, base_values)
+        return res
 
     def api_browser_delete(self, profile_id: Union[int, List[int]]):
         """
@@ -569,7 +967,10 @@ class IxBrowser:
         params = {
             "profile_id": profile_id
         }
-        return self.__api_response(self.ses.post(self.ixbrowser_api_host + "browser-deleted", json=params).json())
+        res = self.__api_post("browser-deleted", params)
+        if res["result"] and self.catalog is not None:
+            self.catalog.on_deleted(profile_id)
+        return res
 
     def api_browser_random_info(self, profile_id: int):
         """
@@ -581,17 +982,330 @@ class IxBrowser:
         params = {
             "profile_id": profile_id
         }
-        return self.__api_response(self.ses.post(self.ixbrowser_api_host + "random-browser-info", json=params).json())
+        return self.__api_post("random-browser-info", params)
+
+    def get_profile(self, profile_id: int) -> Union[dict, None]:
+        """
+        取得單一Profile的資料，有綁定ProfileCatalog時直接從目錄讀取，否則掃描browser-list
+
+        :param profile_id:  ixBrowser的profile_id
+        :return: Profile資料，找不到時返回None
+        """
+        return self.get_profiles([profile_id]).get(profile_id)
+
+    def get_profiles(self, profile_ids: Iterable[int]) -> dict:
+        """
+        取得多個Profile的資料，只掃描一次browser-list
+
+        :param profile_ids: ixBrowser的profile_id列表
+        :return: {profile_id: Profile資料}，找不到的Profile不會出現在結果中
+        """
+        wanted = set(profile_ids)
+        profiles = {}
+        if self.catalog is not None:
+            for pid in wanted:
+                profile = self.catalog.get(pid)
+                if profile is not None:
+                    profiles[pid] = profile
+            return profiles
+
+        for profile in self.iter_browsers():
+            pid = profile["profile_id"]
+            if pid in wanted:
+                profiles[pid] = profile
+                if len(profiles) == len(wanted):
+                    break
+        return profiles
+
+    def iter_groups(self, title: str = "", page_size: int = 200) -> Iterator[dict]:
+        """
+        逐頁走訪所有組，處理目前頁面時會在背景預先抓取下一頁
+
+        :param title:       組名稱
+        :param page_size:   每頁數量
+        :return: 組資料的迭代器 {'title': 'ixb', 'id': 6628}
+        """
+        return self.__iter_pages(lambda page: self.__fetch_page("group-list", {"page": page, "limit": page_size,
+                                                                              "title": title}),
+                                 page_size)
+
+    def iter_browsers(self, group: Union[str, int] = "", name: str = "", include_fields: List[str] = None,
+                      exclude_fields: List[str] = None, page_size: int = 200,
+                      result_type: str = "dict") -> Iterator[dict]:
+        """
+        逐頁走訪所有瀏覽器，處理目前頁面時會在背景預先抓取下一頁
+
+        記憶體中最多只保留兩頁資料，與Profile總數無關
+
+        :param group:           組名稱或是組ID，支持多型態
+        :param name:            瀏覽器名稱
+        :param include_fields:  只回傳想要的瀏覽器配置
+        :param exclude_fields:  排除不想回傳的瀏覽器配置
+        :param page_size:       每頁數量
+        :param result_type:     "dict": 產出字典 "record": 產出ProfileRecord
+        :return: 瀏覽器資料的迭代器
+        """
+        if result_type not in ("dict", "record"):
+            raise ValueError("result_type 必須是 dict 或 record")
+
+        # 組ID只需要查詢一次
+        group_id = self.resolve_group_id(group)
+
+        def fetch(page):
+            response, total = self.__fetch_page("browser-list", {"page": page, "limit": page_size,
+                                                                 "group_id": group_id, "name": name})
+            if response["result"]:
+                _project_browser_list(response, include_fields, exclude_fields, result_type)
+            return response, total
+
+        return self.__iter_pages(fetch, page_size)
+
+    def load_browsers(self, group: Union[str, int] = "", name: str = "", include_fields: List[str] = None,
+                      exclude_fields: List[str] = None, page_size: int = 200,
+                      result_type: str = "record") -> Union[List[ProfileRecord], ProfileTable]:
+        """
+        讀取所有瀏覽器，逐頁轉換為ProfileRecord或ProfileTable
+
+        每頁的字典轉換後立即釋放，不會同時保留所有Profile的字典
+
+        :param group:           組名稱或是組ID，支持多型態
+        :param name:            瀏覽器名稱
+        :param include_fields:  只回傳想要的瀏覽器配置
+        :param exclude_fields:  排除不想回傳的瀏覽器配置
+        :param page_size:       每頁數量
+        :param result_type:     "record": ProfileRecord列表 "table": ProfileTable
+        :return:
+        """
+        if result_type not in ("record", "table"):
+            raise ValueError("result_type 必須是 record 或 table")
+        group_id = self.resolve_group_id(group)
+
+        def fetch(page):
+            response, total = self.__fetch_page("browser-list", {"page": page, "limit": page_size,
+                                                                 "group_id": group_id, "name": name})
+            # 記錄在背景執行緒轉換，資料表需要依序合併欄位，由呼叫端加入
+            if response["result"] and result_type == "record":
+                _project_browser_list(response, include_fields, exclude_fields, result_type)
+            return response, total
+
+        if result_type == "record":
+            records = []
+            for items in self.__iter_pages(fetch, page_size, pages=True):
+                records.extend(items)
+            return records
+        table = ProfileTable()
+        for items in self.__iter_pages(fetch, page_size, pages=True):
+            table.add_browsers(items, include_fields, exclude_fields)
+        return table
+
+    def __fetch_page(self, endpoint: str, params: dict):
+        """
+        查詢一頁，保留API回傳的總筆數
+
+        :return: (處理後的結果字典, 總筆數或None)
+        """
+        payload = self.api_request(endpoint, params, raw=True)
+        return self.__api_response(payload), _page_total(payload)
+
+    def __iter_pages(self, fetch, page_size: int, pages: bool = False):
+        """
+        逐頁呼叫fetch並產出每一筆資料，在產出目前頁面時於背景抓取下一頁
+
+        API可能把limit限制在比page_size小的值，因此不以單頁數量判斷是否為最後一頁:
+        有總筆數時取到總筆數為止，沒有時取到空白頁為止
+
+        :param fetch:       fetch(page) -> (API結果, 總筆數或None)
+        :param page_size:   每頁數量
+        :param pages:       True則每次產出一整頁的列表
+        :return:
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ixBrowser-prefetch")
+        try:
+            page = 1
+            fetched = 0
+            future = executor.submit(fetch, page)
+            while future is not None:
+                res, total = future.result()
+                if not res["result"]:
+                    err_msg = "獲取第{}頁失敗，原因：{}".format(page, res["error"])
+                    self.logger.error(err_msg)
+                    raise Exception(err_msg)
+
+                items = res["data"]
+                fetched += len(items)
+                page += 1
+                more = len(items) > 0 and (total is None or fetched < total)
+                future = executor.submit(fetch, page) if more else None
+                # 釋放結果字典，只保留items
+                del res
+                if pages:
+                    yield items
+                else:
+                    yield from items
+                del items
+        finally:
+            executor.shutdown(wait=False)
+
+    # endregion
+    # region Bulk Functions
+    def open_many(self, profile_ids: Iterable[int], max_workers: int = 8,
+                  **open_kwargs) -> Iterator[Tuple[int, dict]]:
+        """
+        並行開啟多個ixBrowser
+
+        所有請求會立即送出，回傳的迭代器依照完成順序產出結果，單一Profile失敗不會中斷其他Profile
+
+        :param profile_ids:     Profile的ID列表
+        :param max_workers:     同時開啟的數量上限
+        :param open_kwargs:     傳給api_browser_open的參數
+        :return: (profile_id, api_browser_open的結果) 的迭代器
+        """
+        return self.__run_many(self.api_browser_open, profile_ids, max_workers, open_kwargs)
+
+    def close_many(self, profile_ids: Iterable[int], max_workers: int = 8) -> Iterator[Tuple[int, dict]]:
+        """
+        並行關閉多個ixBrowser，每個Profile各自回傳結果
+
+        :param profile_ids:     Profile的ID列表
+        :param max_workers:     同時關閉的數量上限
+        :return: (profile_id, api_browser_close的結果) 的迭代器
+        """
+        return self.__run_many(self.api_browser_close, profile_ids, max_workers, {})
+
+    def create_many(self, specs: Union[str, Iterable[dict]], concurrency: int = 4, checkpoint_path: str = None,
+                    rate_limit: float = None, key_field: str = None) -> Iterator[Tuple[object, dict]]:
+        """
+        並行建立多個ixBrowser，可中斷後續傳
+
+        specs只會被逐筆讀取，同時在處理中的數量最多為concurrency的兩倍。
+        成功建立的Profile會寫入checkpoint_path，重新執行時會跳過已完成的項目。
+
+        :param specs:           api_browser_create的參數，可以是JSONL檔案路徑或是字典的迭代器
+        :param concurrency:     同時建立的數量
+        :param checkpoint_path: 檢查點檔案路徑，None為不記錄
+        :param rate_limit:      每秒最多送出的建立請求數，None為不限制
+        :param key_field:       用來識別項目的欄位，例如 "name"；None則使用項目在specs中的順序
+                                使用順序時，重新執行必須使用相同順序的specs
+        :return: 依照完成順序產出 (key, api_browser_create的結果) 的迭代器
+        """
+        checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+        done = checkpoint.load() if checkpoint else {}
+        limiter = RateLimiter(rate_limit) if rate_limit else None
+
+        def create(key, spec):
+            if limiter is not None:
+                limiter.acquire()
+            res = self.api_browser_create(**spec)
+            if res["result"] and checkpoint is not None:
+                checkpoint.append(key, profile_id=_created_profile_id(res["data"]))
+            return res
+
+        def handle(finished):
+            for future in finished:
+                key = futures.pop(future)
+                try:
+                    res = future.result()
+                except Exception as e:
+                    self.logger.error(f"建立Profile {key} 失敗，原因：{e}")
+                    res = {"result": False, "error": {"code": -1, "message": str(e)}}
+                yield key, res
+
+        futures = {}
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ixBrowser-create")
+        try:
+            for index, spec in enumerate(_iter_specs(specs)):
+                key = index if key_field is None else spec[key_field]
+                if key in done:
+                    continue
+                if len(futures) >= concurrency * 2:
+                    finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    yield from handle(finished)
+                futures[executor.submit(create, key, spec)] = key
+
+            while futures:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                yield from handle(finished)
+        finally:
+            # 提前停止迭代時，已送出的請求仍會完成並寫入檢查點
+            executor.shutdown(wait=True)
+
+    def update_many(self, profile_ids: Iterable[int], patch: dict = None, max_workers: int = 8, diff: bool = True,
+                    **kwargs) -> Iterator[Tuple[int, dict]]:
+        """
+        並行將相同的變更套用到多個Profile
+
+        diff=True時只讀取一次所有Profile的目前狀態，每個Profile只送出有變更的欄位
+
+        :param profile_ids: ixBrowser的profile_id列表
+        :param patch:       要更新的欄位，與kwargs合併
+        :param max_workers: 同時更新的數量
+        :param diff:        是否只送出有變更的欄位，False則與api_browser_update相同會送出完整預設值
+        :return: 依照完成順序產出 (profile_id, api_browser_update的結果) 的迭代器
+        """
+        profile_ids = list(profile_ids)
+        changes = {**(patch or {}), **kwargs}
+        states = self.get_profiles(profile_ids) if diff else {}
+
+        def api_browser_update(profile_id, **_):
+            return self.api_browser_update(profile_id, diff=diff, current=states.get(profile_id), **changes)
+
+        return self.__run_many(api_browser_update, profile_ids, max_workers, {})
+
+    def __run_many(self, func, profile_ids: Iterable[int], max_workers: int, kwargs: dict):
+        """
+        在執行緒池中對每個profile_id呼叫func
+
+        :param func:            要呼叫的API方法
+        :param profile_ids:     Profile的ID列表
+        :param max_workers:     執行緒數量
+        :param kwargs:          傳給func的參數
+        :return: 依照完成順序產出 (profile_id, 結果) 的迭代器
+        """
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ixBrowser")
+        futures = {executor.submit(func, pid, **kwargs): pid for pid in profile_ids}
+        # 不等待，已送出的工作會繼續執行完畢
+        executor.shutdown(wait=False)
+
+        def iter_results():
+            for future in as_completed(futures):
+                pid = futures[future]
+                try:
+                    res = future.result()
+                except Exception as e:
+                    self.logger.error(f"Profile {pid} 執行{func.__name__}失敗，原因：{e}")
+                    res = {"result": False, "error": {"code": -1, "message": str(e)}}
+                yield pid, res
+
+        return iter_results()
 
     # endregion
     # region WebDriver Functions
+    def get_open_browsers(self) -> dict:
+        """
+        目前由此客戶端開啟的瀏覽器快照，可以在其他執行緒開啟/關閉時安全地迭代
+
+        :return: {profile_id: {"debugging_address": ..., "webdriver": ...}}
+        """
+        with self.browser_list_lock:
+            return dict(self.current_browser_list)
+
+    def get_open_kwargs(self, profile_id: int) -> dict:
+        """
+        取得開啟瀏覽器時傳給api_browser_open的參數，用相同設定重新開啟
+
+        :param profile_id:  ixBrowser的profile_id
+        :return: 參數字典，不是由此客戶端開啟(例如由session_store重新連接)時為空字典
+        """
+        with self.browser_list_lock:
+            return dict(self.open_kwargs.get(profile_id, {}))
+
     def get_selenium_driver(self, profile_id: int, browser_open_random=False, proxy_ip: str = None,
                             proxy_port: str = None, proxy_user: str = None, proxy_password: str = None,
-                            proxy_type: str = "socks5", headless: bool = False):
+                            proxy_type: str = "socks5", headless: bool = False, reuse: bool = True):
         """
         獲取selenium driver
 
-        返回一個 Selenium WebDriver 實例
+        返回一個 Selenium WebDriver 實例，同一個Profile已有可用的driver時直接重用
         :param profile_id:  ixBrowser的profile_id
         :param browser_open_random: 是否隨機指紋
         :param proxy_ip:    代理IP
@@ -599,24 +1313,184 @@ class IxBrowser:
         :param proxy_user:  代理帳號
         :param proxy_password:  代理密碼
         :param proxy_type:  代理類型
+        :param reuse:       是否重用快取的driver，False則每次都建立新的chromedriver
 
         :return:
         """
+        open_kwargs = dict(browser_open_random=browser_open_random, proxy_ip=proxy_ip, proxy_port=proxy_port,
+                           proxy_user=proxy_user, proxy_password=proxy_password, proxy_type=proxy_type,
+                           headless=headless)
+        self.ensure_initialized()
+        if not reuse:
+            return self.__create_selenium_driver(profile_id, open_kwargs, reuse)
+
+        driver = self.__get_cached_driver(profile_id)
+        if driver is not None:
+            return driver
+        # 多個執行緒同時取得同一個Profile時只建立一個driver
+        return self.driver_flight.do(profile_id, self.__create_selenium_driver, profile_id, open_kwargs, reuse)
+
+    def __create_selenium_driver(self, profile_id: int, open_kwargs: dict, reuse: bool):
+        if reuse:
+            with self.browser_list_lock:
+                cached = self.driver_cache.get(profile_id)
+            if cached is not None:
+                return cached[1]
 
         # 如果沒有開啟過
-        if profile_id not in self.current_browser_list:
-            res = self.api_browser_open(profile_id=profile_id, browser_open_random=browser_open_random,
-                                        proxy_ip=proxy_ip, proxy_port=proxy_port, proxy_user=proxy_user,
-                                        proxy_password=proxy_password, proxy_type=proxy_type, headless=headless)
+        with self.browser_list_lock:
+            browser = self.current_browser_list.get(profile_id)
+        if browser is None:
+            res = self.api_browser_open(profile_id=profile_id, **open_kwargs)
             if not res["result"]:
                 err_msg = "開啟ixBrowser失敗，原因：{}".format(res["error"])
                 self.logger.error(err_msg)
                 raise Exception(err_msg)
+            browser = res["data"]
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+
+        debugging_address = browser['debugging_address']
         options = webdriver.ChromeOptions()
 
-        options.add_experimental_option("debuggerAddress", self.current_browser_list[profile_id]['debugging_address'])
-        service = Service(self.current_browser_list[profile_id]['webdriver'])
+        options.add_experimental_option("debuggerAddress", debugging_address)
+        service = Service(browser['webdriver'])
         driver = webdriver.Chrome(service=service, options=options)
+        if reuse:
+            with self.browser_list_lock:
+                self.driver_cache[profile_id] = (debugging_address, driver)
         return driver
+
+    def forget_browser(self, profile_id: int, debugging_address: str = None) -> bool:
+        """
+        瀏覽器已經不存在(當機或在ixBrowser介面中關閉)時，移除本地的開啟紀錄，不送出關閉請求
+
+        :param profile_id:          ixBrowser的profile_id
+        :param debugging_address:   只在紀錄的debugging_address相同時移除，避免移除已重新開啟的紀錄
+        :return: 是否有移除紀錄
+        """
+        with self.browser_list_lock:
+            browser = self.current_browser_list.get(profile_id)
+            if browser is None or (debugging_address is not None
+                                   and browser.get("debugging_address") != debugging_address):
+                return False
+            self.current_browser_list.pop(profile_id, None)
+            self.open_kwargs.pop(profile_id, None)
+        self.release_selenium_driver(profile_id)
+        if self.lease_registry is not None:
+            self.lease_registry.release(profile_id)
+        if self.session_store is not None:
+            self.session_store.remove(self.ixbrowser_api_host, profile_id)
+        if self.catalog is not None:
+            self.catalog.on_closed([profile_id])
+        self.__run_close_hooks([profile_id])
+        return True
+
+    def add_close_hook(self, hook: Callable[[List[int]], None]):
+        """
+        瀏覽器關閉(api_browser_close)或被移除開啟紀錄(forget_browser)後呼叫 hook(profile_ids)
+        """
+        self.close_hooks.append(hook)
+
+    def __run_close_hooks(self, profile_ids: List[int]):
+        for hook in self.close_hooks:
+            try:
+                hook(profile_ids)
+            except Exception:
+                self.logger.exception("瀏覽器關閉事件處理失敗")
+
+    def restore_sessions(self, probe_timeout: float = 0.5, max_workers: int = 16) -> Dict[str, List[int]]:
+        """
+        從session_store讀取上次開啟的瀏覽器，仍在執行的加回current_browser_list，已關閉的從store刪除
+
+        :param probe_timeout:   每個debugging_address的DevTools檢查逾時秒數
+        :param max_workers:     同時檢查的數量
+        :return: {"restored": [...], "dropped": [...]}
+        """
+        if self.session_store is None:
+            raise ValueError("沒有設定session_store")
+        saved = self.session_store.load(self.ixbrowser_api_host)
+        if not saved:
+            return {"restored": [], "dropped": []}
+
+        def alive(data: dict) -> bool:
+            address = data.get("debugging_address")
+            # Port可能已被其他程序使用，需要能讀取DevTools的 /json/version 才視為原本的瀏覽器
+            if not address or devtools_probe(address, probe_timeout) is None:
+                return False
+            webdriver = data.get("webdriver")
+            # 瀏覽器在本機時才能檢查webdriver路徑
+            return not webdriver or split_address(address)[0] not in LOCAL_HOSTS or os.path.exists(webdriver)
+
+        items = sorted(saved.items())
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+            states = list(executor.map(lambda item: alive(item[1]["data"]), items))
+
+        restored, dropped = [], []
+        for (pid, entry), is_alive in zip(items, states):
+            if not is_alive:
+                dropped.append(pid)
+                continue
+            # 其他程序已經取得租約時不接手
+            if self.lease_registry is not None and not self.lease_registry.acquire(pid):
+                continue
+            with self.browser_list_lock:
+                self.current_browser_list[pid] = entry["data"]
+            if self.catalog is not None:
+                self.catalog.on_opened(pid)
+            restored.append(pid)
+        if dropped:
+            self.session_store.remove(self.ixbrowser_api_host, dropped)
+        if restored or dropped:
+            self.logger.log(f"重新連接 {len(restored)} 個瀏覽器，移除 {len(dropped)} 個已關閉的瀏覽器")
+        return {"restored": restored, "dropped": dropped}
+
+    def release_selenium_driver(self, profile_id: int):
+        """
+        移除快取的driver並停止對應的chromedriver程序，不會關閉瀏覽器
+
+        :param profile_id:  ixBrowser的profile_id
+        """
+        with self.browser_list_lock:
+            cached = self.driver_cache.pop(profile_id, None)
+        if cached is not None:
+            self.__stop_driver_service(cached[1])
+
+    def __get_cached_driver(self, profile_id: int):
+        """
+        取得快取的driver，session或debugging_address失效時清除快取
+
+        :return: WebDriver或None
+        """
+        with self.browser_list_lock:
+            cached = self.driver_cache.get(profile_id)
+            browser = self.current_browser_list.get(profile_id)
+        if cached is None:
+            return None
+
+        debugging_address, driver = cached
+        if browser is not None and browser.get("debugging_address") == debugging_address:
+            try:
+                # 最輕量的WebDriver指令，確認session仍然有效
+                driver.current_window_handle
+                return driver
+            except Exception:
+                pass
+
+        self.release_selenium_driver(profile_id)
+        # 瀏覽器已經不存在時，移除開啟紀錄讓get_selenium_driver重新開啟
+        if not tcp_probe(debugging_address):
+            self.forget_browser(profile_id, debugging_address)
+        return None
+
+    @staticmethod
+    def __stop_driver_service(driver):
+        """
+        只停止chromedriver程序，不送出quit避免關閉瀏覽器
+        """
+        try:
+            driver.service.stop()
+        except Exception:
+            pass
     # endregion
 
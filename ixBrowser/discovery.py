@@ -0,0 +1,191 @@
+import json
+import os
+from typing import Union
+
+
+class Discovery:
+    """
+    ixBrowser安裝位置的查詢策略
+
+    discover() 回傳與 IxBrowser.get_ixbrowser_info 相同格式的字典，找不到時回傳None:
+        {
+            "name": "ixBrowser",
+            "version": "1.0.0",
+            "install_path": "C:\\Program Files\\ixBrowser\\",
+            "api_only": False
+        }
+    """
+
+    def discover(self) -> Union[dict, None]:
+        raise NotImplementedError
+
+
+class RegistryDiscovery(Discovery):
+    """
+    從Windows登錄檔的Uninstall機碼查詢，只能在Windows使用
+    """
+
+    def discover(self):
+        try:
+            import winreg
+        except ImportError:
+            return None
+
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE,
+                                r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall") as key:
+                num_sub_keys = winreg.QueryInfoKey(key)[0]
+                for i in range(num_sub_keys):
+                    sub_key_name = winreg.EnumKey(key, i)
+                    with winreg.OpenKey(key, sub_key_name) as sub_key:
+                        try:
+                            name = winreg.QueryValueEx(sub_key, "DisplayName")[0]
+                            if str(name).startswith("ixBrowser"):
+                                version = winreg.QueryValueEx(sub_key, "DisplayVersion")[0]
+                                uninstall_string = winreg.QueryValueEx(sub_key, "UninstallString")[0]
+                                start_index = uninstall_string.find('"') + 1
+                                end_index = uninstall_string.find('"', start_index)
+                                install_path = uninstall_string[start_index:end_index].replace(
+                                    "Uninstall ixBrowser.exe", "")
+
+                                return {
+                                    "name": name,
+                                    "version": version,
+                                    "install_path": install_path
+                                }
+                        except FileNotFoundError:
+                            return None
+        except FileNotFoundError:
+            pass
+
+        return None
+
+
+class PathDiscovery(Discovery):
+    """
+    使用指定的安裝路徑
+    """
+
+    def __init__(self, install_path: str, version: str = ""):
+        """
+        :param install_path:    ixBrowser的安裝資料夾
+        :param version:         ixBrowser版本
+        """
+        self.install_path = install_path
+        self.version = version
+
+    def discover(self):
+        if not self.install_path:
+            return None
+        return {
+            "name": "ixBrowser",
+            "version": self.version,
+            "install_path": os.path.join(self.install_path, "")
+        }
+
+
+class EnvDiscovery(Discovery):
+    """
+    從環境變數讀取安裝路徑，IXBROWSER_VERSION可指定版本
+    """
+
+    def __init__(self, var: str = "IXBROWSER_HOME"):
+        self.var = var
+
+    def discover(self):
+        return PathDiscovery(os.environ.get(self.var, ""), os.environ.get("IXBROWSER_VERSION", "")).discover()
+
+
+class ApiOnlyDiscovery(Discovery):
+    """
+    不使用本機安裝，只連接ixBrowser API，不會檢查或啟動ixBrowser主程式
+    """
+
+    def discover(self):
+        return {
+            "name": "ixBrowser",
+            "version": "",
+            "install_path": "",
+            "api_only": True
+        }
+
+
+class ChainDiscovery(Discovery):
+    """
+    依序嘗試多個策略，回傳第一個找到的結果
+    """
+
+    def __init__(self, *strategies: Discovery):
+        self.strategies = strategies
+
+    def discover(self):
+        for strategy in self.strategies:
+            info = strategy.discover()
+            if info:
+                return info
+        return None
+
+
+class CachedDiscovery(Discovery):
+    """
+    將查詢結果快取在磁碟上，之後啟動時只要執行檔仍存在就不再查詢
+    """
+
+    def __init__(self, strategy: Discovery, cache_path: str = None):
+        """
+        :param strategy:    實際的查詢策略
+        :param cache_path:  快取檔案路徑，預設為 ~/.ixbrowser/discovery.json
+        """
+        self.strategy = strategy
+        self.cache_path = cache_path or os.path.join(os.path.expanduser("~"), ".ixbrowser", "discovery.json")
+
+    def discover(self):
+        info = self.__load()
+        if info is not None:
+            return info
+
+        info = self.strategy.discover()
+        if info:
+            self.__save(info)
+        return info
+
+    def clear(self):
+        """
+        刪除快取檔案，下次discover會重新查詢
+        """
+        try:
+            os.remove(self.cache_path)
+        except FileNotFoundError:
+            pass
+
+    def __load(self):
+        try:
+            with open(self.cache_path, encoding="utf8") as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(info, dict) or "install_path" not in info:
+            return None
+        # 安裝位置已經不存在時重新查詢
+        if not info.get("api_only") and not os.path.isfile(info["install_path"] + "ixBrowser.exe"):
+            return None
+        return info
+
+    def __save(self, info: dict):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf8") as f:
+                json.dump(info, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+
+def default_discovery() -> Discovery:
+    """
+    預設策略: 環境變數 -> 登錄檔，只快取登錄檔的結果
+
+    環境變數每次都會先檢查，磁碟上的舊快取不會蓋過IXBROWSER_HOME
+    """
+    return ChainDiscovery(EnvDiscovery(), CachedDiscovery(RegistryDiscovery()))
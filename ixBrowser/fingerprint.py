@@ -0,0 +1,274 @@
+import hashlib
+import random
+from typing import List, Iterator, Sequence, Tuple
+
+from .client import _browser_create_values
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+UA_TEMPLATE = "Mozilla/5.0 ({os}) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{major}.0.0.0 Safari/537.36"
+
+# (版本, 權重)
+CHROME_VERSIONS = [
+    ("116", 20),
+    ("115", 25),
+    ("114", 25),
+    ("113", 12),
+    ("112", 10),
+    ("111", 8),
+]
+
+# 每個平台各自的UA、解析度、WebGL與硬體分佈，確保同一個指紋內的設定互相一致
+PLATFORMS = [
+    {
+        "platform": "Windows",
+        "weight": 70,
+        "ua_os": [("Windows NT 10.0; Win64; x64", 1)],
+        "resolutions": [("1920,1080", 45), ("1366,768", 15), ("1536,864", 12), ("2560,1440", 10),
+                        ("1440,900", 6), ("1600,900", 6), ("1280,720", 6)],
+        "webgl": [
+            (("Google Inc. (NVIDIA)",
+              "ANGLE (NVIDIA, NVIDIA GeForce GTX 1060 6GB Direct3D11 vs_5_0 ps_5_0, D3D11)"), 15),
+            (("Google Inc. (NVIDIA)",
+              "ANGLE (NVIDIA, NVIDIA GeForce RTX 3060 Direct3D11 vs_5_0 ps_5_0, D3D11)"), 15),
+            (("Google Inc. (Intel)",
+              "ANGLE (Intel, Intel(R) UHD Graphics 620 Direct3D11 vs_5_0 ps_5_0, D3D11)"), 25),
+            (("Google Inc. (Intel)",
+              "ANGLE (Intel, Intel(R) Iris(R) Xe Graphics Direct3D11 vs_5_0 ps_5_0, D3D11)"), 20),
+            (("Google Inc. (AMD)",
+              "ANGLE (AMD, AMD Radeon(TM) Graphics Direct3D11 vs_5_0 ps_5_0, D3D11)"), 15),
+            (("Google Inc. (AMD)",
+              "ANGLE (AMD, AMD Radeon RX 580 Series Direct3D11 vs_5_0 ps_5_0, D3D11)"), 10),
+        ],
+        "hardware_concurrency": [("4", 25), ("6", 10), ("8", 35), ("12", 15), ("16", 15)],
+        "device_memory": [("4", 20), ("8", 60), ("16", 20)],
+    },
+    {
+        "platform": "macOS",
+        "weight": 25,
+        "ua_os": [("Macintosh; Intel Mac OS X 10_15_7", 1)],
+        "resolutions": [("1440,900", 30), ("1512,982", 20), ("1680,1050", 15), ("1728,1117", 15),
+                        ("1920,1080", 10), ("2560,1440", 10)],
+        "webgl": [
+            (("Google Inc. (Apple)", "ANGLE (Apple, Apple M1, OpenGL 4.1)"), 40),
+            (("Google Inc. (Apple)", "ANGLE (Apple, Apple M2, OpenGL 4.1)"), 25),
+            (("Google Inc. (Intel Inc.)",
+              "ANGLE (Intel Inc., Intel(R) Iris(TM) Plus Graphics 655, OpenGL 4.1)"), 20),
+            (("Google Inc. (ATI Technologies Inc.)",
+              "ANGLE (ATI Technologies Inc., AMD Radeon Pro 5300M OpenGL Engine, OpenGL 4.1)"), 15),
+        ],
+        "hardware_concurrency": [("4", 10), ("8", 60), ("10", 20), ("12", 10)],
+        "device_memory": [("8", 70), ("16", 30)],
+    },
+    {
+        "platform": "Linux",
+        "weight": 5,
+        "ua_os": [("X11; Linux x86_64", 1)],
+        "resolutions": [("1920,1080", 60), ("2560,1440", 20), ("1366,768", 20)],
+        "webgl": [
+            (("Google Inc. (Intel)", "ANGLE (Intel, Mesa Intel(R) UHD Graphics 620 (KBL GT2), OpenGL 4.6)"), 50),
+            (("Google Inc. (NVIDIA Corporation)",
+              "ANGLE (NVIDIA Corporation, NVIDIA GeForce GTX 1660/PCIe/SSE2, OpenGL 4.5.0)"), 50),
+        ],
+        "hardware_concurrency": [("4", 30), ("8", 50), ("16", 20)],
+        "device_memory": [("8", 70), ("16", 30)],
+    },
+]
+
+# ((時區, 語言, 緯度, 經度), 權重)
+LOCATIONS = [
+    (("Asia/Taipei", "zh-TW", 25.0330, 121.5654), 20),
+    (("Asia/Hong_Kong", "zh-HK", 22.3193, 114.1694), 8),
+    (("Asia/Tokyo", "ja", 35.6762, 139.6503), 10),
+    (("Asia/Seoul", "ko", 37.5665, 126.9780), 6),
+    (("Asia/Singapore", "en", 1.3521, 103.8198), 6),
+    (("Asia/Bangkok", "th", 13.7563, 100.5018), 4),
+    (("Asia/Ho_Chi_Minh", "vi", 10.8231, 106.6297), 4),
+    (("America/Los_Angeles", "en-US", 34.0522, -118.2437), 10),
+    (("America/New_York", "en-US", 40.7128, -74.0060), 12),
+    (("America/Chicago", "en-US", 41.8781, -87.6298), 6),
+    (("Europe/London", "en-GB", 51.5074, -0.1278), 6),
+    (("Europe/Berlin", "de", 52.5200, 13.4050), 4),
+    (("Europe/Paris", "fr", 48.8566, 2.3522), 4),
+]
+
+# 經緯度的隨機偏移範圍(度)
+GEO_JITTER = 0.05
+
+
+class _Sampler:
+    """
+    批次抽樣，有安裝NumPy時使用向量化的numpy.random.Generator，否則使用random模組
+    """
+
+    def __init__(self, seed: int = None):
+        self.np_rng = np.random.default_rng(seed) if np is not None else None
+        self.rng = random.Random(seed)
+
+    def choice(self, weights: Sequence[float], size: int) -> list:
+        if self.np_rng is not None:
+            p = np.asarray(weights, dtype=float)
+            return self.np_rng.choice(len(p), size=size, p=p / p.sum()).tolist()
+        return self.rng.choices(range(len(weights)), weights=weights, k=size)
+
+    def uniform(self, low: float, high: float, size: int) -> list:
+        if self.np_rng is not None:
+            return self.np_rng.uniform(low, high, size).tolist()
+        return [self.rng.uniform(low, high) for _ in range(size)]
+
+    def integers(self, low: int, high: int, size: int) -> list:
+        """
+        回傳 [low, high) 之間的整數
+        """
+        if self.np_rng is not None:
+            return self.np_rng.integers(low, high, size).tolist()
+        return [self.rng.randrange(low, high) for _ in range(size)]
+
+
+def _weights(table: Sequence[Tuple[object, float]]) -> List[float]:
+    return [w for _, w in table]
+
+
+def fingerprint_key(config: dict) -> bytes:
+    """
+    計算指紋的雜湊值，用來判斷兩個指紋是否重複
+    """
+    fields = (config.get("ua_info"), config.get("resolving_power"), config.get("webgl_info"),
+              config.get("hardware_concurrency"), config.get("device_memory"), config.get("timezone"),
+              config.get("language"), config.get("longitude"), config.get("latitude"))
+    return hashlib.blake2b(repr(fields).encode("utf8"), digest_size=8).digest()
+
+
+class FingerprintGenerator:
+    """
+    依照權重表批次產生互相一致且不重複的指紋設定
+
+        generator = FingerprintGenerator(seed=1)
+        for key, res in ixbrowser.create_many(generator.create_specs(1000), concurrency=8):
+            ...
+    """
+
+    def __init__(self, seed: int = None, platforms: list = None, chrome_versions: list = None,
+                 locations: list = None, geo_jitter: float = GEO_JITTER):
+        """
+        :param seed:            亂數種子，相同種子產生相同結果
+        :param platforms:       平台權重表，格式同PLATFORMS
+        :param chrome_versions: Chrome版本權重表，格式同CHROME_VERSIONS
+        :param locations:       地區權重表，格式同LOCATIONS
+        :param geo_jitter:      經緯度的隨機偏移範圍(度)
+        """
+        self.platforms = platforms or PLATFORMS
+        self.chrome_versions = chrome_versions or CHROME_VERSIONS
+        self.locations = locations or LOCATIONS
+        self.geo_jitter = geo_jitter
+        self.__sampler = _Sampler(seed)
+        # 已產生指紋的雜湊索引
+        self.__seen = set()
+
+    def __len__(self):
+        return len(self.__seen)
+
+    def exclude(self, configs):
+        """
+        將已存在的指紋加入索引，之後不會再產生相同的指紋
+        """
+        for config in configs:
+            self.__seen.add(fingerprint_key(config))
+
+    def generate(self, n: int, max_rounds: int = 20) -> List[dict]:
+        """
+        產生n個不重複的指紋設定
+
+        :param n:           數量
+        :param max_rounds:  重複過多時最多補抽的次數
+        :return: api_browser_create的config區塊
+        """
+        template = _browser_create_values()["config"]
+        results = []
+        for _ in range(max_rounds):
+            missing = n - len(results)
+            if missing <= 0:
+                break
+            for config in self.__sample(missing, template):
+                key = fingerprint_key(config)
+                if key not in self.__seen:
+                    self.__seen.add(key)
+                    results.append(config)
+        if len(results) < n:
+            raise ValueError(f"權重表的組合不足，只產生了 {len(results)} 個不重複的指紋")
+        return results
+
+    def create_specs(self, n: int, batch_size: int = 1000, **values) -> Iterator[dict]:
+        """
+        逐批產生可直接傳給create_many或api_browser_create(**spec)的參數
+
+        :param n:           數量
+        :param batch_size:  每批產生的數量
+        :param values:      其他建立參數，例如 group_id
+        :return:
+        """
+        while n > 0:
+            size = min(n, batch_size)
+            for config in self.generate(size):
+                # api_browser_create會將config合併到最上層，因此指紋需要放在 "config" 鍵中
+                yield {"config": {"config": config}, **values}
+            n -= size
+
+    def __sample(self, n: int, template: dict) -> List[dict]:
+        """
+        一次抽樣n筆，每個欄位各自以向量化方式抽樣
+        """
+        s = self.__sampler
+        platform_idx = s.choice([p["weight"] for p in self.platforms], n)
+        version_idx = s.choice(_weights(self.chrome_versions), n)
+        location_idx = s.choice(_weights(self.locations), n)
+        lat_jitter = s.uniform(-self.geo_jitter, self.geo_jitter, n)
+        lon_jitter = s.uniform(-self.geo_jitter, self.geo_jitter, n)
+        ip_parts = [s.integers(1, 224, n), s.integers(0, 256, n), s.integers(0, 256, n), s.integers(1, 255, n)]
+
+        # 平台相關的欄位，依平台分組後各自抽樣
+        per_platform = {}
+        for k, platform in enumerate(self.platforms):
+            count = platform_idx.count(k)
+            if not count:
+                continue
+            per_platform[k] = iter(zip(
+                s.choice(_weights(platform["ua_os"]), count),
+                s.choice(_weights(platform["resolutions"]), count),
+                s.choice(_weights(platform["webgl"]), count),
+                s.choice(_weights(platform["hardware_concurrency"]), count),
+                s.choice(_weights(platform["device_memory"]), count),
+            ))
+
+        configs = []
+        for i in range(n):
+            platform = self.platforms[platform_idx[i]]
+            os_i, res_i, webgl_i, hc_i, dm_i = next(per_platform[platform_idx[i]])
+            major = self.chrome_versions[version_idx[i]][0]
+            timezone, language, latitude, longitude = self.locations[location_idx[i]][0]
+            webgl_factory, webgl_info = platform["webgl"][webgl_i][0]
+
+            config = dict(template)
+            config.update({
+                "platform": platform["platform"],
+                "br_version": major,
+                "ua_info": UA_TEMPLATE.format(os=platform["ua_os"][os_i][0], major=major),
+                "resolving_power": platform["resolutions"][res_i][0],
+                "webgl_factory": webgl_factory,
+                "webgl_info": webgl_info,
+                "hardware_concurrency": platform["hardware_concurrency"][hc_i][0],
+                "device_memory": platform["device_memory"][dm_i][0],
+                # 使用自訂的語言與時區
+                "language_type": "2",
+                "language": language,
+                "timezone_type": "2",
+                "timezone": timezone,
+                "latitude": round(latitude + lat_jitter[i], 4),
+                "longitude": round(longitude + lon_jitter[i], 4),
+                "real_ip": ".".join(str(part[i]) for part in ip_parts),
+            })
+            configs.append(config)
+        return configs
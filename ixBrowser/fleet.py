@@ -0,0 +1,304 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple, Union
+
+import requests
+
+from .client import IxBrowser
+from .discovery import ApiOnlyDiscovery
+from .utils.probe import tcp_probe
+from .utils.single_flight import SingleFlight
+
+# 沒有可用節點(全部故障或已滿)時的錯誤碼
+FLEET_UNAVAILABLE_CODE = -3
+
+
+class FleetNode:
+    """
+    Fleet中的一個ixBrowser API
+    """
+    __slots__ = ("name", "client", "capacity", "pending", "down_until", "failures")
+
+    def __init__(self, name: str, client: IxBrowser, capacity: int):
+        self.name = name
+        self.client = client
+        self.capacity = capacity
+        # 已選定此節點但尚未開啟完成的數量
+        self.pending = 0
+        self.down_until = 0.0
+        self.failures = 0
+
+    @property
+    def open_count(self) -> int:
+        return len(self.client.current_browser_list) + self.pending
+
+    def is_up(self, now: float = None) -> bool:
+        return self.down_until <= (now if now is not None else time.monotonic())
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "capacity": self.capacity,
+            "open": self.open_count,
+            "up": self.is_up(),
+            "failures": self.failures,
+        }
+
+
+class IxBrowserFleet:
+    """
+    管理多個ixBrowser API，開啟時選擇負載最低的節點
+
+        fleet = IxBrowserFleet(["10.0.0.2:53200", "10.0.0.3:53200", ("10.0.0.4", 53200, 50)], capacity=30)
+        fleet.api_browser_open(1)       # 開到目前開啟數/容量最低的節點
+        driver = fleet.get_selenium_driver(2)
+        fleet.api_browser_close([1, 2]) # 依照profile→節點對應送到各自的節點
+
+    節點連線失敗時標記為故障，down_interval秒內不再分配，之後重新嘗試
+
+    傳入 metrics 時所有節點共用，各節點的數據以 node 標籤區分
+    """
+
+    def __init__(self, nodes: Iterable[Union[str, Tuple, IxBrowser]], capacity: int = 30,
+                 down_interval: float = 30, **client_kwargs):
+        """
+        :param nodes:           節點列表，可為 "host:port"、(host, port)、(host, port, capacity) 或IxBrowser實例
+        :param capacity:        每個節點預設可同時開啟的瀏覽器數量
+        :param down_interval:   節點故障後暫停分配的秒數
+        :param client_kwargs:   建立IxBrowser的其他參數，例如 transport、metrics
+        """
+        self.down_interval = down_interval
+        self.lock = threading.Lock()
+        self.nodes: List[FleetNode] = []
+        # profile_id -> FleetNode
+        self.routes: Dict[int, FleetNode] = {}
+        # 同一個Profile同時開啟時只選一次節點
+        self.open_flight = SingleFlight()
+        client_kwargs.setdefault("discovery", ApiOnlyDiscovery())
+        client_kwargs.setdefault("lazy", True)
+        for node in nodes:
+            self.add_node(node, capacity, **client_kwargs)
+        if not self.nodes:
+            raise ValueError("至少需要一個節點")
+
+    def add_node(self, node: Union[str, Tuple, IxBrowser], capacity: int = 30, **client_kwargs) -> FleetNode:
+        """
+        新增節點
+
+        :return:
+        """
+        if isinstance(node, IxBrowser):
+            client = node
+        else:
+            if isinstance(node, str):
+                host, _, port = node.rpartition(":")
+                node = (host or "127.0.0.1", int(port))
+            if len(node) > 2:
+                capacity = node[2]
+            client = IxBrowser(api_port=int(node[1]), api_host=node[0], **client_kwargs)
+        name = client.ixbrowser_api_host.split("//", 1)[-1].split("/", 1)[0]
+        fleet_node = FleetNode(name, client, capacity)
+        # 節點上的瀏覽器被關閉或被監控器移除時，一併移除對應
+        client.add_close_hook(lambda pids: self.__drop_routes(fleet_node, pids))
+        with self.lock:
+            self.nodes.append(fleet_node)
+        return fleet_node
+
+    # region Routing
+    def node_for(self, profile_id: int) -> Union[FleetNode, None]:
+        """
+        目前開啟profile_id的節點
+        """
+        return self.routes.get(profile_id)
+
+    def client_for(self, profile_id: int) -> Union[IxBrowser, None]:
+        node = self.routes.get(profile_id)
+        return node.client if node is not None else None
+
+    def any_client(self) -> IxBrowser:
+        """
+        負載最低的可用節點，用於不需要指定節點的API，例如 api_browser_list
+        """
+        node = self.__pick(full=True)
+        if node is None:
+            raise Exception("沒有可用的ixBrowser節點")
+        return node.client
+
+    def mark_down(self, node: FleetNode, interval: float = None):
+        """
+        標記節點故障，interval秒內不再分配
+        """
+        with self.lock:
+            node.failures += 1
+            node.down_until = time.monotonic() + (self.down_interval if interval is None else interval)
+        node.client.logger.error(f"ixBrowser節點 {node.name} 無法連線，暫停分配")
+
+    def mark_up(self, node: FleetNode):
+        with self.lock:
+            node.down_until = 0.0
+
+    def check_nodes(self, timeout: float = 1.0) -> List[dict]:
+        """
+        以TCP連線檢查所有節點，恢復可以連線的節點，標記無法連線的節點
+
+        :return: 每個節點的狀態
+        """
+        for node in self.nodes:
+            if tcp_probe(node.client.ixbrowser_api_host, timeout):
+                if not node.is_up():
+                    self.mark_up(node)
+            elif node.is_up():
+                self.mark_down(node)
+        return self.stats()
+
+    def stats(self) -> List[dict]:
+        return [node.stats() for node in self.nodes]
+
+    def __pick(self, reserve: bool = False, exclude=(), full: bool = False) -> Union[FleetNode, None]:
+        """
+        選出開啟數/容量最低的可用節點
+
+        :param reserve: 是否先佔用一個名額，開啟完成後需要釋放pending
+        :param exclude: 不選擇的節點
+        :param full:    是否可以選擇已滿的節點
+        """
+        now = time.monotonic()
+        with self.lock:
+            candidates = [n for n in self.nodes
+                          if n not in exclude and n.is_up(now) and (full or n.open_count < n.capacity)]
+            if not candidates:
+                return None
+            node = min(candidates, key=lambda n: n.open_count / n.capacity)
+            if reserve:
+                node.pending += 1
+            return node
+
+    def __drop_routes(self, node: FleetNode, profile_ids: List[int]):
+        with self.lock:
+            for pid in profile_ids:
+                if self.routes.get(pid) is node:
+                    del self.routes[pid]
+
+    @staticmethod
+    def __unavailable(message: str = "沒有可用的ixBrowser節點") -> dict:
+        return {"result": False, "error": {"code": FLEET_UNAVAILABLE_CODE, "message": message}}
+
+    # endregion
+    # region API
+    def api_browser_open(self, profile_id: int, **open_kwargs) -> dict:
+        """
+        在負載最低的節點開啟Profile，已開啟的Profile送到原本的節點
+
+        :param profile_id:  Profile的ID
+        :param open_kwargs: IxBrowser.api_browser_open的其他參數
+        :return: 成功時回傳的字典會多一個 "node" 鍵
+        """
+        # 同時開啟同一個Profile時只有一個呼叫選擇節點，其他呼叫取得相同結果
+        return dict(self.open_flight.do(profile_id, self.__open, profile_id, open_kwargs))
+
+    def __open(self, profile_id: int, open_kwargs: dict) -> dict:
+        node = self.routes.get(profile_id)
+        if node is not None:
+            res = node.client.api_browser_open(profile_id, **open_kwargs)
+            res["node"] = node.name
+            return res
+
+        tried = []
+        while True:
+            node = self.__pick(reserve=True, exclude=tried)
+            if node is None:
+                return self.__unavailable()
+            tried.append(node)
+            try:
+                res = node.client.api_browser_open(profile_id, **open_kwargs)
+            except requests.exceptions.RequestException:
+                # 節點無法連線，改用下一個節點
+                self.mark_down(node)
+                continue
+            finally:
+                with self.lock:
+                    node.pending -= 1
+            if res["result"]:
+                with self.lock:
+                    self.routes[profile_id] = node
+                res["node"] = node.name
+            return res
+
+    def api_browser_close(self, profile_id: Union[int, List[int]]) -> dict:
+        """
+        關閉Profile，依照profile→節點對應送到各自的節點
+
+        :return: 全部成功時result為True，失敗的節點結果放在 "errors" 中
+        """
+        if isinstance(profile_id, int):
+            profile_id = [profile_id]
+        errors = {}
+        for node, pids in self.__group_by_node(profile_id).items():
+            try:
+                res = node.client.api_browser_close(pids)
+            except requests.exceptions.RequestException as e:
+                self.mark_down(node)
+                res = {"result": False, "error": {"code": -1, "message": str(e)}}
+            if res["result"]:
+                with self.lock:
+                    for pid in pids:
+                        self.routes.pop(pid, None)
+            else:
+                errors[node.name] = res["error"]
+        if errors:
+            return {"result": False, "error": next(iter(errors.values())), "errors": errors}
+        return {"result": True, "data": {}}
+
+    def api_browser_cache_clear(self, profile_id: Union[int, List[int]]) -> dict:
+        """
+        清除快取，依照profile→節點對應送到各自的節點
+
+        :return: 全部成功時result為True，失敗的節點結果放在 "errors" 中
+        """
+        if isinstance(profile_id, int):
+            profile_id = [profile_id]
+        errors = {}
+        for node, pids in self.__group_by_node(profile_id).items():
+            try:
+                res = node.client.api_browser_cache_clear(pids)
+            except requests.exceptions.RequestException as e:
+                self.mark_down(node)
+                res = {"result": False, "error": {"code": -1, "message": str(e)}}
+            if not res["result"]:
+                errors[node.name] = res["error"]
+        if errors:
+            return {"result": False, "error": next(iter(errors.values())), "errors": errors}
+        return {"result": True, "data": {}}
+
+    def get_selenium_driver(self, profile_id: int, reuse: bool = True, **open_kwargs):
+        """
+        獲取selenium driver，尚未開啟時先在負載最低的節點開啟
+
+        :param profile_id:  Profile的ID
+        :param reuse:       是否重用快取的driver
+        :param open_kwargs: IxBrowser.get_selenium_driver的其他參數
+        :return:
+        """
+        node = self.routes.get(profile_id)
+        if node is None:
+            res = self.api_browser_open(profile_id, **open_kwargs)
+            if not res["result"]:
+                raise Exception("開啟ixBrowser失敗，原因：{}".format(res["error"]))
+            node = self.routes[profile_id]
+        return node.client.get_selenium_driver(profile_id, reuse=reuse, **open_kwargs)
+
+    def __group_by_node(self, profile_ids: List[int]) -> Dict[FleetNode, List[int]]:
+        """
+        依照節點分組，沒有對應的Profile送到負載最低的節點
+        """
+        groups: Dict[FleetNode, List[int]] = {}
+        fallback = None
+        for pid in profile_ids:
+            node = self.routes.get(pid)
+            if node is None:
+                if fallback is None:
+                    fallback = self.__pick(full=True) or self.nodes[0]
+                node = fallback
+            groups.setdefault(node, []).append(pid)
+        return groups
+    # endregion
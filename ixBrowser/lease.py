@@ -0,0 +1,173 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import List, Union
+
+# api_browser_open因Profile已被其他程序租用而失敗時的錯誤碼
+LEASE_CONFLICT_CODE = -2
+
+
+class LeaseRegistry:
+    """
+    跨程序共用的Profile租約，避免多個程序同時開啟同一個Profile
+
+    以SQLite檔案保存，同一台機器上的所有程序使用同一個檔案即可互斥。
+    持有者定期更新租約期限，程序當機後租約會在ttl秒後失效，由其他程序接手。
+
+        registry = LeaseRegistry()
+        ixbrowser = IxBrowser(lease_registry=registry)
+        ixbrowser.api_browser_open(1)   # 其他程序開啟1時會回傳 error.code == LEASE_CONFLICT_CODE
+    """
+
+    def __init__(self, path: str = None, ttl: float = 60, heartbeat_interval: float = None, owner: str = None):
+        """
+        :param path:                SQLite檔案路徑，預設為 ~/.ixbrowser/leases.db
+        :param ttl:                 租約期限秒數，超過期限沒有更新的租約可被其他程序取得
+        :param heartbeat_interval:  背景更新租約的間隔秒數，預設為 ttl / 3
+        :param owner:               持有者名稱，預設為 主機名稱:PID:隨機字串
+        """
+        self.path = path or os.path.join(os.path.expanduser("~"), ".ixbrowser", "leases.db")
+        self.ttl = ttl
+        self.heartbeat_interval = heartbeat_interval or ttl / 3
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lock = threading.Lock()
+        self.__stop_event = threading.Event()
+        self.__thread = None
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # isolation_level=None 每個語句各自提交，所有寫入都是單一語句，本身就是原子操作
+        self.__conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        with self.lock:
+            self.__conn.execute("PRAGMA journal_mode=WAL")
+            self.__conn.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    profile_id  INTEGER PRIMARY KEY,
+                    owner       TEXT NOT NULL,
+                    expires_at  REAL NOT NULL,
+                    acquired_at REAL NOT NULL
+                )
+            """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def acquire(self, profile_id: int) -> bool:
+        """
+        取得Profile的租約，已持有時更新期限
+
+        :return: 是否取得
+        """
+        now = time.time()
+        with self.lock:
+            cursor = self.__conn.execute("""
+                INSERT INTO leases (profile_id, owner, expires_at, acquired_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(profile_id) DO UPDATE SET
+                    owner = excluded.owner,
+                    expires_at = excluded.expires_at,
+                    acquired_at = CASE WHEN leases.owner = excluded.owner THEN leases.acquired_at
+                                       ELSE excluded.acquired_at END
+                WHERE leases.owner = excluded.owner OR leases.expires_at < ?
+            """, (profile_id, self.owner, now + self.ttl, now, now))
+            acquired = cursor.rowcount == 1
+        if acquired:
+            self.__start_heartbeat()
+        return acquired
+
+    def release(self, profile_id: Union[int, List[int]]):
+        """
+        釋放自己持有的租約，其他持有者的租約不受影響
+        """
+        if isinstance(profile_id, int):
+            profile_id = [profile_id]
+        with self.lock:
+            self.__conn.executemany("DELETE FROM leases WHERE profile_id = ? AND owner = ?",
+                                    [(pid, self.owner) for pid in profile_id])
+
+    def release_all(self):
+        """
+        釋放自己持有的所有租約
+        """
+        with self.lock:
+            self.__conn.execute("DELETE FROM leases WHERE owner = ?", (self.owner,))
+
+    def heartbeat(self) -> int:
+        """
+        延長自己持有的所有租約
+
+        :return: 更新的租約數量
+        """
+        with self.lock:
+            return self.__conn.execute("UPDATE leases SET expires_at = ? WHERE owner = ?",
+                                       (time.time() + self.ttl, self.owner)).rowcount
+
+    def holder(self, profile_id: int) -> Union[str, None]:
+        """
+        目前持有租約的程序，沒有或已過期時回傳None
+        """
+        with self.lock:
+            row = self.__conn.execute("SELECT owner FROM leases WHERE profile_id = ? AND expires_at >= ?",
+                                      (profile_id, time.time())).fetchone()
+        return row[0] if row else None
+
+    def held(self) -> List[int]:
+        """
+        自己持有的所有profile_id
+        """
+        with self.lock:
+            rows = self.__conn.execute("SELECT profile_id FROM leases WHERE owner = ? ORDER BY profile_id",
+                                       (self.owner,)).fetchall()
+        return [row[0] for row in rows]
+
+    @contextmanager
+    def lease(self, profile_id: int):
+        """
+        with registry.lease(1) as acquired:
+            if acquired:
+                ...
+        """
+        acquired = self.acquire(profile_id)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.release(profile_id)
+
+    def close(self, release: bool = True):
+        """
+        停止背景更新並關閉資料庫
+
+        :param release: 是否釋放自己持有的所有租約
+        """
+        self.__stop_event.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        if release:
+            self.release_all()
+        with self.lock:
+            self.__conn.close()
+
+    def __start_heartbeat(self):
+        if self.__thread is not None:
+            return
+        with self.lock:
+            if self.__thread is not None:
+                return
+            self.__thread = threading.Thread(target=self.__heartbeat_loop, name="ixBrowser-lease", daemon=True)
+            self.__thread.start()
+
+    def __heartbeat_loop(self):
+        while not self.__stop_event.wait(self.heartbeat_interval):
+            try:
+                self.heartbeat()
+            except sqlite3.Error:
+                pass
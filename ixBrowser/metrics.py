@@ -0,0 +1,263 @@
+import bisect
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Callable, Dict, List, Tuple
+
+# 延遲直方圖的區間上限(秒)，browser-open通常需要數秒
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 請求拋出例外(連線失敗、逾時等)時使用的code標籤
+EXCEPTION_CODE = "exception"
+
+PreHook = Callable[[str, dict], None]
+PostHook = Callable[[str, dict, object, float, BaseException], None]
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        # 最後一格為 +Inf
+        self.counts = [0] * (size + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+def _labels(node: str, **labels: str) -> str:
+    """
+    組合Prometheus標籤，node為空時省略
+    """
+    items = ([("node", node)] if node else []) + list(labels.items())
+    return ",".join(f'{k}="{v}"' for k, v in items)
+
+
+class Metrics:
+    """
+    記錄每個API的延遲與錯誤，可輸出Prometheus文字格式
+
+        metrics = Metrics()
+        ixbrowser = IxBrowser(metrics=metrics)
+        ...
+        print(metrics.render())
+        metrics.serve(9100)     # http://127.0.0.1:9100/metrics
+
+    未傳入metrics時IxBrowser不做任何記錄。多個IxBrowser(例如IxBrowserFleet的各節點)可以共用同一個Metrics，
+    每個客戶端的數據以 node 標籤(API的 "host:port")區分
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, prefix: str = "ixbrowser"):
+        """
+        :param buckets: 延遲直方圖的區間上限(秒)，由小到大
+        :param prefix:  指標名稱前綴
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        # (node, endpoint) -> 直方圖
+        self.histograms: Dict[Tuple[str, str], _Histogram] = {}
+        # (node, endpoint, error.code) -> 次數
+        self.responses: Dict[Tuple[str, str, str], int] = {}
+        self.in_flight: Dict[Tuple[str, str], int] = {}
+        # (名稱, node) -> (說明, 取得目前數值的函數)
+        self.gauges: Dict[Tuple[str, str], Tuple[str, Callable[[], float]]] = {}
+        self.pre_hooks: List[PreHook] = []
+        self.post_hooks: List[PostHook] = []
+        self.__server = None
+
+    # region Hooks
+    def add_pre_hook(self, hook: PreHook):
+        """
+        請求送出前呼叫 hook(endpoint, params)
+        """
+        self.pre_hooks.append(hook)
+
+    def add_post_hook(self, hook: PostHook):
+        """
+        請求結束後呼叫 hook(endpoint, params, payload, elapsed, error)
+
+        payload為API的原始回應，請求拋出例外時為None，error為該例外
+        """
+        self.post_hooks.append(hook)
+
+    def add_gauge(self, name: str, func: Callable[[], float], help_text: str = "", node: str = ""):
+        """
+        註冊一個在輸出時才取值的gauge，例如目前開啟的瀏覽器數量
+
+        :param name:        名稱，不含前綴
+        :param func:        取得目前數值的函數
+        :param help_text:   說明
+        :param node:        node標籤，同一個名稱在不同node可以各註冊一次
+        """
+        with self.lock:
+            if (name, node) in self.gauges:
+                raise ValueError(f"gauge {name}(node={node!r}) 已經註冊")
+            self.gauges[(name, node)] = (help_text, func)
+
+    def remove_gauge(self, name: str, node: str = ""):
+        with self.lock:
+            self.gauges.pop((name, node), None)
+
+    # endregion
+    # region Record
+    def begin(self, endpoint: str, params: dict, node: str = "") -> float:
+        """
+        請求開始，回傳開始時間，交給end使用
+        """
+        for hook in self.pre_hooks:
+            hook(endpoint, params)
+        key = (node, endpoint)
+        with self.lock:
+            self.in_flight[key] = self.in_flight.get(key, 0) + 1
+        return time.perf_counter()
+
+    def end(self, endpoint: str, params: dict, start: float, payload=None, error: BaseException = None,
+            node: str = ""):
+        """
+        請求結束，記錄延遲與結果
+
+        :param endpoint:    API名稱
+        :param params:      請求參數
+        :param start:       begin的回傳值
+        :param payload:     API的原始回應
+        :param error:       請求拋出的例外
+        :param node:        node標籤，與begin相同
+        """
+        elapsed = time.perf_counter() - start
+        if error is not None:
+            code = EXCEPTION_CODE
+        else:
+            try:
+                code = str(payload["error"]["code"])
+            except (KeyError, TypeError):
+                code = "unknown"
+        index = bisect.bisect_left(self.buckets, elapsed)
+        with self.lock:
+            self.in_flight[(node, endpoint)] -= 1
+            histogram = self.histograms.get((node, endpoint))
+            if histogram is None:
+                histogram = self.histograms[(node, endpoint)] = _Histogram(len(self.buckets))
+            histogram.counts[index] += 1
+            histogram.sum += elapsed
+            histogram.count += 1
+            key = (node, endpoint, code)
+            self.responses[key] = self.responses.get(key, 0) + 1
+        for hook in self.post_hooks:
+            hook(endpoint, params, payload, elapsed, error)
+
+    def call(self, endpoint: str, params: dict, func: Callable, *args, node: str = ""):
+        """
+        執行func(*args)並記錄，func應回傳API的原始回應
+        """
+        start = self.begin(endpoint, params, node)
+        try:
+            payload = func(*args)
+        except BaseException as e:
+            self.end(endpoint, params, start, error=e, node=node)
+            raise
+        self.end(endpoint, params, start, payload, node=node)
+        return payload
+
+    def reset(self):
+        """
+        清除已記錄的數據，不影響hooks與gauges
+        """
+        with self.lock:
+            self.histograms.clear()
+            self.responses.clear()
+
+    # endregion
+    # region Export
+    def render(self) -> str:
+        """
+        輸出Prometheus文字格式
+        """
+        p = self.prefix
+        with self.lock:
+            histograms = {k: (list(v.counts), v.sum, v.count) for k, v in self.histograms.items()}
+            responses = dict(self.responses)
+            in_flight = dict(self.in_flight)
+
+        lines = [f"# HELP {p}_request_duration_seconds ixBrowser API latency",
+                 f"# TYPE {p}_request_duration_seconds histogram"]
+        for (node, endpoint), (counts, total, count) in sorted(histograms.items()):
+            labels = _labels(node, endpoint=endpoint)
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{p}_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f'{p}_request_duration_seconds_sum{{{labels}}} {total}')
+            lines.append(f'{p}_request_duration_seconds_count{{{labels}}} {count}')
+
+        lines += [f"# HELP {p}_requests_total ixBrowser API responses by error code",
+                  f"# TYPE {p}_requests_total counter"]
+        for (node, endpoint, code), n in sorted(responses.items()):
+            lines.append(f'{p}_requests_total{{{_labels(node, endpoint=endpoint, code=code)}}} {n}')
+
+        lines += [f"# HELP {p}_requests_in_flight ixBrowser API requests in progress",
+                  f"# TYPE {p}_requests_in_flight gauge"]
+        for (node, endpoint), n in sorted(in_flight.items()):
+            lines.append(f'{p}_requests_in_flight{{{_labels(node, endpoint=endpoint)}}} {n}')
+
+        with self.lock:
+            gauges = sorted(self.gauges.items())
+        last_name = None
+        for (name, node), (help_text, func) in gauges:
+            # 同一個名稱的HELP/TYPE只輸出一次
+            if name != last_name:
+                lines += [f"# HELP {p}_{name} {help_text or name}",
+                          f"# TYPE {p}_{name} gauge"]
+                last_name = name
+            labels = _labels(node)
+            lines.append(f"{p}_{name}{{{labels}}} {func()}" if labels else f"{p}_{name} {func()}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        """
+        將render的結果寫入檔案，可搭配node_exporter的textfile collector
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int = 9100, host: str = "127.0.0.1"):
+        """
+        在背景執行緒提供 /metrics
+
+        :return: (host, port)
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                out = metrics.render().encode("utf8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def log_message(self, *args):
+                pass
+
+        self.shutdown()
+        self.__server = ThreadingHTTPServer((host, port), Handler)
+        self.__server.daemon_threads = True
+        threading.Thread(target=self.__server.serve_forever, name="ixBrowser-metrics", daemon=True).start()
+        return self.__server.server_address
+
+    def shutdown(self):
+        """
+        停止serve啟動的伺服器
+        """
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+    # endregion
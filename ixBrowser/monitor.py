@@ -0,0 +1,176 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from .utils.probe import split_address, tcp_probe
+
+LOCAL_HOSTS = frozenset({"127.0.0.1", "localhost", "::1"})
+
+
+class BrowserMonitor:
+    """
+    定期檢查IxBrowser開啟紀錄中的瀏覽器是否還存在
+
+    瀏覽器當機或在ixBrowser介面中被關閉時，current_browser_list仍保留舊的debugging_address，
+    之後get_selenium_driver會連到已經不存在的Port。監控器發現後移除紀錄(或重新開啟)並通知監聽者。
+
+        monitor = BrowserMonitor(ixbrowser, interval=10, reopen=False)
+        monitor.add_listener(lambda event: print(event))
+        ...
+        monitor.stop()
+
+    事件為字典:
+        {"type": "dead", "profile_id": 1, "debugging_address": "127.0.0.1:9222", "reason": "port"}
+        {"type": "reopened", "profile_id": 1, "debugging_address": "127.0.0.1:9333"}
+        {"type": "reopen_failed", "profile_id": 1, "error": {...}}
+    """
+
+    def __init__(self, client, interval: float = 10, probe_timeout: float = 0.5, max_workers: int = 16,
+                 max_probes: int = None, failure_threshold: int = 2, check_webdriver: bool = True,
+                 reopen: bool = False, autostart: bool = True):
+        """
+        :param client:              IxBrowser實例
+        :param interval:            檢查間隔秒數
+        :param probe_timeout:       每個TCP檢查的逾時秒數
+        :param max_workers:         同時進行的TCP檢查數量
+        :param max_probes:          每次最多檢查的瀏覽器數量，超過時下次從上次停止的位置繼續，None為全部檢查
+        :param failure_threshold:   連續失敗幾次才視為已關閉，避免瀏覽器忙碌時誤判
+        :param check_webdriver:     瀏覽器在本機時，同時檢查webdriver執行檔是否存在
+        :param reopen:              發現已關閉時以原本的開啟參數重新開啟
+        :param autostart:           建立時啟動背景執行緒
+        """
+        self.client = client
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        self.max_workers = max_workers
+        self.max_probes = max_probes
+        self.failure_threshold = failure_threshold
+        self.check_webdriver = check_webdriver
+        self.reopen = reopen
+        self.listeners: List[Callable[[dict], None]] = []
+        self.__failures: Dict[int, int] = {}
+        # max_probes時下一次開始檢查的位置
+        self.__cursor = 0
+        self.__stop_event = threading.Event()
+        self.__thread = None
+        self.__executor = None
+        if autostart:
+            self.start()
+
+    def add_listener(self, listener: Callable[[dict], None]):
+        """
+        發生事件時呼叫 listener(event)
+        """
+        self.listeners.append(listener)
+
+    # region Thread
+    def start(self):
+        """
+        啟動背景檢查執行緒
+        """
+        if self.__thread is not None and self.__thread.is_alive():
+            return
+        self.__stop_event.clear()
+        self.__thread = threading.Thread(target=self.__loop, name="ixBrowser-monitor", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        停止背景檢查執行緒
+        """
+        self.__stop_event.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False)
+            self.__executor = None
+
+    def __loop(self):
+        while not self.__stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                self.client.logger.exception("檢查瀏覽器狀態失敗")
+
+    # endregion
+    # region Check
+    def check(self) -> List[dict]:
+        """
+        檢查一次，回傳這次產生的事件
+
+        每次最多花費約 ceil(檢查數量 / max_workers) * probe_timeout 秒
+        """
+        open_browsers = self.client.get_open_browsers()
+        for pid in [pid for pid in self.__failures if pid not in open_browsers]:
+            self.__failures.pop(pid, None)
+        browsers = sorted(open_browsers.items())
+        if not browsers:
+            return []
+
+        if self.max_probes is not None and len(browsers) > self.max_probes:
+            start = self.__cursor % len(browsers)
+            browsers = (browsers[start:] + browsers[:start])[:self.max_probes]
+            self.__cursor = start + self.max_probes
+
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                 thread_name_prefix="ixBrowser-monitor-probe")
+        reasons = list(self.__executor.map(lambda item: self.__probe(item[1]), browsers))
+
+        events = []
+        for (pid, browser), reason in zip(browsers, reasons):
+            if reason is None:
+                self.__failures.pop(pid, None)
+                continue
+            self.__failures[pid] = self.__failures.get(pid, 0) + 1
+            if self.__failures[pid] < self.failure_threshold:
+                continue
+            self.__failures.pop(pid, None)
+            events.extend(self.__handle_dead(pid, browser, reason))
+        return events
+
+    def __probe(self, browser: dict):
+        """
+        :return: None代表正常，否則為失敗原因 "port" 或 "webdriver"
+        """
+        address = browser.get("debugging_address")
+        if not address or not tcp_probe(address, self.probe_timeout):
+            return "port"
+        webdriver = browser.get("webdriver")
+        if self.check_webdriver and webdriver and split_address(address)[0] in LOCAL_HOSTS \
+                and not os.path.exists(webdriver):
+            return "webdriver"
+        return None
+
+    def __handle_dead(self, pid: int, browser: dict, reason: str) -> List[dict]:
+        address = browser.get("debugging_address")
+        # forget_browser會清除開啟參數，需要先取得
+        open_kwargs = self.client.get_open_kwargs(pid)
+        if not self.client.forget_browser(pid, address):
+            # 檢查期間已被關閉或重新開啟
+            return []
+        self.client.logger.error(f"Profile {pid} 的瀏覽器已不存在({reason})，移除開啟紀錄")
+        events = [{"type": "dead", "profile_id": pid, "debugging_address": address, "reason": reason}]
+        if self.reopen:
+            try:
+                res = self.client.api_browser_open(pid, **open_kwargs)
+            except Exception as e:
+                res = {"result": False, "error": {"code": -1, "message": str(e)}}
+            if res["result"]:
+                events.append({"type": "reopened", "profile_id": pid,
+                               "debugging_address": res["data"].get("debugging_address")})
+            else:
+                events.append({"type": "reopen_failed", "profile_id": pid, "error": res["error"]})
+        for event in events:
+            self.__emit(event)
+        return events
+
+    def __emit(self, event: dict):
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception:
+                self.client.logger.exception("瀏覽器監控事件處理失敗")
+    # endregion
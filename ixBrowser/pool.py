@@ -0,0 +1,281 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterable, List
+
+
+class PooledBrowser:
+    """
+    BrowserPool中的一個已開啟Profile
+    """
+    __slots__ = ("profile_id", "driver", "opened_at", "last_used", "uses")
+
+    def __init__(self, profile_id: int, driver):
+        self.profile_id = profile_id
+        self.driver = driver
+        self.opened_at = time.monotonic()
+        self.last_used = self.opened_at
+        self.uses = 0
+
+
+class BrowserPool:
+    """
+    預先開啟並連接WebDriver的瀏覽器池
+
+        pool = BrowserPool(ixbrowser, profile_ids=[1, 2, 3], size=2, max_uses=50)
+        pool.warm_up()
+        with pool.lease() as driver:
+            driver.get("https://google.com")
+        pool.close()
+    """
+
+    def __init__(self, client, profile_ids: Iterable[int], size: int = None, clear_cache_on_return: bool = False,
+                 random_info_on_return: bool = False, idle_timeout: float = None, max_uses: int = None,
+                 maintenance_interval: float = None, max_workers: int = 4, **open_kwargs):
+        """
+        :param client:                  IxBrowser實例
+        :param profile_ids:             瀏覽器池可以使用的Profile
+        :param size:                    保持預先開啟的數量，預設為全部Profile
+        :param clear_cache_on_return:   歸還時關閉瀏覽器並清除快取
+        :param random_info_on_return:   歸還時關閉瀏覽器並隨機指紋
+        :param idle_timeout:            閒置超過秒數的瀏覽器會被關閉
+        :param max_uses:                使用次數達到上限後關閉並重新開啟
+        :param maintenance_interval:    背景維護(閒置回收、補足預熱數量)的間隔秒數，None為不啟用
+        :param max_workers:             預熱時同時開啟的數量
+        :param open_kwargs:             傳給get_selenium_driver的參數
+        """
+        self.client = client
+        self.profile_ids: List[int] = list(profile_ids)
+        self.size = len(self.profile_ids) if size is None else min(size, len(self.profile_ids))
+        self.clear_cache_on_return = clear_cache_on_return
+        self.random_info_on_return = random_info_on_return
+        self.idle_timeout = idle_timeout
+        self.max_uses = max_uses
+        self.max_workers = max_workers
+        self.open_kwargs = open_kwargs
+
+        self.__cond = threading.Condition()
+        self.__idle = deque()
+        self.__cold = deque(self.profile_ids)
+        self.__leased = {}
+        # 正在開啟中的數量，避免重複預熱
+        self.__opening = 0
+        self.__closed = False
+        self.__stop_event = threading.Event()
+        self.__thread = None
+        if maintenance_interval:
+            self.__thread = threading.Thread(target=self.__maintenance_loop, args=(maintenance_interval,),
+                                             name="ixBrowser-pool", daemon=True)
+            self.__thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # region Lease
+    @contextmanager
+    def lease(self, timeout: float = None):
+        """
+        借出一個已連接的WebDriver，離開with區塊時自動歸還
+
+        :param timeout: 等待可用瀏覽器的秒數，None為一直等待
+        :return: selenium WebDriver
+        """
+        entry = self.acquire(timeout)
+        try:
+            yield entry.driver
+        except BaseException:
+            # 瀏覽器或driver可能已經失效，不放回池中
+            self.release(entry, broken=True)
+            raise
+        self.release(entry)
+
+    def acquire(self, timeout: float = None) -> PooledBrowser:
+        """
+        借出一個瀏覽器，使用完畢後必須呼叫release
+
+        閒置中的瀏覽器借出前會先檢查driver是否仍可使用，失效的瀏覽器會被回收並改借其他瀏覽器
+        """
+        self.evict_idle()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            entry, profile_id = self.__take(deadline)
+            if entry is None:
+                entry = self.__open(profile_id)
+                with self.__cond:
+                    self.__leased[profile_id] = entry
+                return entry
+            if self.__is_alive(entry):
+                return entry
+            self.client.logger.error(f"Profile {entry.profile_id} 的WebDriver已失效，重新開啟")
+            with self.__cond:
+                self.__leased.pop(entry.profile_id, None)
+            self.__recycle(entry)
+
+    def __take(self, deadline: float = None):
+        """
+        取出一個閒置中的瀏覽器(登記為借出)，沒有閒置時取出一個未開啟的Profile
+
+        :return: (PooledBrowser, None) 或 (None, profile_id)
+        """
+        with self.__cond:
+            while True:
+                if self.__closed:
+                    raise Exception("瀏覽器池已關閉")
+                if self.__idle:
+                    entry = self.__idle.pop()
+                    self.__leased[entry.profile_id] = entry
+                    return entry, None
+                if self.__cold:
+                    self.__opening += 1
+                    return None, self.__cold.popleft()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("等待可用瀏覽器逾時")
+                self.__cond.wait(remaining)
+
+    @staticmethod
+    def __is_alive(entry: PooledBrowser) -> bool:
+        """
+        以current_window_handle確認driver的session與瀏覽器仍然存在
+        """
+        try:
+            entry.driver.current_window_handle
+            return True
+        except Exception:
+            return False
+
+    def release(self, entry: PooledBrowser, broken: bool = False):
+        """
+        歸還瀏覽器，依照設定決定放回池中或是回收
+
+        :param entry:   acquire借出的瀏覽器
+        :param broken:  使用期間發生錯誤，瀏覽器或driver可能已失效，直接回收
+        """
+        entry.uses += 1
+        entry.last_used = time.monotonic()
+        recycle = broken or self.clear_cache_on_return or self.random_info_on_return or \
+            (self.max_uses is not None and entry.uses >= self.max_uses)
+
+        with self.__cond:
+            self.__leased.pop(entry.profile_id, None)
+            if not recycle and not self.__closed:
+                self.__idle.append(entry)
+                self.__cond.notify()
+                return
+
+        self.__recycle(entry)
+
+    # endregion
+    # region Maintenance
+    def warm_up(self):
+        """
+        開啟Profile直到預先開啟的數量達到size
+        """
+        profile_ids = []
+        with self.__cond:
+            missing = self.size - len(self.__idle) - len(self.__leased) - self.__opening
+            while missing > 0 and self.__cold:
+                profile_ids.append(self.__cold.popleft())
+                missing -= 1
+            self.__opening += len(profile_ids)
+        if not profile_ids:
+            return
+
+        def open_and_return(profile_id):
+            try:
+                entry = self.__open(profile_id)
+            except Exception:
+                return
+            with self.__cond:
+                self.__idle.append(entry)
+                self.__cond.notify()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ixBrowser-pool") as executor:
+            list(executor.map(open_and_return, profile_ids))
+
+    def evict_idle(self):
+        """
+        關閉閒置超過idle_timeout的瀏覽器
+        """
+        if self.idle_timeout is None:
+            return
+        now = time.monotonic()
+        with self.__cond:
+            expired = [e for e in self.__idle if now - e.last_used >= self.idle_timeout]
+            for entry in expired:
+                self.__idle.remove(entry)
+        for entry in expired:
+            self.__recycle(entry)
+
+    def close(self):
+        """
+        關閉瀏覽器池與所有閒置中的瀏覽器，借出中的瀏覽器會在歸還時關閉
+        """
+        self.__stop_event.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        with self.__cond:
+            self.__closed = True
+            entries = list(self.__idle)
+            self.__idle.clear()
+            self.__cond.notify_all()
+        for entry in entries:
+            self.__recycle(entry)
+
+    def stats(self) -> dict:
+        """
+        :return: {"idle": 閒置數量, "leased": 借出數量, "cold": 未開啟數量}
+        """
+        with self.__cond:
+            return {"idle": len(self.__idle), "leased": len(self.__leased), "cold": len(self.__cold)}
+
+    def __maintenance_loop(self, interval: float):
+        while not self.__stop_event.wait(interval):
+            try:
+                self.evict_idle()
+                self.warm_up()
+            except Exception:
+                self.client.logger.exception("瀏覽器池維護失敗")
+
+    # endregion
+    def __open(self, profile_id: int) -> PooledBrowser:
+        """
+        開啟Profile並連接WebDriver，失敗時將Profile放回未開啟佇列
+        """
+        try:
+            driver = self.client.get_selenium_driver(profile_id, **self.open_kwargs)
+        except Exception:
+            with self.__cond:
+                self.__opening -= 1
+                self.__cold.append(profile_id)
+                self.__cond.notify()
+            raise
+        with self.__cond:
+            self.__opening -= 1
+        return PooledBrowser(profile_id, driver)
+
+    def __recycle(self, entry: PooledBrowser):
+        """
+        中斷WebDriver、關閉瀏覽器並執行歸還策略，完成後放回未開啟佇列
+        """
+        try:
+            entry.driver.quit()
+        except Exception:
+            pass
+        try:
+            self.client.api_browser_close(entry.profile_id)
+            if self.clear_cache_on_return:
+                self.client.api_browser_cache_clear(entry.profile_id)
+            if self.random_info_on_return:
+                self.client.api_browser_random_info(entry.profile_id)
+        except Exception:
+            self.client.logger.exception(f"回收Profile {entry.profile_id}失敗")
+        with self.__cond:
+            self.__cold.append(entry.profile_id)
+            self.__cond.notify()
@@ -0,0 +1,127 @@
+import time
+from typing import Callable, Dict
+
+from .utils.probe import tcp_probe
+
+
+class ProcessExited(Exception):
+    """
+    ixBrowser主程式在就緒前以錯誤結束
+    """
+
+
+class ReadinessReport:
+    """
+    啟動檢查的結果
+
+    phases 記錄每個階段花費的秒數:
+        "port":     等待API Port可以連線
+        "service":  等待API可以正常回應(已登入)
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.pid = None
+        self.phases: Dict[str, float] = {}
+        self.attempts: Dict[str, int] = {}
+        self.error = ""
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def __repr__(self):
+        phases = ", ".join(f"{k}={v:.3f}s" for k, v in self.phases.items())
+        return f"ReadinessReport(ready={self.ready}, pid={self.pid}, {phases})"
+
+
+class ReadinessProbe:
+    """
+    以指數退避輪詢ixBrowser是否可用，所有階段共用一個總期限
+    """
+
+    def __init__(self, address: str, deadline: float = 60, initial_delay: float = 0.05, max_delay: float = 2.0,
+                 factor: float = 2.0, connect_timeout: float = 0.5, attempt_timeout: float = 5.0):
+        """
+        :param address:         API位址，例如 "http://127.0.0.1:53200/api/"
+        :param deadline:        所有階段的總期限秒數
+        :param initial_delay:   第一次重試前等待的秒數
+        :param max_delay:       兩次檢查之間最多等待的秒數
+        :param factor:          每次重試等待時間的倍數
+        :param connect_timeout: TCP連線逾時秒數
+        :param attempt_timeout: 每次檢查最多等待的秒數，不會超過剩餘的總期限
+        """
+        self.address = address
+        self.deadline = deadline
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.connect_timeout = connect_timeout
+        self.attempt_timeout = attempt_timeout
+
+    def wait(self, check_service: Callable[[float], bool], process=None) -> ReadinessReport:
+        """
+        依序等待主程式、API Port、API服務可用
+
+        :param check_service:   檢查API是否可用的函數 check_service(timeout)，回傳True代表可用，
+                                請求需要在timeout秒內結束
+        :param process:         subprocess.Popen的回傳值，None代表主程式已在執行
+        :return:
+        """
+        report = ReadinessReport()
+        expire_at = time.monotonic() + self.deadline
+
+        if process is not None:
+            report.pid = process.pid
+
+        def check_port(timeout: float):
+            # 主程式以錯誤結束時不必等到期限
+            if process is not None and process.poll() not in (None, 0):
+                raise ProcessExited(f"ixBrowser主程式結束，回傳值: {process.poll()}")
+            return tcp_probe(self.address, min(self.connect_timeout, timeout))
+
+        try:
+            if not self.__wait_phase(report, "port", check_port, expire_at):
+                report.error = "等待ixBrowser API Port逾時"
+                return report
+
+            if not self.__wait_phase(report, "service", check_service, expire_at):
+                report.error = "等待ixBrowser服務逾時(可能是沒有登入)"
+                return report
+        except ProcessExited as e:
+            report.error = str(e)
+            return report
+
+        report.ready = True
+        return report
+
+    def __wait_phase(self, report: ReadinessReport, name: str, check: Callable[[float], bool],
+                     expire_at: float) -> bool:
+        """
+        重複執行check直到成功或超過期限，記錄花費時間
+
+        每次檢查的逾時為 min(attempt_timeout, 剩餘期限)，沒有回應的服務也不會讓等待超過期限
+        """
+        start = time.monotonic()
+        delay = self.initial_delay
+        attempts = 0
+        try:
+            while True:
+                attempts += 1
+                # 期限已到時仍給最後一次檢查很短的時間
+                timeout = max(0.01, min(self.attempt_timeout, expire_at - time.monotonic()))
+                try:
+                    if check(timeout):
+                        return True
+                except ProcessExited:
+                    raise
+                except Exception:
+                    pass
+                remaining = expire_at - time.monotonic()
+                if remaining <= 0:
+                    return False
+                time.sleep(min(delay, remaining))
+                delay = min(delay * self.factor, self.max_delay)
+        finally:
+            report.phases[name] = time.monotonic() - start
+            report.attempts[name] = attempts
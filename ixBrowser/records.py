@@ -0,0 +1,233 @@
+import keyword
+from functools import lru_cache
+from typing import List, Iterable, Iterator, Tuple, Dict
+
+
+class ProfileRecord:
+    """
+    使用__slots__的精簡Profile資料
+
+    每個欄位組合會產生一個子類別，欄位可用屬性或是key存取:
+        record.profile_id
+        record["profile_id"]
+    """
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    # API欄位名稱 -> slot名稱
+    _slot_names: Dict[str, str] = {}
+
+    def __init__(self, *values):
+        for slot, value in zip(self.__slots__, values):
+            object.__setattr__(self, slot, value)
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, self._slot_names[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str):
+        return key in self._slot_names
+
+    def __eq__(self, other):
+        if not isinstance(other, ProfileRecord):
+            return NotImplemented
+        return self._fields == other._fields and self.values() == other.values()
+
+    def __hash__(self):
+        return hash((self._fields, self.values()))
+
+    def __repr__(self):
+        items = ", ".join(f"{k}={v!r}" for k, v in zip(self._fields, self.values()))
+        return f"ProfileRecord({items})"
+
+    def get(self, key: str, default=None):
+        """
+        取得欄位值，不存在時回傳default
+        """
+        slot = self._slot_names.get(key)
+        if slot is None:
+            return default
+        return getattr(self, slot)
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def to_dict(self) -> dict:
+        """
+        轉換回與api_browser_list相同格式的字典
+        """
+        return dict(zip(self._fields, self.values()))
+
+
+def _slot_name(field: str) -> str:
+    """
+    將API欄位名稱轉換為合法的屬性名稱
+    """
+    name = "".join(c if c.isalnum() or c == "_" else "_" for c in str(field))
+    if not name.isidentifier() or keyword.iskeyword(name):
+        name = "f_" + name
+    return name
+
+
+@lru_cache(maxsize=128)
+def record_type(fields: Tuple[str, ...]):
+    """
+    取得指定欄位組合的ProfileRecord子類別，相同欄位組合共用同一個類別
+
+    :param fields:  欄位名稱
+    :return: ProfileRecord的子類別
+    """
+    slot_names = {}
+    for field in fields:
+        slot = _slot_name(field)
+        while slot in slot_names.values():
+            slot += "_"
+        slot_names[field] = slot
+    return type("ProfileRecord", (ProfileRecord,), {
+        "__slots__": tuple(slot_names.values()),
+        "_fields": fields,
+        "_slot_names": slot_names,
+    })
+
+
+def project_fields(fields: Iterable[str], include_fields: List[str] = None,
+                   exclude_fields: List[str] = None) -> Tuple[str, ...]:
+    """
+    計算投影後的欄位
+
+    有include_fields時依照include_fields的順序(資料中沒有的欄位值為None)，否則保持API回傳的欄位順序
+
+    :param fields:          原始欄位
+    :param include_fields:  只保留的欄位
+    :param exclude_fields:  排除的欄位
+    :return: 投影後的欄位
+    """
+    exclude = set(exclude_fields or ())
+    if include_fields is not None:
+        return tuple(f for f in dict.fromkeys(include_fields) if f not in exclude)
+    return tuple(f for f in fields if f not in exclude)
+
+
+def collect_fields(browsers: Iterable[dict]) -> Tuple[str, ...]:
+    """
+    所有資料欄位的聯集，依照第一次出現的順序
+    """
+    fields = {}
+    for browser in browsers:
+        for key in browser:
+            if key not in fields:
+                fields[key] = None
+    return tuple(fields)
+
+
+def build_records(browsers: List[dict], include_fields: List[str] = None,
+                  exclude_fields: List[str] = None) -> List[ProfileRecord]:
+    """
+    將api_browser_list的資料轉換為ProfileRecord列表
+
+    欄位為所有資料欄位的聯集(或include_fields)，只計算一次投影，缺少的欄位值為None
+
+    :param browsers:        瀏覽器資料
+    :param include_fields:  只保留的欄位
+    :param exclude_fields:  排除的欄位
+    :return:
+    """
+    if not browsers:
+        return []
+    fields = project_fields(collect_fields(browsers) if include_fields is None else (),
+                            include_fields, exclude_fields)
+    cls = record_type(fields)
+    return [cls(*[browser.get(f) for f in fields]) for browser in browsers]
+
+
+class ProfileTable:
+    """
+    以欄為主的Profile資料表，適合大量掃描單一欄位
+
+        table = ixbrowser.api_browser_list(result_type="table")["data"]
+        ids = table.column("profile_id")
+    """
+
+    def __init__(self, fields: Tuple[str, ...] = (), columns: Dict[str, list] = None):
+        self.fields = tuple(fields)
+        self.columns: Dict[str, list] = columns if columns is not None else {f: [] for f in self.fields}
+
+    @classmethod
+    def from_browsers(cls, browsers: List[dict], include_fields: List[str] = None,
+                      exclude_fields: List[str] = None):
+        """
+        由api_browser_list的資料建立資料表
+
+        :param browsers:        瀏覽器資料
+        :param include_fields:  只保留的欄位
+        :param exclude_fields:  排除的欄位
+        :return:
+        """
+        table = cls()
+        table.add_browsers(browsers, include_fields, exclude_fields)
+        return table
+
+    def add_browsers(self, browsers: List[dict], include_fields: List[str] = None,
+                     exclude_fields: List[str] = None):
+        """
+        加入一頁瀏覽器資料，可以逐頁加入後釋放原本的字典
+
+        出現新欄位時加入新的欄，先前資料列的值為None
+
+        :param browsers:        瀏覽器資料
+        :param include_fields:  只保留的欄位
+        :param exclude_fields:  排除的欄位
+        """
+        if not browsers:
+            return
+        fields = project_fields(collect_fields(browsers) if include_fields is None else (),
+                                include_fields, exclude_fields)
+        rows = len(self)
+        for f in fields:
+            if f not in self.columns:
+                self.columns[f] = [None] * rows
+        self.fields = self.fields + tuple(f for f in fields if f not in self.fields)
+        for f in self.fields:
+            self.columns[f].extend([browser.get(f) for browser in browsers])
+
+    def column(self, field: str) -> list:
+        """
+        取得整欄資料
+        """
+        return self.columns[field]
+
+    def row(self, index: int) -> ProfileRecord:
+        """
+        取得單列資料
+        """
+        return record_type(self.fields)(*[self.columns[f][index] for f in self.fields])
+
+    def extend(self, other: "ProfileTable"):
+        """
+        合併另一個欄位相同的資料表
+        """
+        if not other.fields:
+            return
+        if not self.fields:
+            self.fields = other.fields
+            self.columns = {f: [] for f in self.fields}
+        if other.fields != self.fields:
+            raise ValueError("欄位不一致，無法合併")
+        for f in self.fields:
+            self.columns[f].extend(other.columns[f])
+
+    def __len__(self):
+        if not self.fields:
+            return 0
+        return len(self.columns[self.fields[0]])
+
+    def __iter__(self) -> Iterator[ProfileRecord]:
+        cls = record_type(self.fields)
+        return (cls(*values) for values in zip(*[self.columns[f] for f in self.fields]))
+
+    def __repr__(self):
+        return f"ProfileTable(fields={self.fields!r}, rows={len(self)})"
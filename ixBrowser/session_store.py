@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Union
+
+from .utils.json_codec import loads, dumps
+
+
+class SessionStore:
+    """
+    將開啟中的瀏覽器(profile_id、debugging_address、webdriver路徑、開啟時間)保存在SQLite
+
+    程式重新啟動後，IxBrowser會檢查保存的瀏覽器是否還在執行，直接重新連接，不必重新開啟
+
+        store = SessionStore()
+        ixbrowser = IxBrowser(session_store=store)
+        ixbrowser.get_selenium_driver(1)    # 上次執行時已開啟的Profile直接連接
+    """
+
+    def __init__(self, path: str = None):
+        """
+        :param path:    SQLite檔案路徑，預設為 ~/.ixbrowser/sessions.db
+        """
+        self.path = path or os.path.join(os.path.expanduser("~"), ".ixbrowser", "sessions.db")
+        self.lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.__conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        with self.lock:
+            self.__conn.execute("PRAGMA journal_mode=WAL")
+            # 以API位址區分，多個ixBrowser(例如IxBrowserFleet)可以共用同一個檔案
+            self.__conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    api_host            TEXT NOT NULL,
+                    profile_id          INTEGER NOT NULL,
+                    debugging_address   TEXT NOT NULL,
+                    webdriver           TEXT NOT NULL,
+                    opened_at           REAL NOT NULL,
+                    data                TEXT NOT NULL,
+                    PRIMARY KEY (api_host, profile_id)
+                )
+            """)
+
+    def save(self, api_host: str, profile_id: int, data: dict, opened_at: float = None):
+        """
+        保存browser-open回傳的數據
+
+        :param api_host:    ixBrowser API位址
+        :param profile_id:  Profile的ID
+        :param data:        browser-open回傳的數據，需要包含debugging_address與webdriver
+        :param opened_at:   開啟時間(time.time())，預設為現在
+        """
+        with self.lock:
+            self.__conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+                (api_host, profile_id, data.get("debugging_address", ""), data.get("webdriver", ""),
+                 opened_at or time.time(), dumps(data).decode("utf8")))
+
+    def remove(self, api_host: str, profile_id: Union[int, List[int]]):
+        if isinstance(profile_id, int):
+            profile_id = [profile_id]
+        with self.lock:
+            self.__conn.executemany("DELETE FROM sessions WHERE api_host = ? AND profile_id = ?",
+                                    [(api_host, pid) for pid in profile_id])
+
+    def load(self, api_host: str) -> Dict[int, dict]:
+        """
+        讀取保存的瀏覽器
+
+        :return: {profile_id: {"data": browser-open回傳的數據, "opened_at": 開啟時間}}
+        """
+        with self.lock:
+            rows = self.__conn.execute("SELECT profile_id, data, opened_at FROM sessions WHERE api_host = ?",
+                                       (api_host,)).fetchall()
+        return {pid: {"data": loads(data), "opened_at": opened_at} for pid, data, opened_at in rows}
+
+    def clear(self, api_host: str = None):
+        """
+        刪除保存的瀏覽器，api_host為None時全部刪除
+        """
+        with self.lock:
+            if api_host is None:
+                self.__conn.execute("DELETE FROM sessions")
+            else:
+                self.__conn.execute("DELETE FROM sessions WHERE api_host = ?", (api_host,))
+
+    def close(self):
+        with self.lock:
+            self.__conn.close()
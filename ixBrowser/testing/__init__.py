@@ -0,0 +1,2 @@
+from .mock_server import MockIxBrowserServer
+from .devtools import MockDevToolsServer
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import uuid
+from typing import Dict, List
+
+
+class MockDevToolsServer:
+    """
+    本地的DevTools替身，用於測試ixBrowser.cdp，需要安裝aiohttp
+
+    支援 /json/version 與瀏覽器WebSocket上的部分指令:
+        Target.getTargets / createTarget / attachToTarget / detachFromTarget
+        Page.enable / Page.navigate (之後送出 Page.loadEventFired)
+        Runtime.evaluate (結果取自 values，"location.href" 為目前網址)
+        Fetch.enable / disable / continueRequest / failRequest / fulfillRequest
+
+        async with MockDevToolsServer() as devtools:
+            connection = await CdpConnection.connect(devtools.address)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.requested_port = port
+        # JavaScript運算式 -> 結果
+        self.values: Dict[str, object] = {}
+        # 收到的所有指令 (sessionId, method, params)
+        self.commands: List[tuple] = []
+        # 被攔截的請求的處理結果 requestId -> 方法名稱
+        self.resolved: Dict[str, str] = {}
+        self.port = None
+        self.__runner = None
+        self.__targets: Dict[str, str] = {}
+        self.__sessions: Dict[str, str] = {}
+        self.__fetch = set()
+        self.__sockets = set()
+        self.__paused: Dict[str, asyncio.Future] = {}
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    async def start(self):
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get("/json/version", self.__version)
+        app.router.add_get("/devtools/browser/{id}", self.__websocket)
+        self.__runner = web.AppRunner(app)
+        await self.__runner.setup()
+        site = web.TCPSite(self.__runner, self.host, self.requested_port)
+        await site.start()
+        self.port = self.__runner.addresses[0][1]
+        self.__targets[uuid.uuid4().hex.upper()] = "about:blank"
+        return self
+
+    async def stop(self):
+        if self.__runner is not None:
+            await self.__runner.cleanup()
+            self.__runner = None
+
+    async def send_raw(self, data: str):
+        """
+        對所有連線送出原始文字，用於模擬格式錯誤的訊息
+        """
+        for ws in list(self.__sockets):
+            if not ws.closed:
+                await ws.send_str(data)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def __version(self, request):
+        from aiohttp import web
+        return web.json_response({
+            "Browser": "Chrome/116.0.0.0",
+            "Protocol-Version": "1.3",
+            "webSocketDebuggerUrl": f"ws://{self.address}/devtools/browser/{uuid.uuid4()}",
+        })
+
+    async def __websocket(self, request):
+        from aiohttp import web, WSMsgType
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        self.__sockets.add(ws)
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            message = json.loads(msg.data)
+            # 每個指令各自處理，navigate等待攔截結果時不會阻塞其他指令
+            asyncio.ensure_future(self.__handle(ws, message))
+        self.__sockets.discard(ws)
+        return ws
+
+    async def __handle(self, ws, message: dict):
+        session_id = message.get("sessionId")
+        method = message["method"]
+        params = message.get("params", {})
+        self.commands.append((session_id, method, params))
+
+        async def send(data: dict):
+            if not ws.closed:
+                await ws.send_str(json.dumps(data))
+
+        async def event(name: str, event_params: dict):
+            await send({"method": name, "params": event_params, "sessionId": session_id})
+
+        result = {}
+        if method == "Target.getTargets":
+            result = {"targetInfos": [{"targetId": t, "type": "page", "url": url}
+                                      for t, url in self.__targets.items()]}
+        elif method == "Target.createTarget":
+            target_id = uuid.uuid4().hex.upper()
+            self.__targets[target_id] = params.get("url", "about:blank")
+            result = {"targetId": target_id}
+        elif method == "Target.attachToTarget":
+            if params.get("targetId") not in self.__targets:
+                await send({"id": message["id"], "error": {"code": -32602, "message": "No target with given id"}})
+                return
+            new_session = uuid.uuid4().hex.upper()
+            self.__sessions[new_session] = params["targetId"]
+            result = {"sessionId": new_session}
+        elif method == "Target.detachFromTarget":
+            self.__sessions.pop(params.get("sessionId"), None)
+        elif method == "Page.navigate":
+            url = params["url"]
+            await send({"id": message["id"], "result": {"frameId": self.__sessions.get(session_id, "")}})
+            if session_id in self.__fetch:
+                request_id = uuid.uuid4().hex
+                paused = self.__paused[request_id] = asyncio.get_running_loop().create_future()
+                await event("Fetch.requestPaused", {"requestId": request_id,
+                                                    "request": {"url": url, "method": "GET", "headers": {}},
+                                                    "resourceType": "Document"})
+                action = await paused
+                self.__paused.pop(request_id, None)
+                if action == "Fetch.failRequest":
+                    return
+            self.__targets[self.__sessions.get(session_id, "")] = url
+            await event("Page.loadEventFired", {"timestamp": 0})
+            return
+        elif method == "Runtime.evaluate":
+            expression = params["expression"]
+            if expression == "location.href":
+                value = self.__targets.get(self.__sessions.get(session_id, ""))
+            elif expression in self.values:
+                value = self.values[expression]
+            else:
+                result = {"result": {"type": "object", "subtype": "error"},
+                          "exceptionDetails": {"text": "Uncaught",
+                                               "exception": {"description": f"ReferenceError: {expression}"}}}
+                await send({"id": message["id"], "result": result})
+                return
+            result = {"result": {"type": type(value).__name__, "value": value}}
+        elif method == "Fetch.enable":
+            self.__fetch.add(session_id)
+        elif method == "Fetch.disable":
+            self.__fetch.discard(session_id)
+        elif method in ("Fetch.continueRequest", "Fetch.failRequest", "Fetch.fulfillRequest"):
+            self.resolved[params["requestId"]] = method
+            future = self.__paused.get(params["requestId"])
+            if future is not None and not future.done():
+                future.set_result(method)
+        await send({"id": message["id"], "result": result})
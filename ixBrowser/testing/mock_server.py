@@ -0,0 +1,294 @@
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Union
+
+
+class MockIxBrowserServer:
+    """
+    本地的ixBrowser API替身，用於測試與效能測量，不需要安裝ixBrowser
+
+        with MockIxBrowserServer(profiles=1000, latency={"browser-open": 0.2}) as server:
+            ixbrowser = IxBrowser(api_port=server.port, discovery=ApiOnlyDiscovery())
+            ixbrowser.api_browser_list()
+
+    支援的API: group-list, browser-list, browser-open, browser-open-random, browser-close-all,
+    browser-cache-clear, browser-create, browser-update, browser-deleted, random-browser-info
+    """
+
+    ERROR_CODE = 9999
+
+    def __init__(self, profiles: int = 100, groups: int = 5, latency: Union[float, Dict[str, float]] = 0.0,
+                 error_rate: Union[float, Dict[str, float]] = 0.0, host: str = "127.0.0.1", port: int = 0,
+                 seed: int = None, max_limit: int = None):
+        """
+        :param profiles:    初始的Profile數量
+        :param groups:      初始的組數量
+        :param latency:     每個請求的延遲秒數，可用字典指定各API，例如 {"browser-open": 0.5}
+        :param error_rate:  回傳錯誤的機率(0~1)，可用字典指定各API
+        :param host:        監聽位址
+        :param port:        監聽Port，0為自動選擇
+        :param seed:        錯誤注入使用的亂數種子
+        :param max_limit:   分頁API的limit上限，超過時以上限計算，模擬限制每頁數量的伺服器
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.host = host
+        self.requested_port = port
+        self.max_limit = max_limit
+        self.lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.groups = [{"id": i, "title": f"group-{i}"} for i in range(1, groups + 1)]
+        self.profiles: Dict[int, dict] = {}
+        self.opened: Dict[int, dict] = {}
+        self.next_profile_id = 1
+        # API名稱 -> 接下來要回傳的HTTP錯誤狀態碼
+        self.__http_failures: Dict[str, list] = {}
+        self.__rng = random.Random(seed)
+        self.__server = None
+        self.__thread = None
+        for _ in range(profiles):
+            self.add_profile()
+
+    # region Server
+    @property
+    def port(self) -> int:
+        return self.__server.server_address[1]
+
+    @property
+    def api_host(self) -> str:
+        return f"http://{self.host}:{self.port}/api/"
+
+    def start(self):
+        """
+        在背景執行緒啟動伺服器
+        """
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 標頭與內容分開寫出，不關閉Nagle會被延遲ACK拖慢約40ms
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                try:
+                    params = json.loads(body) if body else {}
+                except ValueError:
+                    params = {}
+                endpoint = self.path.rstrip("/").rsplit("/", 1)[-1]
+                status = server.take_http_failure(endpoint)
+                if status is None:
+                    status, out = 200, json.dumps(server.handle(endpoint, params)).encode("utf8")
+                else:
+                    out = json.dumps(server.error(f"HTTP {status}", status)).encode("utf8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def log_message(self, *args):
+                pass
+
+        self.__server = ThreadingHTTPServer((self.host, self.requested_port), Handler)
+        self.__server.daemon_threads = True
+        self.__thread = threading.Thread(target=self.__server.serve_forever, name="ixBrowser-mock", daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        """
+        停止伺服器
+        """
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__thread.join()
+            self.__server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    # endregion
+    # region State
+    def add_profile(self, **values) -> dict:
+        """
+        新增一個Profile
+
+        :return: Profile資料
+        """
+        with self.lock:
+            return self.__add_profile(values)
+
+    def __add_profile(self, values: dict) -> dict:
+        pid = self.next_profile_id
+        self.next_profile_id += 1
+        group = self.groups[(pid - 1) % len(self.groups)] if self.groups else {"id": 1, "title": ""}
+        profile = {
+            "profile_id": pid,
+            "name": f"profile-{pid}",
+            "group_id": group["id"],
+            "group_name": group["title"],
+            "note": "",
+            "color": "#CC9966",
+            "site_url": "https://google.com/",
+            "proxy_mode": 2,
+            "proxy_type": "direct",
+            "proxy_ip": "",
+            "proxy_port": "",
+            "tag": [],
+            "last_open_time": "",
+            "created_time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        profile.update({k: v for k, v in values.items() if k in profile and k != "profile_id"})
+        self.profiles[pid] = profile
+        return profile
+
+    def fail_next(self, endpoint: str, count: int = 1, status: int = 503):
+        """
+        接下來count個endpoint請求直接回傳HTTP錯誤，不會執行API，用於測試重試
+
+        :param endpoint:    API名稱
+        :param count:       次數
+        :param status:      HTTP狀態碼
+        """
+        with self.lock:
+            self.__http_failures.setdefault(endpoint, []).extend([status] * count)
+
+    def take_http_failure(self, endpoint: str):
+        """
+        取出下一個要回傳的HTTP錯誤狀態碼，沒有時回傳None
+        """
+        with self.lock:
+            failures = self.__http_failures.get(endpoint)
+            if not failures:
+                return None
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            return failures.pop(0)
+
+    def handle(self, endpoint: str, params: dict) -> dict:
+        """
+        處理一個API請求
+
+        :param endpoint:    API名稱
+        :param params:      請求參數
+        :return: 與ixBrowser相同格式的回應
+        """
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        delay = self.__per_endpoint(self.latency, endpoint)
+        if delay:
+            time.sleep(delay)
+        rate = self.__per_endpoint(self.error_rate, endpoint)
+        if rate and self.__rng.random() < rate:
+            return self.error("mock error")
+
+        handler = getattr(self, "api_" + endpoint.replace("-", "_"), None)
+        if handler is None:
+            return self.error(f"unknown api: {endpoint}")
+        with self.lock:
+            return handler(params)
+
+    @staticmethod
+    def __per_endpoint(value, endpoint: str) -> float:
+        if isinstance(value, dict):
+            return value.get(endpoint, 0.0)
+        return value
+
+    @staticmethod
+    def ok(data) -> dict:
+        return {"error": {"code": 0, "message": "success"}, "data": data}
+
+    @classmethod
+    def error(cls, message: str, code: int = None) -> dict:
+        return {"error": {"code": code or cls.ERROR_CODE, "message": message}, "data": {}}
+
+    def __page(self, items: list, params: dict) -> dict:
+        page = max(int(params.get("page") or 1), 1)
+        limit = max(int(params.get("limit") or 10), 1)
+        if self.max_limit is not None:
+            limit = min(limit, self.max_limit)
+        return {"total": len(items), "data": items[(page - 1) * limit:page * limit]}
+
+    @staticmethod
+    def __ids(params: dict) -> list:
+        ids = params.get("profile_id")
+        return ids if isinstance(ids, list) else [ids]
+
+    def debugging_address(self, profile_id: int) -> str:
+        """
+        Profile開啟後回傳的debugging_address
+        """
+        return f"127.0.0.1:{20000 + profile_id % 40000}"
+
+    # endregion
+    # region API
+    def api_group_list(self, params: dict) -> dict:
+        title = params.get("title") or ""
+        groups = [dict(g) for g in self.groups if title in g["title"]]
+        return self.ok(self.__page(groups, params))
+
+    def api_browser_list(self, params: dict) -> dict:
+        group_id = params.get("group_id") or 0
+        name = params.get("name") or ""
+        profiles = [dict(p) for p in self.profiles.values()
+                    if (not group_id or p["group_id"] == group_id) and (not name or name in p["name"])]
+        return self.ok(self.__page(profiles, params))
+
+    def api_browser_open(self, params: dict) -> dict:
+        pid = params.get("profile_id")
+        if pid not in self.profiles:
+            return self.error("profile not found", 1008)
+        if pid in self.opened:
+            return self.error("profile is already open", 1009)
+        self.profiles[pid]["last_open_time"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.opened[pid] = {
+            "debugging_address": self.debugging_address(pid),
+            "webdriver": "/opt/ixBrowser/chromedriver",
+            "debugging_port": int(self.debugging_address(pid).rsplit(":", 1)[1]),
+        }
+        return self.ok(dict(self.opened[pid]))
+
+    api_browser_open_random = api_browser_open
+
+    def api_browser_close_all(self, params: dict) -> dict:
+        for pid in self.__ids(params):
+            self.opened.pop(pid, None)
+        return self.ok({})
+
+    def api_browser_cache_clear(self, params: dict) -> dict:
+        ids = self.__ids(params)
+        if any(pid not in self.profiles for pid in ids):
+            return self.error("profile not found", 1008)
+        return self.ok({})
+
+    def api_browser_create(self, params: dict) -> dict:
+        return self.ok(self.__add_profile(params)["profile_id"])
+
+    def api_browser_update(self, params: dict) -> dict:
+        pid = params.get("profile_id")
+        if pid not in self.profiles:
+            return self.error("profile not found", 1008)
+        profile = self.profiles[pid]
+        profile.update({k: v for k, v in params.items() if k in profile and k != "profile_id"})
+        return self.ok({})
+
+    def api_browser_deleted(self, params: dict) -> dict:
+        for pid in self.__ids(params):
+            self.profiles.pop(pid, None)
+            self.opened.pop(pid, None)
+        return self.ok({})
+
+    def api_random_browser_info(self, params: dict) -> dict:
+        pid = params.get("profile_id")
+        if pid not in self.profiles:
+            return self.error("profile not found", 1008)
+        return self.ok({})
+    # endregion
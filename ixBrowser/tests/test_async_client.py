@@ -0,0 +1,52 @@
+import asyncio
+import unittest
+
+from ixBrowser.async_client import AsyncIxBrowser
+from ixBrowser.records import ProfileRecord, ProfileTable
+from ixBrowser.testing import MockIxBrowserServer
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestAsyncIxBrowser(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockIxBrowserServer(profiles=10, groups=2).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_browser_list_error(self):
+        self.server.error_rate = {"browser-list": 1.0}
+
+        async def main():
+            async with AsyncIxBrowser(api_port=self.server.port) as ix:
+                return await ix.api_browser_list(include_fields=["profile_id"])
+
+        res = run(main())
+        self.assertFalse(res["result"])
+        self.assertEqual(res["error"]["code"], MockIxBrowserServer.ERROR_CODE)
+
+    def test_browser_list_result_type(self):
+        async def main():
+            async with AsyncIxBrowser(api_port=self.server.port) as ix:
+                records = await ix.api_browser_list(group="group-2", include_fields=["profile_id", "group_id"],
+                                                    result_type="record")
+                table = await ix.api_browser_list(limit=4, result_type="table")
+                raw = await ix.api_request("browser-list", {"page": 1, "limit": 3}, raw=True)
+                with self.assertRaises(ValueError):
+                    await ix.api_browser_list(result_type="list")
+                return records, table, raw
+
+        records, table, raw = run(main())
+        self.assertTrue(all(isinstance(r, ProfileRecord) for r in records["data"]))
+        self.assertEqual([r.profile_id for r in records["data"]], [2, 4, 6, 8, 10])
+        self.assertIsInstance(table["data"], ProfileTable)
+        self.assertEqual(len(table["data"]), 4)
+        self.assertEqual(raw["data"]["total"], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
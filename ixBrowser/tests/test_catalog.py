@@ -0,0 +1,72 @@
+import unittest
+
+from ixBrowser.catalog import ProfileCatalog
+from ixBrowser.client import IxBrowser
+from ixBrowser.discovery import ApiOnlyDiscovery
+from ixBrowser.testing import MockIxBrowserServer
+
+
+class TestProfileCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockIxBrowserServer(profiles=10, groups=2).start()
+        self.ixbrowser = IxBrowser(api_port=self.server.port, discovery=ApiOnlyDiscovery())
+        self.catalog = ProfileCatalog(self.ixbrowser, page_size=4)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_load(self):
+        self.assertEqual(len(self.catalog), 10)
+        self.assertEqual(self.catalog.get(3)["name"], "profile-3")
+        self.assertEqual(sorted(p["profile_id"] for p in self.catalog.by_group(2)), [2, 4, 6, 8, 10])
+        self.assertEqual([p["profile_id"] for p in self.catalog.by_name("profile-7")], [7])
+        self.assertEqual(sorted(p["profile_id"] for p in self.catalog.search_name("profile-1")), [1, 10])
+
+    def test_refresh_diff(self):
+        self.assertEqual(self.catalog.refresh(), {"added": [], "updated": [], "removed": []})
+        # 其他程式直接修改ixBrowser
+        self.server.add_profile(name="external")
+        self.server.profiles[2]["name"] = "renamed"
+        self.server.profiles[5]["group_id"] = 2
+        del self.server.profiles[9]
+
+        self.assertEqual(self.catalog.refresh(), {"added": [11], "updated": [2, 5], "removed": [9]})
+        self.assertEqual([p["profile_id"] for p in self.catalog.by_name("external")], [11])
+        self.assertEqual(self.catalog.by_name("profile-2"), [])
+        self.assertEqual(self.catalog.by_name("renamed")[0]["profile_id"], 2)
+        self.assertIn(5, [p["profile_id"] for p in self.catalog.by_group(2)])
+        self.assertNotIn(5, [p["profile_id"] for p in self.catalog.by_group(1)])
+        self.assertNotIn(9, self.catalog)
+
+    def test_write_through(self):
+        pid = self.ixbrowser.api_browser_create(name="created")["data"]
+        self.assertEqual(self.catalog.by_name("created")[0]["profile_id"], pid)
+
+        self.ixbrowser.api_browser_update(pid, diff=True, name="updated")
+        self.assertEqual(self.catalog.by_name("created"), [])
+        self.assertEqual(self.catalog.get(pid)["name"], "updated")
+
+        self.ixbrowser.api_browser_delete(pid)
+        self.assertNotIn(pid, self.catalog)
+        # 與伺服器一致，刷新時沒有差異
+        self.assertEqual(self.catalog.refresh(), {"added": [], "updated": [], "removed": []})
+
+    def test_open_close_index(self):
+        self.ixbrowser.api_browser_open(1)
+        self.ixbrowser.api_browser_open(2)
+        self.assertTrue(self.catalog.is_open(1))
+        self.assertEqual(sorted(p["profile_id"] for p in self.catalog.open_profiles()), [1, 2])
+
+        self.ixbrowser.api_browser_close(1)
+        self.assertFalse(self.catalog.is_open(1))
+        self.ixbrowser.forget_browser(2)
+        self.assertEqual(self.catalog.open_profiles(), [])
+
+    def test_include_fields(self):
+        catalog = ProfileCatalog(self.ixbrowser, include_fields=["note"])
+        self.assertEqual(set(catalog.get(1)), {"profile_id", "group_id", "name", "note"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import asyncio
+import unittest
+
+from ixBrowser.async_client import AsyncIxBrowser
+from ixBrowser.cdp import CdpConnection, CdpError
+from ixBrowser.testing import MockDevToolsServer, MockIxBrowserServer
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestCdp(unittest.TestCase):
+
+    def test_navigate_evaluate(self):
+        async def main():
+            async with MockDevToolsServer() as devtools:
+                devtools.values["document.title"] = "Example"
+                async with await CdpConnection.connect(devtools.address) as connection:
+                    page = await connection.attach()
+                    await page.navigate("https://example.com/")
+                    self.assertEqual(await page.evaluate("location.href"), "https://example.com/")
+                    self.assertEqual(await page.evaluate("document.title"), "Example")
+                    with self.assertRaises(CdpError):
+                        await page.evaluate("missing")
+
+        run(main())
+
+    def test_intercept(self):
+        async def main():
+            async with MockDevToolsServer() as devtools:
+                async with await CdpConnection.connect(devtools.address) as connection:
+                    page = await connection.attach()
+                    seen = []
+
+                    async def handler(event):
+                        seen.append(event["request"]["url"])
+                        if event["request"]["url"].endswith(".png"):
+                            return {"fail": "BlockedByClient"}
+                        return {"status": 200, "body": "<html></html>"}
+
+                    await page.intercept(handler)
+                    await page.navigate("https://example.com/")
+                    await page.navigate("https://example.com/a.png", wait_load=False)
+                    await asyncio.sleep(0.1)
+                    self.assertEqual(seen, ["https://example.com/", "https://example.com/a.png"])
+                    self.assertEqual(sorted(devtools.resolved.values()),
+                                     ["Fetch.failRequest", "Fetch.fulfillRequest"])
+
+        run(main())
+
+    def test_handler_errors(self):
+        async def main():
+            async with MockDevToolsServer() as devtools:
+                devtools.values["document.title"] = "Example"
+                async with await CdpConnection.connect(devtools.address, timeout=2) as connection:
+                    page = await connection.attach()
+
+                    def raising(event):
+                        raise RuntimeError("handler")
+
+                    async def raising_async(event):
+                        raise RuntimeError("async handler")
+
+                    page.on("Page.loadEventFired", raising)
+                    page.on("Page.loadEventFired", raising_async)
+                    bad_wait = page.wait_for("Page.loadEventFired", predicate=lambda event: event["missing"])
+                    await page.navigate("https://example.com/")
+                    with self.assertRaises(KeyError):
+                        await bad_wait
+                    # 讀取迴圈仍在執行，之後的指令正常回應
+                    self.assertFalse(connection.closed)
+                    self.assertEqual(await page.evaluate("document.title"), "Example")
+
+        run(main())
+
+    def test_intercept_handler_error(self):
+        async def main():
+            async with MockDevToolsServer() as devtools:
+                async with await CdpConnection.connect(devtools.address, timeout=2) as connection:
+                    page = await connection.attach()
+
+                    def handler(event):
+                        raise RuntimeError("handler")
+
+                    await page.intercept(handler)
+                    await page.navigate("https://example.com/")
+                    self.assertEqual(list(devtools.resolved.values()), ["Fetch.continueRequest"])
+
+        run(main())
+
+    def test_closed_after_reader_exit(self):
+        async def main():
+            async with MockDevToolsServer() as devtools:
+                async with await CdpConnection.connect(devtools.address, timeout=2) as connection:
+                    page = await connection.attach()
+                    # 無法解析的訊息讓讀取迴圈結束，連線需要標記為已關閉，不能讓之後的指令等到逾時
+                    await devtools.send_raw("not json")
+                    for _ in range(100):
+                        if connection.closed:
+                            break
+                        await asyncio.sleep(0.01)
+                    self.assertTrue(connection.closed)
+                    with self.assertRaises(CdpError):
+                        await page.evaluate("document.title")
+
+        run(main())
+
+    def test_get_cdp_session(self):
+        async def main():
+            async with MockDevToolsServer() as devtools:
+                with MockIxBrowserServer(profiles=10) as server:
+                    server.debugging_address = lambda profile_id: devtools.address
+                    async with AsyncIxBrowser(api_port=server.port) as ix:
+                        pages = await asyncio.gather(*[ix.get_cdp_session(pid) for pid in range(1, 11)])
+                        await asyncio.gather(*[page.navigate(f"https://example.com/{i}")
+                                               for i, page in enumerate(pages)])
+                        self.assertIs(await ix.get_cdp_session(1), pages[0])
+                        await ix.api_browser_close(1)
+                        self.assertNotIn(1, ix.cdp_sessions)
+
+        run(main())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from ixBrowser.client import IxBrowser
+from ixBrowser.discovery import ApiOnlyDiscovery
+from ixBrowser.metrics import Metrics
+from ixBrowser.testing import MockIxBrowserServer
+
+
+class TestIxBrowserMock(unittest.TestCase):
+    """
+    使用MockIxBrowserServer測試IxBrowser，不需要安裝ixBrowser
+    """
+
+    def setUp(self):
+        self.server = MockIxBrowserServer(profiles=25, groups=2).start()
+        self.ixbrowser = IxBrowser(api_port=self.server.port, discovery=ApiOnlyDiscovery())
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_browser_list(self):
+        info = self.ixbrowser.api_browser_list(limit=10)
+        self.assertTrue(info["result"])
+        self.assertEqual(len(info["data"]), 10)
+
+        info = self.ixbrowser.api_browser_list(group="group-2", include_fields=["profile_id", "group_id"])
+        self.assertTrue(all(x["group_id"] == 2 for x in info["data"]))
+        self.assertEqual(set(info["data"][0]), {"profile_id", "group_id"})
+
+    def test_iter_browsers(self):
+        self.assertEqual([x["profile_id"] for x in self.ixbrowser.iter_browsers(page_size=7)], list(range(1, 26)))
+
+    def test_iter_capped_limit(self):
+        # 伺服器每頁最多回傳10筆，不能在第一頁就停止
+        self.server.max_limit = 10
+        self.assertEqual([x["profile_id"] for x in self.ixbrowser.iter_browsers(page_size=200)],
+                         list(range(1, 26)))
+        self.assertEqual(self.server.requests["browser-list"], 3)
+        self.assertEqual([x["id"] for x in self.ixbrowser.iter_groups(page_size=1)], [1, 2])
+
+    def test_open_close(self):
+        info = self.ixbrowser.api_browser_open(1)
+        self.assertTrue(info["result"])
+        self.assertIn(1, self.server.opened)
+        self.assertTrue(self.ixbrowser.api_browser_close(1)["result"])
+        self.assertNotIn(1, self.server.opened)
+
+    def test_create_update_delete(self):
+        info = self.ixbrowser.api_browser_create(name="created")
+        self.assertTrue(info["result"])
+        profile_id = info["data"]
+        self.assertEqual(self.server.profiles[profile_id]["name"], "created")
+
+        self.assertTrue(self.ixbrowser.api_browser_update(profile_id, diff=True, name="updated")["result"])
+        self.assertEqual(self.server.profiles[profile_id]["name"], "updated")
+
+        self.assertTrue(self.ixbrowser.api_browser_delete(profile_id)["result"])
+        self.assertNotIn(profile_id, self.server.profiles)
+
+    def test_error(self):
+        self.server.error_rate = {"browser-open": 1.0}
+        info = self.ixbrowser.api_browser_open(1)
+        self.assertFalse(info["result"])
+        self.assertEqual(info["error"]["code"], MockIxBrowserServer.ERROR_CODE)
+
+    def test_open_many(self):
+        results = dict(self.ixbrowser.open_many(range(1, 11), max_workers=4))
+        self.assertEqual(set(results), set(range(1, 11)))
+        self.assertTrue(all(res["result"] for res in results.values()))
+        self.assertEqual(len(self.server.opened), 10)
+
+    def test_open_many_partial_failure(self):
+        # 999不存在，0在送出前就拋出例外，其他Profile照常開啟
+        results = dict(self.ixbrowser.open_many([1, 999, 2, 0, 3], max_workers=2))
+        self.assertEqual(set(results), {0, 1, 2, 3, 999})
+        self.assertEqual(results[999]["error"]["code"], 1008)
+        self.assertEqual(results[0]["error"]["code"], -1)
+        self.assertTrue(all(results[pid]["result"] for pid in (1, 2, 3)))
+        self.assertEqual(sorted(self.server.opened), [1, 2, 3])
+
+    def test_close_many(self):
+        dict(self.ixbrowser.open_many(range(1, 6)))
+        self.server.fail_next("browser-close-all", 1)
+        results = dict(self.ixbrowser.close_many(range(1, 6), max_workers=2))
+        self.assertEqual(set(results), set(range(1, 6)))
+        failed = [pid for pid, res in results.items() if not res["result"]]
+        self.assertEqual(len(failed), 1)
+        # 只有失敗的Profile保留開啟紀錄
+        self.assertEqual(list(self.ixbrowser.get_open_browsers()), failed)
+        self.assertEqual(list(self.server.opened), failed)
+
+        results = dict(self.ixbrowser.close_many(failed))
+        self.assertTrue(results[failed[0]]["result"])
+        self.assertEqual(self.ixbrowser.get_open_browsers(), {})
+
+    def test_metrics(self):
+        metrics = Metrics()
+        ixbrowser = IxBrowser(api_port=self.server.port, discovery=ApiOnlyDiscovery(), metrics=metrics)
+        self.server.error_rate = {"browser-open": 1.0}
+        ixbrowser.api_browser_open(1)
+        ixbrowser.api_browser_list()
+        text = metrics.render()
+        node = f"127.0.0.1:{self.server.port}"
+        self.assertIn(f'ixbrowser_requests_total{{node="{node}",endpoint="browser-open",code="9999"}} 1', text)
+        self.assertIn(f'ixbrowser_request_duration_seconds_count{{node="{node}",endpoint="browser-list"}} 1', text)
+        self.assertIn(f'ixbrowser_open_browsers{{node="{node}"}} 0', text)
+        with self.assertRaises(ValueError):
+            metrics.add_gauge("open_browsers", lambda: 0, node=node)
+
+    def test_batching(self):
+        ixbrowser = IxBrowser(api_port=self.server.port, discovery=ApiOnlyDiscovery(), batch_window=0.05)
+        for pid in range(1, 21):
+            ixbrowser.api_browser_open(pid)
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            results = list(executor.map(ixbrowser.api_browser_close, range(1, 21)))
+        self.assertTrue(all(res["result"] for res in results))
+        self.assertLess(self.server.requests["browser-close-all"], 20)
+        self.assertEqual(ixbrowser.current_browser_list, {})
+        self.assertEqual(self.server.opened, {})
+
+        # 合併的請求失敗時逐一送出，只有不存在的Profile失敗
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(ixbrowser.api_browser_cache_clear, [1, 2, 999, 3]))
+        self.assertEqual([res["result"] for res in results], [True, True, False, True])
+
+    def test_batching_returns_copies(self):
+        ixbrowser = IxBrowser(api_port=self.server.port, discovery=ApiOnlyDiscovery(), batch_window=0.1)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(ixbrowser.api_browser_cache_clear, [1, 2, 3, 4]))
+        self.assertEqual(self.server.requests["browser-cache-clear"], 1)
+        results[0]["result"] = False
+        self.assertTrue(all(res["result"] for res in results[1:]))
+        self.assertEqual(len({id(res) for res in results}), 4)
+
+    def test_single_flight_open(self):
+        self.server.latency = {"browser-open": 0.2}
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: self.ixbrowser.api_browser_open(1), range(8)))
+        self.assertTrue(all(res["result"] for res in results))
+        self.assertEqual(self.server.requests["browser-open"], 1)
+        self.assertEqual(list(self.ixbrowser.get_open_browsers()), [1])
+        # 每個呼叫者取得各自的副本，修改不會影響其他呼叫者與開啟紀錄
+        self.assertEqual(len({id(res) for res in results}), 8)
+        self.assertEqual(len({id(res["data"]) for res in results}), 8)
+        address = results[1]["data"]["debugging_address"]
+        results[0]["data"]["debugging_address"] = "changed"
+        self.assertEqual(results[1]["data"]["debugging_address"], address)
+        self.assertEqual(self.ixbrowser.current_browser_list[1]["debugging_address"], address)
+
+
+if __name__ == '__main__':
+    unittest.main()
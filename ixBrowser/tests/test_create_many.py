@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from ixBrowser.client import IxBrowser
+from ixBrowser.discovery import ApiOnlyDiscovery
+from ixBrowser.testing import MockIxBrowserServer
+from ixBrowser.utils.checkpoint import Checkpoint
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 在子程序中執行create_many，用來模擬程序被強制結束
+WORKER = """
+import sys
+from ixBrowser.client import IxBrowser
+from ixBrowser.discovery import ApiOnlyDiscovery
+ixbrowser = IxBrowser(api_port=int(sys.argv[1]), discovery=ApiOnlyDiscovery())
+for _ in ixbrowser.create_many(sys.argv[2], concurrency=1, checkpoint_path=sys.argv[3], rate_limit=20,
+                               key_field="name"):
+    pass
+"""
+
+
+class TestCreateMany(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.checkpoint_path = os.path.join(self.tmp.name, "checkpoint.jsonl")
+        self.server = MockIxBrowserServer(profiles=0).start()
+        self.ixbrowser = IxBrowser(api_port=self.server.port, discovery=ApiOnlyDiscovery())
+        self.specs = [{"name": f"p-{i}"} for i in range(20)]
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def names(self):
+        return sorted(p["name"] for p in self.server.profiles.values())
+
+    def test_resume_after_stop(self):
+        results = self.ixbrowser.create_many(iter(self.specs), concurrency=2, checkpoint_path=self.checkpoint_path)
+        for count, (key, res) in enumerate(results, 1):
+            self.assertTrue(res["result"])
+            if count == 5:
+                break
+        results.close()
+        done = Checkpoint(self.checkpoint_path).load()
+        # 停止時已送出的請求仍會完成並記錄
+        self.assertGreaterEqual(len(done), 5)
+        self.assertEqual(len(done), len(self.server.profiles))
+
+        # 模擬寫到一半被中斷的最後一行
+        with open(self.checkpoint_path, "a", encoding="utf8") as f:
+            f.write('{"key": 19, "prof')
+
+        resumed = dict(self.ixbrowser.create_many(iter(self.specs), concurrency=2,
+                                                  checkpoint_path=self.checkpoint_path))
+        self.assertEqual(set(resumed), set(range(20)) - set(done))
+        self.assertEqual(self.server.requests["browser-create"], 20)
+        self.assertEqual(self.names(), sorted(s["name"] for s in self.specs))
+        # 不完整的行被截掉，接在後面的紀錄沒有遺失
+        self.assertEqual(set(Checkpoint(self.checkpoint_path).load()), set(range(20)))
+
+        again = dict(self.ixbrowser.create_many(iter(self.specs), concurrency=2,
+                                                checkpoint_path=self.checkpoint_path))
+        self.assertEqual(again, {})
+        self.assertEqual(self.server.requests["browser-create"], 20)
+
+    def test_resume_after_kill(self):
+        specs_path = os.path.join(self.tmp.name, "specs.jsonl")
+        with open(specs_path, "w", encoding="utf8") as f:
+            f.writelines(json.dumps(spec) + "\n" for spec in self.specs)
+
+        process = subprocess.Popen([sys.executable, "-c", WORKER, str(self.server.port), specs_path,
+                                    self.checkpoint_path], cwd=ROOT)
+        try:
+            deadline = time.monotonic() + 30
+            while len(Checkpoint(self.checkpoint_path).load()) < 3 and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            process.kill()
+            process.wait()
+        done = Checkpoint(self.checkpoint_path).load()
+        self.assertGreaterEqual(len(done), 3)
+        self.assertLess(len(done), 20)
+        created_before = self.server.requests["browser-create"]
+
+        resumed = dict(self.ixbrowser.create_many(specs_path, concurrency=4, checkpoint_path=self.checkpoint_path,
+                                                  key_field="name"))
+        # 已記錄的項目不會再次建立
+        self.assertFalse(set(resumed) & set(done))
+        self.assertEqual(self.server.requests["browser-create"] - created_before, 20 - len(done))
+        self.assertEqual(set(Checkpoint(self.checkpoint_path).load()), {s["name"] for s in self.specs})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from ixBrowser.discovery import default_discovery
+
+
+class TestDefaultDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.home = os.path.join(self.tmp.name, "home")
+        # 上次快取的安裝位置，執行檔仍存在
+        self.cached_dir = self.install(os.path.join(self.tmp.name, "cached"))
+        os.makedirs(os.path.join(self.home, ".ixbrowser"))
+        with open(os.path.join(self.home, ".ixbrowser", "discovery.json"), "w", encoding="utf8") as f:
+            json.dump({"name": "ixBrowser", "version": "1.0.0", "install_path": self.cached_dir}, f)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def install(self, path: str) -> str:
+        os.makedirs(path)
+        open(os.path.join(path, "ixBrowser.exe"), "w").close()
+        return os.path.join(path, "")
+
+    def test_env_before_cache(self):
+        env_dir = self.install(os.path.join(self.tmp.name, "env"))
+        with mock.patch.dict(os.environ, {"HOME": self.home, "IXBROWSER_HOME": env_dir,
+                                          "IXBROWSER_VERSION": "2.0.0"}):
+            info = default_discovery().discover()
+        self.assertEqual(info["install_path"], env_dir)
+        self.assertEqual(info["version"], "2.0.0")
+
+    def test_cache_without_env(self):
+        with mock.patch.dict(os.environ, {"HOME": self.home}):
+            os.environ.pop("IXBROWSER_HOME", None)
+            info = default_discovery().discover()
+        self.assertEqual(info["install_path"], self.cached_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
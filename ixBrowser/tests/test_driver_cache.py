@@ -0,0 +1,114 @@
+import socket
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from ixBrowser.client import IxBrowser
+from ixBrowser.discovery import ApiOnlyDiscovery
+from ixBrowser.testing import MockIxBrowserServer
+
+
+class StubService:
+
+    def __init__(self, executable_path: str = None):
+        self.executable_path = executable_path
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+
+class StubChrome:
+    """
+    取代selenium的webdriver.Chrome，不啟動chromedriver
+    """
+    created = []
+    lock = threading.Lock()
+
+    def __init__(self, service=None, options=None):
+        self.service = service
+        self.options = options
+        self.alive = True
+        with self.lock:
+            self.created.append(self)
+
+    @property
+    def current_window_handle(self):
+        if not self.alive:
+            raise RuntimeError("invalid session id")
+        return "CDwindow-1"
+
+
+class TestDriverCache(unittest.TestCase):
+
+    def setUp(self):
+        StubChrome.created = []
+        self.server = MockIxBrowserServer(profiles=5).start()
+        # 模擬瀏覽器的DevTools Port
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        address = "127.0.0.1:%d" % self.sock.getsockname()[1]
+        self.server.debugging_address = lambda profile_id: address
+        self.ixbrowser = IxBrowser(api_port=self.server.port, discovery=ApiOnlyDiscovery())
+        patches = [mock.patch("selenium.webdriver.Chrome", StubChrome),
+                   mock.patch("selenium.webdriver.chrome.service.Service", StubService)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.sock.close()
+        self.server.stop()
+
+    def test_reuse(self):
+        driver = self.ixbrowser.get_selenium_driver(1)
+        self.assertIs(self.ixbrowser.get_selenium_driver(1), driver)
+        self.assertEqual(len(StubChrome.created), 1)
+        self.assertEqual(self.server.requests["browser-open"], 1)
+        self.assertEqual(driver.service.executable_path, "/opt/ixBrowser/chromedriver")
+
+    def test_no_reuse(self):
+        first = self.ixbrowser.get_selenium_driver(1, reuse=False)
+        second = self.ixbrowser.get_selenium_driver(1, reuse=False)
+        self.assertIsNot(first, second)
+        self.assertEqual(self.ixbrowser.driver_cache, {})
+        self.assertEqual(self.server.requests["browser-open"], 1)
+
+    def test_concurrent_single_driver(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            drivers = list(executor.map(lambda _: self.ixbrowser.get_selenium_driver(1), range(8)))
+        self.assertEqual(len({id(driver) for driver in drivers}), 1)
+        self.assertEqual(len(StubChrome.created), 1)
+
+    def test_rebuild_after_dead_session(self):
+        driver = self.ixbrowser.get_selenium_driver(1)
+        driver.alive = False
+        rebuilt = self.ixbrowser.get_selenium_driver(1)
+        self.assertIsNot(rebuilt, driver)
+        self.assertTrue(driver.service.stopped)
+        # 瀏覽器仍在執行，只重新連接chromedriver
+        self.assertEqual(self.server.requests["browser-open"], 1)
+        self.assertIn(1, self.ixbrowser.get_open_browsers())
+
+    def test_dead_port_reopens(self):
+        driver = self.ixbrowser.get_selenium_driver(1)
+        driver.alive = False
+        # 瀏覽器當機，Port不再監聽
+        self.sock.close()
+        self.server.opened.pop(1, None)
+        reopened = self.ixbrowser.get_selenium_driver(1)
+        self.assertIsNot(reopened, driver)
+        self.assertTrue(driver.service.stopped)
+        self.assertEqual(self.server.requests["browser-open"], 2)
+
+    def test_close_stops_service(self):
+        driver = self.ixbrowser.get_selenium_driver(1)
+        self.assertTrue(self.ixbrowser.api_browser_close(1)["result"])
+        self.assertTrue(driver.service.stopped)
+        self.assertNotIn(1, self.ixbrowser.driver_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
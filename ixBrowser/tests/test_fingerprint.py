@@ -0,0 +1,38 @@
+import unittest
+
+from ixBrowser.fingerprint import FingerprintGenerator, fingerprint_key, PLATFORMS
+
+
+class TestFingerprintGenerator(unittest.TestCase):
+
+    def test_generate_unique(self):
+        generator = FingerprintGenerator(seed=1)
+        configs = generator.generate(5000)
+        self.assertEqual(len(configs), 5000)
+        self.assertEqual(len({fingerprint_key(c) for c in configs}), 5000)
+
+        # 同一個產生器不會再產生已產生過的指紋
+        more = generator.generate(1000)
+        self.assertFalse({fingerprint_key(c) for c in configs} & {fingerprint_key(c) for c in more})
+
+    def test_consistent(self):
+        platforms = {p["platform"]: p for p in PLATFORMS}
+        for config in FingerprintGenerator(seed=2).generate(1000):
+            platform = platforms[config["platform"]]
+            self.assertIn(config["ua_info"].split("(")[1].split(")")[0], [x for x, _ in platform["ua_os"]])
+            self.assertIn(config["webgl_info"], [x[1] for x, _ in platform["webgl"]])
+            self.assertIn(config["resolving_power"], [x for x, _ in platform["resolutions"]])
+            self.assertIn("Chrome/{}.0.0.0".format(config["br_version"]), config["ua_info"])
+
+    def test_seed(self):
+        self.assertEqual(FingerprintGenerator(seed=3).generate(10), FingerprintGenerator(seed=3).generate(10))
+
+    def test_create_specs(self):
+        specs = list(FingerprintGenerator(seed=4).create_specs(25, batch_size=10, group_id=3))
+        self.assertEqual(len(specs), 25)
+        self.assertEqual(specs[0]["group_id"], 3)
+        self.assertIn("ua_info", specs[0]["config"]["config"])
+
+
+if __name__ == '__main__':
+    unittest.main()
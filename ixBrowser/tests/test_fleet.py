@@ -0,0 +1,81 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from ixBrowser.fleet import IxBrowserFleet, FLEET_UNAVAILABLE_CODE
+from ixBrowser.metrics import Metrics
+from ixBrowser.testing import MockIxBrowserServer
+from ixBrowser.utils.probe import tcp_probe
+
+
+class TestIxBrowserFleet(unittest.TestCase):
+
+    def setUp(self):
+        self.servers = [MockIxBrowserServer(profiles=20).start() for _ in range(2)]
+        self.fleet = IxBrowserFleet([f"127.0.0.1:{s.port}" for s in self.servers], capacity=3)
+
+    def tearDown(self):
+        for server in self.servers:
+            server.stop()
+
+    def test_least_loaded(self):
+        for pid in range(1, 7):
+            self.assertTrue(self.fleet.api_browser_open(pid)["result"])
+        self.assertEqual([len(s.opened) for s in self.servers], [3, 3])
+        self.assertEqual(self.fleet.api_browser_open(7)["error"]["code"], FLEET_UNAVAILABLE_CODE)
+
+        # 關閉與清除快取送到開啟的節點
+        self.assertTrue(self.fleet.api_browser_close([1, 2, 3, 4])["result"])
+        self.assertEqual([len(s.opened) for s in self.servers], [1, 1])
+        self.assertEqual(sum(s.requests.get("browser-close-all", 0) for s in self.servers), 2)
+        self.assertIsNone(self.fleet.node_for(1))
+        self.assertTrue(self.fleet.api_browser_cache_clear([5, 6])["result"])
+
+    def test_node_down(self):
+        self.servers[0].stop()
+        while tcp_probe(self.fleet.nodes[0].client.ixbrowser_api_host, 0.1):
+            pass
+        res = self.fleet.api_browser_open(1)
+        self.assertTrue(res["result"])
+        self.assertEqual(res["node"], self.fleet.nodes[1].name)
+        self.assertFalse(self.fleet.nodes[0].is_up())
+        self.assertEqual([n["up"] for n in self.fleet.check_nodes()], [False, True])
+
+    def test_concurrent_open_same_profile(self):
+        for server in self.servers:
+            server.latency = {"browser-open": 0.2}
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: self.fleet.api_browser_open(1), range(8)))
+        self.assertTrue(all(res["result"] for res in results))
+        self.assertEqual(len({res["node"] for res in results}), 1)
+        self.assertEqual(sum(s.requests.get("browser-open", 0) for s in self.servers), 1)
+        # 每個呼叫者取得各自的字典
+        self.assertEqual(len({id(res) for res in results}), 8)
+
+    def test_forget_drops_route(self):
+        res = self.fleet.api_browser_open(1)
+        node = self.fleet.node_for(1)
+        self.assertEqual(node.name, res["node"])
+        # 例如BrowserMonitor發現瀏覽器已不存在
+        self.assertTrue(node.client.forget_browser(1))
+        self.assertIsNone(self.fleet.node_for(1))
+        self.fleet.api_browser_open(2)
+        node = self.fleet.node_for(2)
+        node.client.api_browser_close(2)
+        self.assertIsNone(self.fleet.node_for(2))
+
+    def test_shared_metrics(self):
+        metrics = Metrics()
+        fleet = IxBrowserFleet([f"127.0.0.1:{s.port}" for s in self.servers], capacity=3, metrics=metrics)
+        fleet.api_browser_open(1)
+        fleet.api_browser_open(2)
+        text = metrics.render()
+        for server in self.servers:
+            node = f"127.0.0.1:{server.port}"
+            self.assertIn(f'ixbrowser_open_browsers{{node="{node}"}} 1', text)
+            self.assertIn(f'ixbrowser_request_duration_seconds_count{{node="{node}",endpoint="browser-open"}} 1',
+                          text)
+        self.assertEqual(text.count("# TYPE ixbrowser_open_browsers gauge"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import time
+import unittest
+
+from ixBrowser.client import IxBrowser
+from ixBrowser.discovery import ApiOnlyDiscovery
+from ixBrowser.testing import MockIxBrowserServer
+from ixBrowser.utils.ttl_cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_expire(self):
+        cache = TTLCache(ttl=0.05)
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("a"))
+        self.assertNotIn("a", cache)
+        self.assertEqual(len(cache), 0)
+
+    def test_lru(self):
+        cache = TTLCache(maxsize=2, ttl=None)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        # a最近被使用，淘汰b
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+
+    def test_invalidate(self):
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.invalidate("a")
+        self.assertEqual((cache.get("a"), cache.get("b")), (None, 2))
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+
+class TestGroupCache(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockIxBrowserServer(profiles=10, groups=3).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def new_client(self, ttl: float = 300) -> IxBrowser:
+        return IxBrowser(api_port=self.server.port, discovery=ApiOnlyDiscovery(), group_cache_ttl=ttl)
+
+    def test_cached(self):
+        ixbrowser = self.new_client()
+        for _ in range(3):
+            self.assertEqual(len(ixbrowser.api_browser_list(group="group-2")["data"]), 3)
+        self.assertEqual(self.server.requests["group-list"], 1)
+        # 組ID不需要查詢
+        ixbrowser.api_browser_list(group=2)
+        self.assertEqual(self.server.requests["group-list"], 1)
+
+    def test_ttl_expire(self):
+        ixbrowser = self.new_client(ttl=0.05)
+        ixbrowser.resolve_group_id("group-1")
+        time.sleep(0.1)
+        ixbrowser.resolve_group_id("group-1")
+        self.assertEqual(self.server.requests["group-list"], 2)
+
+    def test_lru_eviction(self):
+        ixbrowser = self.new_client()
+        ixbrowser.group_cache.maxsize = 2
+        for title in ("group-1", "group-2", "group-3", "group-1"):
+            ixbrowser.resolve_group_id(title)
+        self.assertEqual(self.server.requests["group-list"], 4)
+
+    def test_invalidate_after_create_delete(self):
+        ixbrowser = self.new_client()
+        # 組還不存在時查詢結果為0(不篩選)，同樣會被快取
+        self.assertEqual(ixbrowser.resolve_group_id("new"), 0)
+        self.server.groups.append({"id": 9, "title": "new"})
+        self.assertEqual(ixbrowser.resolve_group_id("new"), 0)
+        ixbrowser.invalidate_group_cache("new")
+        self.assertEqual(ixbrowser.resolve_group_id("new"), 9)
+
+        self.assertEqual(ixbrowser.resolve_group_id("group-2"), 2)
+        self.server.groups = [g for g in self.server.groups if g["id"] != 2]
+        self.assertEqual(ixbrowser.resolve_group_id("group-2"), 2)
+        ixbrowser.invalidate_group_cache()
+        self.assertEqual(ixbrowser.resolve_group_id("group-2"), 0)
+        self.assertEqual(ixbrowser.resolve_group_id("new"), 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from ixBrowser.client import IxBrowser
+from ixBrowser.discovery import ApiOnlyDiscovery
+from ixBrowser.testing import MockIxBrowserServer
+
+
+class CountingDiscovery(ApiOnlyDiscovery):
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def discover(self):
+        with self.lock:
+            self.calls += 1
+        return super().discover()
+
+
+class TestLazyInit(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockIxBrowserServer(profiles=5).start()
+        self.discovery = CountingDiscovery()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_no_work_before_first_call(self):
+        ixbrowser = IxBrowser(api_port=self.server.port, discovery=self.discovery, lazy=True)
+        self.assertEqual(self.discovery.calls, 0)
+        self.assertEqual(self.server.requests, {})
+        self.assertEqual(ixbrowser.ixbrowser_install_dir, "")
+
+        self.assertTrue(ixbrowser.api_browser_list(limit=1)["result"])
+        self.assertEqual(self.discovery.calls, 1)
+        self.assertTrue(ixbrowser.ixbrowser_api_only)
+        ixbrowser.api_browser_list(limit=1)
+        self.assertEqual(self.discovery.calls, 1)
+
+    def test_concurrent_first_calls(self):
+        ixbrowser = IxBrowser(api_port=self.server.port, discovery=self.discovery, lazy=True)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda pid: ixbrowser.api_browser_open(pid), range(1, 6)))
+        self.assertTrue(all(res["result"] for res in results))
+        self.assertEqual(self.discovery.calls, 1)
+
+    def test_eager(self):
+        IxBrowser(api_port=self.server.port, discovery=self.discovery)
+        self.assertEqual(self.discovery.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from ixBrowser.client import IxBrowser
+from ixBrowser.discovery import ApiOnlyDiscovery
+from ixBrowser.lease import LeaseRegistry, LEASE_CONFLICT_CODE
+from ixBrowser.testing import MockIxBrowserServer
+
+
+class TestLeaseRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "leases.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_acquire_release(self):
+        with LeaseRegistry(self.path) as a, LeaseRegistry(self.path) as b:
+            self.assertTrue(a.acquire(1))
+            self.assertTrue(a.acquire(1))
+            self.assertFalse(b.acquire(1))
+            self.assertEqual(b.holder(1), a.owner)
+            a.release(1)
+            self.assertTrue(b.acquire(1))
+            self.assertEqual(b.held(), [1])
+
+    def test_expire(self):
+        crashed = LeaseRegistry(self.path, ttl=0.2, heartbeat_interval=60)
+        self.assertTrue(crashed.acquire(1))
+        crashed.close(release=False)
+        with LeaseRegistry(self.path) as b:
+            self.assertFalse(b.acquire(1))
+            time.sleep(0.3)
+            self.assertTrue(b.acquire(1))
+
+    def test_client(self):
+        with MockIxBrowserServer(profiles=3) as server, \
+                LeaseRegistry(self.path) as a, LeaseRegistry(self.path) as b:
+            ix_a = IxBrowser(api_port=server.port, discovery=ApiOnlyDiscovery(), lease_registry=a)
+            ix_b = IxBrowser(api_port=server.port, discovery=ApiOnlyDiscovery(), lease_registry=b)
+            self.assertTrue(ix_a.api_browser_open(1)["result"])
+            self.assertEqual(ix_b.api_browser_open(1)["error"]["code"], LEASE_CONFLICT_CODE)
+            self.assertTrue(ix_a.api_browser_close(1)["result"])
+            self.assertTrue(ix_b.api_browser_open(1)["result"])
+
+    def test_close_held_by_other(self):
+        with MockIxBrowserServer(profiles=3) as server, \
+                LeaseRegistry(self.path) as a, LeaseRegistry(self.path) as b:
+            ix_a = IxBrowser(api_port=server.port, discovery=ApiOnlyDiscovery(), lease_registry=a)
+            ix_b = IxBrowser(api_port=server.port, discovery=ApiOnlyDiscovery(), lease_registry=b)
+            self.assertTrue(ix_a.api_browser_open(1)["result"])
+            self.assertTrue(ix_b.api_browser_open(2)["result"])
+            for profile_id in (1, [1, 2]):
+                res = ix_b.api_browser_close(profile_id)
+                self.assertFalse(res["result"])
+                self.assertEqual(res["error"]["code"], LEASE_CONFLICT_CODE)
+            # 沒有送出關閉請求，兩個瀏覽器都還開著
+            self.assertNotIn("browser-close-all", server.requests)
+            self.assertEqual(sorted(server.opened), [1, 2])
+            self.assertEqual(a.holder(1), a.owner)
+            # 自己持有或沒有人持有的Profile可以關閉
+            self.assertTrue(ix_b.api_browser_close(2)["result"])
+            self.assertTrue(ix_b.api_browser_close(3)["result"])
+            self.assertTrue(ix_a.api_browser_close(1)["result"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import io
+import json
+import unittest
+
+from ixBrowser.utils import use_logger
+from ixBrowser.utils.use_logger import WrapperRichLogger
+
+
+class TestJsonLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.config = dict(use_logger._config)
+        # configure會把既有writer的輸出目標換成StringIO，結束後需要換回去
+        self.writer_stream = use_logger._writer.stream if use_logger._writer is not None else None
+        self.stream = io.StringIO()
+        use_logger.configure(mode="json", level="INFO", stream=self.stream)
+
+    def tearDown(self):
+        use_logger._config.update(self.config)
+        with use_logger._writer_lock:
+            writer = use_logger._writer
+        if writer is not None:
+            writer.flush()
+            writer.stream = self.writer_stream
+
+    def records(self, logger: WrapperRichLogger) -> list:
+        logger.flush()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_json_lines(self):
+        logger = WrapperRichLogger()
+        logger.log("開啟 %s", 1)
+        logger.bullet("資訊", ["a", "b"])
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("失敗")
+        records = self.records(logger)
+        self.assertEqual([r["msg"] for r in records], ["開啟 1", "資訊", "失敗"])
+        self.assertEqual(records[1]["data"], ["a", "b"])
+        self.assertEqual(records[2]["level"], "ERROR")
+        self.assertIn("ValueError: boom", records[2]["exc"])
+
+    def test_level(self):
+        use_logger.configure(level="ERROR")
+        logger = WrapperRichLogger()
+        logger.log("略過")
+        logger.error("錯誤")
+        self.assertEqual([r["msg"] for r in self.records(logger)], ["錯誤"])
+
+    def test_configure_switches_stream(self):
+        # 已建立的writer在configure後改寫到新的stream
+        logger = WrapperRichLogger()
+        logger.log("第一個")
+        logger.flush()
+        other = io.StringIO()
+        use_logger.configure(stream=other)
+        logger.log("第二個")
+        logger.flush()
+        self.assertEqual([json.loads(line)["msg"] for line in self.stream.getvalue().splitlines()], ["第一個"])
+        self.assertEqual([json.loads(line)["msg"] for line in other.getvalue().splitlines()], ["第二個"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import socket
+import unittest
+
+from ixBrowser.client import IxBrowser
+from ixBrowser.discovery import ApiOnlyDiscovery
+from ixBrowser.metrics import Metrics
+from ixBrowser.monitor import BrowserMonitor
+from ixBrowser.testing import MockIxBrowserServer
+
+
+class TestBrowserMonitor(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockIxBrowserServer(profiles=5).start()
+        self.ixbrowser = IxBrowser(api_port=self.server.port, discovery=ApiOnlyDiscovery())
+        # 模擬仍在執行的瀏覽器
+        self.sockets = []
+        for pid in (1, 2, 3):
+            self.ixbrowser.api_browser_open(pid)
+            sock = socket.socket()
+            sock.bind(("127.0.0.1", 0))
+            sock.listen()
+            self.sockets.append(sock)
+            self.ixbrowser.current_browser_list[pid]["debugging_address"] = "127.0.0.1:%d" % sock.getsockname()[1]
+            self.ixbrowser.current_browser_list[pid]["webdriver"] = ""
+
+    def tearDown(self):
+        for sock in self.sockets:
+            sock.close()
+        self.server.stop()
+
+    def crash(self, index: int, pid: int):
+        self.sockets[index].close()
+        self.server.opened.pop(pid, None)
+
+    def test_drop_dead(self):
+        events = []
+        monitor = BrowserMonitor(self.ixbrowser, failure_threshold=2, autostart=False)
+        monitor.add_listener(events.append)
+        self.assertEqual(monitor.check(), [])
+
+        self.crash(1, 2)
+        self.assertEqual(monitor.check(), [])
+        self.assertEqual([e["type"] for e in monitor.check()], ["dead"])
+        self.assertEqual(events[0]["profile_id"], 2)
+        self.assertEqual(sorted(self.ixbrowser.get_open_browsers()), [1, 3])
+
+    def test_reopen(self):
+        monitor = BrowserMonitor(self.ixbrowser, failure_threshold=1, reopen=True, autostart=False)
+        self.crash(0, 1)
+        self.assertEqual([e["type"] for e in monitor.check()], ["dead", "reopened"])
+        self.assertIn(1, self.ixbrowser.get_open_browsers())
+
+    def test_reopen_with_open_kwargs(self):
+        sent = []
+        metrics = Metrics()
+        metrics.add_pre_hook(lambda endpoint, params: sent.append((endpoint, params)))
+        ixbrowser = IxBrowser(api_port=self.server.port, discovery=ApiOnlyDiscovery(), metrics=metrics)
+        ixbrowser.api_browser_open(4, browser_open_random=True, proxy_ip="10.0.0.1", proxy_port="1080",
+                                  headless=True)
+        ixbrowser.current_browser_list[4]["debugging_address"] = "127.0.0.1:1"
+        self.server.opened.pop(4, None)
+        self.assertEqual(ixbrowser.get_open_kwargs(4)["proxy_ip"], "10.0.0.1")
+
+        monitor = BrowserMonitor(ixbrowser, failure_threshold=1, reopen=True, autostart=False)
+        self.assertEqual([e["type"] for e in monitor.check()], ["dead", "reopened"])
+        first, reopened = [params for endpoint, params in sent if endpoint == "browser-open-random"]
+        self.assertEqual(reopened, first)
+        self.assertEqual(reopened["proxy_ip"], "10.0.0.1")
+        self.assertIn("--headless", reopened["args"])
+
+        ixbrowser.api_browser_close(4)
+        self.assertEqual(ixbrowser.get_open_kwargs(4), {})
+
+    def test_max_probes(self):
+        monitor = BrowserMonitor(self.ixbrowser, failure_threshold=1, max_probes=1, autostart=False)
+        self.crash(2, 3)
+        events = monitor.check() + monitor.check() + monitor.check()
+        self.assertEqual([e["profile_id"] for e in events], [3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import threading
+import time
+import unittest
+
+from ixBrowser.pool import BrowserPool
+from ixBrowser.utils.use_logger import WrapperRichLogger
+
+
+class StubDriver:
+
+    def __init__(self, profile_id: int):
+        self.profile_id = profile_id
+        self.alive = True
+        self.quit_called = False
+
+    @property
+    def current_window_handle(self):
+        if not self.alive:
+            raise RuntimeError("invalid session id")
+        return "CDwindow-1"
+
+    def quit(self):
+        self.quit_called = True
+
+
+class StubClient:
+    """
+    只實作BrowserPool用到的方法
+    """
+
+    def __init__(self):
+        self.logger = WrapperRichLogger()
+        self.lock = threading.Lock()
+        self.drivers = []
+        self.closed = []
+        self.cache_cleared = []
+        self.open_kwargs = []
+
+    def get_selenium_driver(self, profile_id: int, **kwargs):
+        with self.lock:
+            driver = StubDriver(profile_id)
+            self.drivers.append(driver)
+            self.open_kwargs.append(kwargs)
+            return driver
+
+    def api_browser_close(self, profile_id: int):
+        self.closed.append(profile_id)
+        return {"result": True, "data": {}}
+
+    def api_browser_cache_clear(self, profile_id: int):
+        self.cache_cleared.append(profile_id)
+        return {"result": True, "data": {}}
+
+    def api_browser_random_info(self, profile_id: int):
+        return {"result": True, "data": {}}
+
+
+class TestBrowserPool(unittest.TestCase):
+
+    def setUp(self):
+        self.client = StubClient()
+
+    def test_lease_and_return(self):
+        with BrowserPool(self.client, profile_ids=[1, 2], headless=True) as pool:
+            with pool.lease() as driver:
+                self.assertEqual(pool.stats(), {"idle": 0, "leased": 1, "cold": 1})
+            self.assertEqual(pool.stats(), {"idle": 1, "leased": 0, "cold": 1})
+            with pool.lease() as again:
+                self.assertIs(again, driver)
+        self.assertEqual(len(self.client.drivers), 1)
+        self.assertEqual(self.client.open_kwargs, [{"headless": True}])
+        # 關閉時回收閒置中的瀏覽器
+        self.assertTrue(driver.quit_called)
+        self.assertEqual(self.client.closed, [driver.profile_id])
+
+    def test_max_uses(self):
+        with BrowserPool(self.client, profile_ids=[1], max_uses=2) as pool:
+            for _ in range(2):
+                with pool.lease() as first:
+                    pass
+            self.assertTrue(first.quit_called)
+            self.assertEqual(self.client.closed, [1])
+            self.assertEqual(pool.stats(), {"idle": 0, "leased": 0, "cold": 1})
+            with pool.lease() as second:
+                self.assertIsNot(second, first)
+
+    def test_recycle_on_error(self):
+        with BrowserPool(self.client, profile_ids=[1]) as pool:
+            with self.assertRaises(RuntimeError):
+                with pool.lease() as driver:
+                    raise RuntimeError("chrome not reachable")
+            self.assertTrue(driver.quit_called)
+            self.assertEqual(pool.stats(), {"idle": 0, "leased": 0, "cold": 1})
+            with pool.lease() as again:
+                self.assertIsNot(again, driver)
+
+    def test_health_check_on_acquire(self):
+        with BrowserPool(self.client, profile_ids=[1]) as pool:
+            with pool.lease() as driver:
+                pass
+            # 閒置期間瀏覽器當機
+            driver.alive = False
+            with pool.lease() as again:
+                self.assertIsNot(again, driver)
+                self.assertTrue(again.alive)
+            self.assertEqual(self.client.closed, [1])
+
+    def test_idle_eviction(self):
+        with BrowserPool(self.client, profile_ids=[1, 2], idle_timeout=0.05) as pool:
+            pool.warm_up()
+            self.assertEqual(pool.stats(), {"idle": 2, "leased": 0, "cold": 0})
+            time.sleep(0.1)
+            pool.evict_idle()
+            self.assertEqual(pool.stats(), {"idle": 0, "leased": 0, "cold": 2})
+            self.assertEqual(sorted(self.client.closed), [1, 2])
+
+    def test_warm_up_size(self):
+        with BrowserPool(self.client, profile_ids=[1, 2, 3], size=2) as pool:
+            pool.warm_up()
+            pool.warm_up()
+            self.assertEqual(pool.stats(), {"idle": 2, "leased": 0, "cold": 1})
+            self.assertEqual(len(self.client.drivers), 2)
+
+    def test_acquire_timeout(self):
+        with BrowserPool(self.client, profile_ids=[1]) as pool:
+            with pool.lease():
+                with self.assertRaises(TimeoutError):
+                    pool.acquire(timeout=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import socket
+import threading
+import time
+import unittest
+from unittest import mock
+
+from ixBrowser.client import IxBrowser
+from ixBrowser.discovery import ApiOnlyDiscovery
+from ixBrowser.readiness import ReadinessProbe
+from ixBrowser.testing import MockIxBrowserServer
+
+
+class TestReadinessProbe(unittest.TestCase):
+
+    def setUp(self):
+        self.sockets = []
+
+    def tearDown(self):
+        for sock in self.sockets:
+            sock.close()
+
+    def bind(self, listen: bool = True) -> socket.socket:
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        if listen:
+            sock.listen()
+        self.sockets.append(sock)
+        return sock
+
+    def address(self, sock: socket.socket) -> str:
+        return "http://127.0.0.1:%d/api/" % sock.getsockname()[1]
+
+    def test_port_phase(self):
+        # Port在0.3秒後才開始監聽
+        sock = self.bind(listen=False)
+        threading.Timer(0.3, sock.listen).start()
+        report = ReadinessProbe(self.address(sock), deadline=5).wait(lambda timeout: True)
+        self.assertTrue(report.ready)
+        self.assertGreater(report.attempts["port"], 1)
+        self.assertGreaterEqual(report.phases["port"], 0.25)
+        self.assertEqual(report.attempts["service"], 1)
+
+    def test_service_phase(self):
+        sock = self.bind()
+        answers = [False, False, True]
+        report = ReadinessProbe(self.address(sock), deadline=5, initial_delay=0.01).wait(
+            lambda timeout: answers.pop(0))
+        self.assertTrue(report.ready)
+        self.assertEqual(report.attempts, {"port": 1, "service": 3})
+
+    def test_backoff(self):
+        sock = self.bind()
+        answers = [False] * 5 + [True]
+        probe = ReadinessProbe(self.address(sock), deadline=60, initial_delay=0.05, max_delay=0.3, factor=2)
+        with mock.patch("ixBrowser.readiness.time.sleep") as sleep:
+            report = probe.wait(lambda timeout: answers.pop(0))
+        self.assertTrue(report.ready)
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [0.05, 0.1, 0.2, 0.3, 0.3])
+
+    def test_deadline(self):
+        sock = self.bind()
+        timeouts = []
+
+        def check(timeout):
+            timeouts.append(timeout)
+            return False
+
+        start = time.monotonic()
+        report = ReadinessProbe(self.address(sock), deadline=0.5, attempt_timeout=0.2).wait(check)
+        self.assertFalse(report.ready)
+        self.assertIn("逾時", report.error)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertTrue(all(0 < t <= 0.2 for t in timeouts))
+
+    def test_port_never_opens(self):
+        sock = self.bind(listen=False)
+        report = ReadinessProbe(self.address(sock), deadline=0.3).wait(lambda timeout: True)
+        self.assertFalse(report.ready)
+        self.assertNotIn("service", report.phases)
+
+
+class TestLaunchIxBrowser(unittest.TestCase):
+
+    def test_silent_service(self):
+        # 接受連線但永遠不回應的服務，不能讓等待超過期限
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        try:
+            ixbrowser = IxBrowser(api_port=sock.getsockname()[1], discovery=ApiOnlyDiscovery(), lazy=True)
+            ixbrowser.ixbrowser_api_only = True
+            start = time.monotonic()
+            self.assertFalse(ixbrowser.launch_ixbrowser(deadline=1))
+            self.assertLess(time.monotonic() - start, 2.0)
+            self.assertFalse(ixbrowser.readiness_report.ready)
+        finally:
+            sock.close()
+
+    def test_ready(self):
+        with MockIxBrowserServer(profiles=1) as server:
+            ixbrowser = IxBrowser(api_port=server.port, discovery=ApiOnlyDiscovery(), lazy=True)
+            ixbrowser.ixbrowser_api_only = True
+            self.assertTrue(ixbrowser.launch_ixbrowser(deadline=5))
+            self.assertEqual(server.requests["browser-list"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
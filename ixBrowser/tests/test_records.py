@@ -0,0 +1,79 @@
+import unittest
+
+from ixBrowser.client import IxBrowser
+from ixBrowser.discovery import ApiOnlyDiscovery
+from ixBrowser.records import build_records, ProfileRecord, ProfileTable
+from ixBrowser.testing import MockIxBrowserServer
+
+BROWSERS = [
+    {"profile_id": 1, "name": "a"},
+    {"profile_id": 2, "name": "b", "note": "x"},
+    {"profile_id": 3, "class": "c"},
+]
+
+
+class TestRecords(unittest.TestCase):
+
+    def test_union_of_fields(self):
+        records = build_records(BROWSERS)
+        self.assertEqual(records[0].keys(), ("profile_id", "name", "note", "class"))
+        self.assertEqual(records[1]["note"], "x")
+        self.assertIsNone(records[0].note)
+        # 不合法的屬性名稱改用其他slot名稱，仍可用key存取
+        self.assertEqual(records[2]["class"], "c")
+        self.assertEqual(records[1].to_dict(), {"profile_id": 2, "name": "b", "note": "x", "class": None})
+
+    def test_include_exclude(self):
+        records = build_records(BROWSERS, include_fields=["note", "profile_id", "missing"], exclude_fields=["missing"])
+        self.assertEqual(records[0].keys(), ("note", "profile_id"))
+        self.assertEqual([r.get("note") for r in records], [None, "x", None])
+        self.assertIsInstance(records[0], ProfileRecord)
+        self.assertEqual(build_records([]), [])
+
+    def test_table(self):
+        table = ProfileTable.from_browsers(BROWSERS, exclude_fields=["class"])
+        self.assertEqual(table.fields, ("profile_id", "name", "note"))
+        self.assertEqual(table.column("note"), [None, "x", None])
+        self.assertEqual(table.row(1).name, "b")
+        self.assertEqual(len(table), 3)
+
+        # 逐頁加入，後面的頁面出現新欄位
+        table = ProfileTable()
+        table.add_browsers(BROWSERS[:1])
+        table.add_browsers(BROWSERS[1:])
+        self.assertEqual(table.column("note"), [None, "x", None])
+        self.assertEqual([r.profile_id for r in table], [1, 2, 3])
+
+
+class TestLoadBrowsers(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockIxBrowserServer(profiles=25, groups=2).start()
+        self.ixbrowser = IxBrowser(api_port=self.server.port, discovery=ApiOnlyDiscovery())
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_records(self):
+        records = self.ixbrowser.load_browsers(include_fields=["profile_id", "name"], page_size=10)
+        self.assertEqual([r.profile_id for r in records], list(range(1, 26)))
+        self.assertEqual(records[0].keys(), ("profile_id", "name"))
+        self.assertEqual(self.server.requests["browser-list"], 3)
+
+    def test_table(self):
+        self.server.profiles[25]["extra"] = "only on the last page"
+        table = self.ixbrowser.load_browsers(group=2, page_size=4, result_type="table")
+        self.assertEqual(table.column("profile_id"), list(range(2, 26, 2)))
+        self.assertNotIn("extra", table.fields)
+
+        table = self.ixbrowser.load_browsers(page_size=10, result_type="table")
+        self.assertEqual(table.column("extra")[-1], "only on the last page")
+        self.assertEqual(table.column("extra")[:24], [None] * 24)
+
+    def test_result_type(self):
+        with self.assertRaises(ValueError):
+            self.ixbrowser.load_browsers(result_type="dict")
+
+
+if __name__ == '__main__':
+    unittest.main()
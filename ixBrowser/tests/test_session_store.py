@@ -0,0 +1,135 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from ixBrowser.client import IxBrowser
+from ixBrowser.discovery import ApiOnlyDiscovery
+from ixBrowser.session_store import SessionStore
+from ixBrowser.testing import MockIxBrowserServer
+
+
+class DevToolsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path != "/json/version":
+            self.send_error(404)
+            return
+        host, port = self.server.server_address
+        out = json.dumps({"Browser": "Chrome/116.0.0.0",
+                          "webSocketDebuggerUrl": f"ws://{host}:{port}/devtools/browser/1"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSessionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "sessions.db")
+        self.server = MockIxBrowserServer(profiles=5).start()
+        self.store = SessionStore(self.path)
+        self.sockets = []
+        self.devtools = []
+
+    def tearDown(self):
+        for sock in self.sockets:
+            sock.close()
+        for server in self.devtools:
+            server.shutdown()
+            server.server_close()
+        self.store.close()
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def new_client(self, store: SessionStore = None, lazy: bool = False) -> IxBrowser:
+        return IxBrowser(api_port=self.server.port, discovery=ApiOnlyDiscovery(), session_store=store or self.store,
+                         lazy=lazy)
+
+    def listen(self) -> str:
+        # 模擬仍在執行的瀏覽器
+        server = ThreadingHTTPServer(("127.0.0.1", 0), DevToolsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.devtools.append(server)
+        return "127.0.0.1:%d" % server.server_address[1]
+
+    def listen_raw(self) -> str:
+        # Port被其他程序使用，不是DevTools
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        self.sockets.append(sock)
+        return "127.0.0.1:%d" % sock.getsockname()[1]
+
+    def test_write_through(self):
+        ixbrowser = self.new_client()
+        ixbrowser.api_browser_open(1)
+        ixbrowser.api_browser_open(2)
+        self.assertEqual(sorted(self.store.load(ixbrowser.ixbrowser_api_host)), [1, 2])
+
+        ixbrowser.api_browser_close(1)
+        self.assertEqual(sorted(self.store.load(ixbrowser.ixbrowser_api_host)), [2])
+        ixbrowser.forget_browser(2)
+        self.assertEqual(self.store.load(ixbrowser.ixbrowser_api_host), {})
+
+    def test_restore_after_restart(self):
+        ixbrowser = self.new_client()
+        for pid in (1, 2, 3):
+            ixbrowser.api_browser_open(pid)
+        host = ixbrowser.ixbrowser_api_host
+        for pid in (1, 3):
+            data = dict(ixbrowser.current_browser_list[pid], debugging_address=self.listen(), webdriver="")
+            self.store.save(host, pid, data)
+
+        # 重新啟動，Profile 2 的Port沒有在監聽
+        store = SessionStore(self.path)
+        try:
+            restarted = self.new_client(store)
+            self.assertEqual(sorted(restarted.get_open_browsers()), [1, 3])
+            self.assertEqual(sorted(store.load(host)), [1, 3])
+            self.assertEqual(restarted.restore_sessions(), {"restored": [1, 3], "dropped": []})
+        finally:
+            store.close()
+
+    def test_port_reused_by_other_process(self):
+        host = "http://127.0.0.1:%d/api/" % self.server.port
+        self.store.save(host, 1, {"debugging_address": self.listen(), "webdriver": ""})
+        self.store.save(host, 2, {"debugging_address": self.listen_raw(), "webdriver": ""})
+        ixbrowser = self.new_client()
+        self.assertEqual(sorted(ixbrowser.get_open_browsers()), [1])
+        self.assertEqual(sorted(self.store.load(host)), [1])
+
+    def test_lazy_restore(self):
+        host = "http://127.0.0.1:%d/api/" % self.server.port
+        self.store.save(host, 1, {"debugging_address": self.listen(), "webdriver": ""})
+        self.store.save(host, 2, {"debugging_address": "127.0.0.1:1", "webdriver": ""})
+
+        ixbrowser = self.new_client(lazy=True)
+        # 建立時不做任何I/O，store保持原樣
+        self.assertEqual(ixbrowser.current_browser_list, {})
+        self.assertEqual(sorted(self.store.load(host)), [1, 2])
+
+        # 第一次開啟前完成初始化並重新連接Profile 1
+        self.assertTrue(ixbrowser.api_browser_open(3)["result"])
+        self.assertEqual(sorted(ixbrowser.get_open_browsers()), [1, 3])
+        self.assertEqual(sorted(self.store.load(host)), [1, 3])
+        self.assertEqual(ixbrowser.ixbrowser_api_host, host)
+
+    def test_separate_api_hosts(self):
+        self.store.save("http://127.0.0.1:1/api/", 1, {"debugging_address": self.listen(), "webdriver": ""})
+        ixbrowser = self.new_client()
+        self.assertEqual(ixbrowser.get_open_browsers(), {})
+        self.assertEqual(list(self.store.load("http://127.0.0.1:1/api/")), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
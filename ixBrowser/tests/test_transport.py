@@ -0,0 +1,94 @@
+import socket
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from ixBrowser.client import IxBrowser
+from ixBrowser.discovery import ApiOnlyDiscovery
+from ixBrowser.testing import MockIxBrowserServer
+from ixBrowser.transport import TransportConfig, DEFAULT_TIMEOUT
+
+
+class TestTransportRetry(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockIxBrowserServer(profiles=5).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def new_client(self, **kwargs) -> IxBrowser:
+        transport = TransportConfig(retries=3, backoff_factor=0.01, **kwargs)
+        return IxBrowser(api_port=self.server.port, discovery=ApiOnlyDiscovery(), transport=transport)
+
+    def test_default_timeout(self):
+        self.assertEqual(TransportConfig().timeout_for("browser-list"), DEFAULT_TIMEOUT)
+        self.assertIsNotNone(DEFAULT_TIMEOUT)
+
+    def test_idempotent_retry_with_backoff(self):
+        ixbrowser = self.new_client()
+        self.server.fail_next("browser-list", 2)
+        with mock.patch("ixBrowser.transport.time.sleep") as sleep:
+            res = ixbrowser.api_browser_list(limit=1)
+        self.assertTrue(res["result"])
+        self.assertEqual(self.server.requests["browser-list"], 3)
+        delays = [c.args[0] for c in sleep.call_args_list]
+        self.assertEqual(len(delays), 2)
+        # equal jitter: 第n次重試等待 [d/2, d]，d = backoff_factor * 2 ** n
+        self.assertTrue(0.005 <= delays[0] <= 0.01)
+        self.assertTrue(0.01 <= delays[1] <= 0.02)
+
+    def test_retry_limit(self):
+        ixbrowser = self.new_client()
+        self.server.fail_next("browser-list", 10)
+        res = ixbrowser.api_browser_list(limit=1)
+        self.assertFalse(res["result"])
+        self.assertEqual(res["error"]["code"], 503)
+        self.assertEqual(self.server.requests["browser-list"], 4)
+
+    def test_non_idempotent_not_retried(self):
+        ixbrowser = self.new_client()
+        for endpoint, call in (("browser-open", lambda: ixbrowser.api_browser_open(1)),
+                               ("browser-create", lambda: ixbrowser.api_browser_create(name="x")),
+                               ("browser-deleted", lambda: ixbrowser.api_browser_delete(2))):
+            self.server.fail_next(endpoint, 1)
+            self.assertFalse(call()["result"])
+            self.assertEqual(self.server.requests[endpoint], 1, endpoint)
+        self.assertNotIn(1, self.server.opened)
+        self.assertIn(2, self.server.profiles)
+
+    def test_connection_refused_retried(self):
+        # 取得一個沒有在監聽的Port
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        transport = TransportConfig(retries=3, backoff_factor=0.01)
+        ses = transport.create_session()
+        url = "http://127.0.0.1:%d/api/" % port
+        for endpoint in ("browser-open", "browser-create", "browser-list"):
+            with mock.patch.object(ses, "post", wraps=ses.post) as post, \
+                    mock.patch("ixBrowser.transport.time.sleep"):
+                with self.assertRaises(requests.exceptions.ConnectionError):
+                    transport.post(ses, url + endpoint, endpoint, {"profile_id": 1})
+            self.assertEqual(post.call_count, 4, endpoint)
+
+    def test_read_timeout(self):
+        # 逾時後伺服器仍會完成請求，重試browser-create會建立兩次
+        self.server.latency = {"browser-create": 0.3, "browser-list": 0.3}
+        ixbrowser = self.new_client(timeout=(1, 0.1))
+        count = len(self.server.profiles)
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            ixbrowser.api_browser_create(name="slow")
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            ixbrowser.api_browser_list(limit=1)
+        time.sleep(0.5)
+        self.assertEqual(self.server.requests["browser-create"], 1)
+        self.assertEqual(len(self.server.profiles), count + 1)
+        self.assertEqual(self.server.requests["browser-list"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
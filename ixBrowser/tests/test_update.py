@@ -0,0 +1,65 @@
+import unittest
+
+from ixBrowser.catalog import ProfileCatalog
+from ixBrowser.client import IxBrowser
+from ixBrowser.discovery import ApiOnlyDiscovery
+from ixBrowser.metrics import Metrics
+from ixBrowser.testing import MockIxBrowserServer
+
+
+class TestDiffUpdate(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockIxBrowserServer(profiles=5).start()
+        # 以pre_hook記錄送出的browser-update參數
+        self.sent = []
+        metrics = Metrics()
+        metrics.add_pre_hook(lambda endpoint, params: endpoint == "browser-update" and self.sent.append(params))
+        self.ixbrowser = IxBrowser(api_port=self.server.port, discovery=ApiOnlyDiscovery(), metrics=metrics)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_skip_when_unchanged(self):
+        res = self.ixbrowser.api_browser_update(1, diff=True, name="profile-1", note="")
+        self.assertEqual(res, {"result": True, "data": {}, "skipped": True})
+        self.assertEqual(self.sent, [])
+        self.assertNotIn("browser-update", self.server.requests)
+
+    def test_send_changed_fields(self):
+        res = self.ixbrowser.api_browser_update(1, diff=True, name="profile-1", note="new note")
+        self.assertTrue(res["result"])
+        self.assertEqual(self.sent, [{"profile_id": 1, "note": "new note"}])
+        self.assertEqual(self.server.profiles[1]["note"], "new note")
+        self.assertEqual(self.server.profiles[1]["name"], "profile-1")
+
+    def test_current_given(self):
+        self.ixbrowser.api_browser_update(1, diff=True, current={"profile_id": 1, "note": ""}, note="x")
+        self.assertNotIn("browser-list", self.server.requests)
+        self.assertEqual(self.sent, [{"profile_id": 1, "note": "x"}])
+
+    def test_full_update(self):
+        self.ixbrowser.api_browser_update(1, name="renamed")
+        # diff=False仍送出完整的預設值
+        self.assertEqual(self.sent[0]["name"], "renamed")
+        self.assertEqual(self.sent[0]["timezone"], "Asia/Taiwan")
+
+    def test_catalog_state(self):
+        ProfileCatalog(self.ixbrowser)
+        list_requests = self.server.requests["browser-list"]
+        self.assertTrue(self.ixbrowser.api_browser_update(2, diff=True, name="profile-2")["skipped"])
+        self.assertEqual(self.server.requests["browser-list"], list_requests)
+
+    def test_update_many(self):
+        self.server.profiles[2]["note"] = "x"
+        results = dict(self.ixbrowser.update_many(range(1, 6), note="x"))
+        self.assertTrue(all(res["result"] for res in results.values()))
+        self.assertTrue(results[2].get("skipped"))
+        self.assertEqual(sorted(p["profile_id"] for p in self.sent), [1, 3, 4, 5])
+        self.assertTrue(all(set(p) == {"profile_id", "note"} for p in self.sent))
+        # 目前狀態只讀取一次
+        self.assertEqual(self.server.requests["browser-list"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import random
+import time
+from typing import Dict, Tuple, Union, Iterable
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from .utils.json_codec import dumps
+
+# 重複送出也不會產生副作用的API，可以安全重試
+IDEMPOTENT_ENDPOINTS = frozenset({
+    "group-list",
+    "browser-list",
+    "browser-close-all",
+    "browser-cache-clear",
+    "browser-update",
+})
+
+Timeout = Union[None, float, Tuple[float, float]]
+
+# (連線逾時, 讀取逾時)，browser-open等待瀏覽器啟動可能需要數十秒
+DEFAULT_TIMEOUT = (5, 120)
+
+
+def _is_connect_error(error: requests.exceptions.RequestException) -> bool:
+    """
+    是否在建立連線時就失敗(連線逾時、連線被拒)，此時請求還沒有送出
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError):
+        return False
+    # requests將urllib3的MaxRetryError包在ConnectionError中，reason為實際的連線錯誤
+    cause = error.args[0] if error.args else None
+    return isinstance(getattr(cause, "reason", cause), NewConnectionError)
+
+
+class TransportConfig:
+    """
+    IxBrowser的HTTP連線設定
+
+        transport = TransportConfig(pool_maxsize=64, timeout=(3, 30), retries=3,
+                                    endpoint_timeouts={"browser-open": (3, 120)},
+                                    session_per_thread=True)
+        ixbrowser = IxBrowser(transport=transport)
+
+    預設連線逾時5秒、讀取逾時120秒、不重試、連線池大小10
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                 timeout: Timeout = DEFAULT_TIMEOUT, endpoint_timeouts: Dict[str, Timeout] = None, retries: int = 0,
+                 backoff_factor: float = 0.2, backoff_max: float = 5.0,
+                 retry_statuses: Iterable[int] = (502, 503, 504),
+                 idempotent_endpoints: Iterable[str] = IDEMPOTENT_ENDPOINTS, session_per_thread: bool = False):
+        """
+        :param pool_connections:        連線池數量
+        :param pool_maxsize:            每個連線池保留的連線數，多執行緒使用時應不小於執行緒數
+        :param pool_block:              連線用盡時是否等待，False則建立臨時連線
+        :param timeout:                 預設逾時秒數，可為 (連線逾時, 讀取逾時)，None為不逾時
+        :param endpoint_timeouts:       各API的逾時秒數，例如 {"browser-open": (3, 120)}
+        :param retries:                 最多重試次數
+        :param backoff_factor:          重試等待秒數 = backoff_factor * 2 ** (第幾次重試)，再乘上隨機抖動
+        :param backoff_max:             重試等待秒數上限
+        :param retry_statuses:          需要重試的HTTP狀態碼
+        :param idempotent_endpoints:    可以重試的API，其餘API只在連線建立前失敗時重試
+        :param session_per_thread:      每個執行緒使用獨立的Session
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.timeout = timeout
+        self.endpoint_timeouts = dict(endpoint_timeouts or {})
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.idempotent_endpoints = frozenset(idempotent_endpoints)
+        self.session_per_thread = session_per_thread
+
+    def create_session(self, headers: dict = None) -> requests.Session:
+        """
+        建立套用連線池設定的Session
+        """
+        ses = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        ses.mount("http://", adapter)
+        ses.mount("https://", adapter)
+        if headers:
+            ses.headers.update(headers)
+        return ses
+
+    def timeout_for(self, endpoint: str) -> Timeout:
+        return self.endpoint_timeouts.get(endpoint, self.timeout)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        第attempt次重試前等待的秒數，使用equal jitter避免多個執行緒同時重試
+        """
+        delay = min(self.backoff_max, self.backoff_factor * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def post(self, ses: requests.Session, url: str, endpoint: str, params: dict, timeout: Timeout = None,
+             retries: int = None) -> requests.Response:
+        """
+        送出POST請求，依照設定處理逾時與重試
+
+        :param ses:         Session
+        :param url:         完整網址
+        :param endpoint:    API名稱，用來查詢逾時與是否可重試
+        :param params:      請求參數
+        :param timeout:     這次請求的逾時秒數，None則使用設定值
+        :param retries:     這次請求的最多重試次數，None則使用設定值
+        :return:
+        """
+        idempotent = endpoint in self.idempotent_endpoints
+        if timeout is None:
+            timeout = self.timeout_for(endpoint)
+        if retries is None:
+            retries = self.retries
+        body = dumps(params)
+        attempt = 0
+        while True:
+            try:
+                response = ses.post(url, data=body, timeout=timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout) as e:
+                # 連線尚未建立時請求沒有送出，任何API都可以重試
+                if not (idempotent or _is_connect_error(e)) or attempt >= retries:
+                    raise
+            else:
+                if response.status_code not in self.retry_statuses or not idempotent or attempt >= retries:
+                    return response
+            time.sleep(self.backoff(attempt))
+            attempt += 1
@@ -1 +1,8 @@
 from . import use_logger
+from . import ttl_cache
+from . import probe
+from . import json_codec
+from . import rate_limit
+from . import checkpoint
+from . import batcher
+from . import single_flight
\ No newline at end of file
@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+
+class Batcher:
+    """
+    將多個執行緒送出的單一profile_id請求合併成一次請求
+
+        batcher = Batcher(lambda ids: ixbrowser.api_browser_close(ids), window=0.02)
+        res = batcher.submit(1).result()
+
+    第一個請求送出後最多等待window秒(或累積到max_batch個)就送出。
+    合併的請求失敗時改為逐一送出，每個呼叫者取得自己的結果。
+    """
+
+    def __init__(self, func: Callable[[List[int]], dict], window: float = 0.02, max_batch: int = 100,
+                 name: str = "ixBrowser-batcher"):
+        """
+        :param func:        接受profile_id列表並回傳結果字典的函數
+        :param window:      收集請求的最長時間(秒)
+        :param max_batch:   每次最多合併的數量
+        :param name:        背景執行緒名稱
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch 必須大於 0")
+        self.func = func
+        self.window = window
+        self.max_batch = max_batch
+        self.name = name
+        # 送出的請求次數與合併前的呼叫次數
+        self.batches = 0
+        self.submitted = 0
+        self.__cond = threading.Condition()
+        self.__pending = []
+        self.__closed = False
+        self.__thread = None
+
+    def submit(self, profile_id: int) -> Future:
+        """
+        加入下一批請求
+
+        :return: 完成後的結果為func回傳的結果字典
+        """
+        future = Future()
+        with self.__cond:
+            if self.__closed:
+                raise RuntimeError("Batcher已關閉")
+            self.__pending.append((profile_id, future))
+            self.submitted += 1
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name=self.name, daemon=True)
+                self.__thread.start()
+            self.__cond.notify()
+        return future
+
+    def close(self):
+        """
+        送出剩下的請求並停止背景執行緒
+        """
+        with self.__cond:
+            self.__closed = True
+            self.__cond.notify()
+            thread = self.__thread
+        if thread is not None:
+            thread.join()
+
+    def __run(self):
+        while True:
+            with self.__cond:
+                while not self.__pending and not self.__closed:
+                    self.__cond.wait()
+                if not self.__pending:
+                    return
+                deadline = time.monotonic() + self.window
+                while len(self.__pending) < self.max_batch and not self.__closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.__cond.wait(remaining)
+                batch = self.__pending[:self.max_batch]
+                del self.__pending[:self.max_batch]
+            self.__flush(batch)
+
+    def __flush(self, batch: list):
+        # 同一個profile_id只送出一次，結果由所有呼叫者共用
+        futures = {}
+        for profile_id, future in batch:
+            futures.setdefault(profile_id, []).append(future)
+        ids = list(futures)
+
+        self.batches += 1
+        try:
+            res = self.func(ids)
+        except Exception as e:
+            res, error = None, e
+        else:
+            error = None
+        if len(ids) == 1 or (res is not None and res.get("result")):
+            for fs in futures.values():
+                for future in fs:
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(res)
+            return
+
+        # 合併的請求失敗，可能只有部分profile_id有問題，逐一送出
+        for profile_id, fs in futures.items():
+            self.batches += 1
+            try:
+                res = self.func([profile_id])
+            except Exception as e:
+                for future in fs:
+                    future.set_exception(e)
+            else:
+                for future in fs:
+                    future.set_result(res)
@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+
+
+class Checkpoint:
+    """
+    只追加寫入的JSONL檢查點，每行記錄一個已完成的工作
+
+        {"key": 0, "profile_id": 123}
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path:    檢查點檔案路徑
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__repaired = False
+
+    def load(self) -> dict:
+        """
+        讀取已完成的工作
+
+        :return: {key: 紀錄}，最後一行可能因為中斷而不完整，會被忽略
+        """
+        done = {}
+        try:
+            with open(self.path, encoding="utf8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    done[record["key"]] = record
+        except FileNotFoundError:
+            pass
+        return done
+
+    def append(self, key, **values):
+        """
+        記錄一個已完成的工作，寫入後立即flush
+        """
+        line = json.dumps({"key": key, **values}, ensure_ascii=False) + "\n"
+        with self.__lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if not self.__repaired:
+                self.__truncate_partial_line()
+                self.__repaired = True
+            with open(self.path, "a", encoding="utf8") as f:
+                f.write(line)
+                f.flush()
+
+    def __truncate_partial_line(self):
+        """
+        上次寫到一半被中斷時，最後一行沒有換行，直接追加會和新紀錄接成同一行而遺失新紀錄，因此先截掉不完整的部分
+        """
+        try:
+            with open(self.path, "rb+") as f:
+                size = f.seek(0, os.SEEK_END)
+                if size == 0:
+                    return
+                f.seek(size - 1)
+                if f.read(1) == b"\n":
+                    return
+                # 從尾端往前找最後一個換行
+                position = size
+                while position > 0:
+                    start = max(0, position - 4096)
+                    f.seek(start)
+                    index = f.read(position - start).rfind(b"\n")
+                    if index >= 0:
+                        f.truncate(start + index + 1)
+                        return
+                    position = start
+                f.truncate(0)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,35 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+
+    def loads(data):
+        """
+        解析JSON，接受bytes或str
+        """
+        return orjson.loads(data)
+
+    def dumps(obj) -> bytes:
+        """
+        序列化為UTF-8 JSON
+        """
+        return orjson.dumps(obj)
+else:
+    BACKEND = "json"
+
+    def loads(data):
+        """
+        解析JSON，接受bytes或str
+        """
+        return json.loads(data)
+
+    def dumps(obj) -> bytes:
+        """
+        序列化為UTF-8 JSON
+        """
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf8")
@@ -0,0 +1,56 @@
+import http.client
+import socket
+import urllib.request
+
+from .json_codec import loads
+
+# 檢查DevTools時不經過環境變數設定的代理
+_opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+def split_address(address: str, default_port: int = 80):
+    """
+    將 "127.0.0.1:9222" 或 "http://127.0.0.1:9222/..." 拆成 (host, port)
+    """
+    if "://" in address:
+        address = address.split("://", 1)[1]
+    address = address.split("/", 1)[0]
+    host, _, port = address.rpartition(":")
+    if not host:
+        return port, default_port
+    return host, int(port)
+
+
+def tcp_probe(address: str, timeout: float = 1.0) -> bool:
+    """
+    以TCP連線檢查位址是否有在監聽
+
+    :param address: "host:port"
+    :param timeout: 連線逾時秒數
+    :return: True: 可以連線 False: 無法連線
+    """
+    try:
+        host, port = split_address(address)
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except (OSError, ValueError):
+        return False
+
+
+def devtools_probe(address: str, timeout: float = 1.0):
+    """
+    讀取DevTools的 /json/version，確認位址上是可以連接的瀏覽器，而不只是有程序在監聽Port
+
+    :param address: "host:port"
+    :param timeout: 請求逾時秒數
+    :return: /json/version的內容，不是DevTools時為None
+    """
+    try:
+        host, port = split_address(address)
+        with _opener.open(f"http://{host}:{port}/json/version", timeout=timeout) as response:
+            info = loads(response.read())
+    except (OSError, ValueError, http.client.HTTPException):
+        return None
+    if not isinstance(info, dict) or not info.get("webSocketDebuggerUrl"):
+        return None
+    return info
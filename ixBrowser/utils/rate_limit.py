@@ -0,0 +1,39 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    執行緒安全的Token Bucket限速器
+
+        limiter = RateLimiter(rate=5, burst=5)
+        limiter.acquire()   # 每秒最多5次
+    """
+
+    def __init__(self, rate: float, burst: int = None):
+        """
+        :param rate:    每秒可以取得的次數
+        :param burst:   最多累積的次數，預設為rate(至少1)
+        """
+        if rate <= 0:
+            raise ValueError("rate 必須大於 0")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.__tokens = float(self.burst)
+        self.__updated_at = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        """
+        取得一次執行許可，沒有許可時等待
+        """
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                self.__tokens = min(self.burst, self.__tokens + (now - self.__updated_at) * self.rate)
+                self.__updated_at = now
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return
+                wait = (1 - self.__tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,48 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Hashable
+
+
+class SingleFlight:
+    """
+    同一個key同時只執行一次，執行期間其他呼叫者等待並取得相同結果(或相同例外)
+
+        flight = SingleFlight()
+        res = flight.do(profile_id, ixbrowser_open, profile_id)
+
+    執行結束後不保留結果，下一次呼叫會重新執行
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__calls = {}
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs):
+        """
+        執行func(*args, **kwargs)，key相同的呼叫正在執行時等待其結果
+
+        :return: func的回傳值，所有共用的呼叫者取得同一個物件
+        """
+        with self.__lock:
+            future = self.__calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.__calls[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self.__lock:
+            return key in self.__calls
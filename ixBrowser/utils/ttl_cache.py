@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    執行緒安全的TTL + LRU快取
+
+    超過ttl秒的項目視為過期，超過maxsize時淘汰最久未使用的項目
+    """
+    _MISSING = object()
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300):
+        """
+        :param maxsize: 最多保留的項目數量
+        :param ttl:     項目存活秒數，None為永不過期
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.__data = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        取得快取值，不存在或已過期時回傳default
+        """
+        with self.__lock:
+            item = self.__data.get(key, self._MISSING)
+            if item is self._MISSING:
+                return default
+            expire_at, value = item
+            if expire_at is not None and expire_at <= time.monotonic():
+                del self.__data[key]
+                return default
+            self.__data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """
+        寫入快取值
+        """
+        expire_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self.__lock:
+            self.__data[key] = (expire_at, value)
+            self.__data.move_to_end(key)
+            while len(self.__data) > self.maxsize:
+                self.__data.popitem(last=False)
+
+    def invalidate(self, key=_MISSING):
+        """
+        使快取失效
+
+        :param key: 指定要失效的key，不指定則清空全部
+        """
+        with self.__lock:
+            if key is self._MISSING:
+                self.__data.clear()
+            else:
+                self.__data.pop(key, None)
+
+    def __contains__(self, key):
+        return self.get(key, self._MISSING) is not self._MISSING
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__data)
@@ -1,23 +1,200 @@
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+
 from rich import box
 from rich.console import Console
 from rich.markdown import Markdown
 from rich.table import Table
 from rich.traceback import install
 
+from .json_codec import dumps
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+# 預設使用rich輸出，可用環境變數或configure切換為JSON Lines
+_config = {
+    "mode": os.environ.get("IXBROWSER_LOG_MODE", "rich"),
+    "level": os.environ.get("IXBROWSER_LOG_LEVEL", "DEBUG"),
+    "stream": None,
+    "queue_size": 10000,
+}
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def configure(mode: str = None, level: str = None, stream=None, queue_size: int = None):
+    """
+    設定之後建立的WrapperRichLogger，需要在建立IxBrowser之前呼叫
+
+        configure(mode="json", level="INFO")
+
+    :param mode:        "rich" 使用rich輸出到終端機，"json" 由背景執行緒輸出JSON Lines
+    :param level:       最低輸出等級: DEBUG, INFO, WARNING, ERROR
+    :param stream:      json模式的輸出目標，預設為sys.stderr
+    :param queue_size:  json模式的佇列長度，佇列滿時丟棄新的記錄，只在第一次使用json模式前有效
+    """
+    if mode is not None:
+        if mode not in ("rich", "json"):
+            raise ValueError(f"不支援的日誌模式: {mode}")
+        _config["mode"] = mode
+    if level is not None:
+        _level_no(level)
+        _config["level"] = level
+    if queue_size is not None:
+        _config["queue_size"] = queue_size
+    if stream is not None:
+        _config["stream"] = stream
+        with _writer_lock:
+            if _writer is not None:
+                _writer.stream = stream
+
+
+def _level_no(level: str) -> int:
+    try:
+        return LEVELS[level.upper()]
+    except KeyError:
+        raise ValueError(f"不支援的日誌等級: {level}")
+
+
+def _get_writer() -> "JsonLinesWriter":
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = JsonLinesWriter(_config["stream"], _config["queue_size"])
+        return _writer
+
+
+class JsonLinesWriter:
+    """
+    在背景執行緒格式化並寫出JSON Lines，呼叫端只需要把記錄放進佇列
+    """
+
+    def __init__(self, stream=None, queue_size: int = 10000):
+        self.stream = stream
+        self.queue = queue.Queue(queue_size)
+        # 佇列已滿而丟棄的記錄數
+        self.dropped = 0
+        self.__thread = threading.Thread(target=self.__run, name="ixBrowser-logger", daemon=True)
+        self.__thread.start()
+        atexit.register(self.close)
+
+    def emit(self, level: str, msg, args: tuple = (), data=None, exc_info=None):
+        try:
+            self.queue.put_nowait((time.time(), level, msg, args, data, exc_info,
+                                   threading.current_thread().name))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """
+        等待佇列中的記錄全部寫出
+        """
+        self.queue.join()
+
+    def close(self):
+        if self.__thread.is_alive():
+            self.queue.put(None)
+            self.__thread.join(timeout=5)
+
+    def __run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            lines = [item]
+            # 一次寫出佇列中所有的記錄，減少flush次數
+            while len(lines) < 512:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.queue.put(None)
+                    self.queue.task_done()
+                    break
+                lines.append(item)
+            stream = self.stream or sys.stderr
+            try:
+                stream.write("".join(self.__format(x) for x in lines))
+                stream.flush()
+            except Exception:
+                pass
+            for _ in lines:
+                self.queue.task_done()
+
+    def __format(self, item) -> str:
+        ts, level, msg, args, data, exc_info, thread = item
+        try:
+            msg = str(msg) % args if args else str(msg)
+        except (TypeError, ValueError):
+            msg = f"{msg} {args}"
+        record = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(ts)) + f".{int(ts % 1 * 1000):03d}",
+            "level": level,
+            "thread": thread,
+            "msg": msg,
+        }
+        if data is not None:
+            record["data"] = data
+        if exc_info is not None and exc_info[0] is not None:
+            record["exc"] = "".join(traceback.format_exception(*exc_info))
+        if self.dropped:
+            record["dropped"], self.dropped = self.dropped, 0
+        return dumps(record).decode("utf8") + "\n"
+
 
 class WrapperRichLogger:
+    """
+    預設使用rich輸出到終端機。
+
+    環境變數 IXBROWSER_LOG_MODE=json 或 configure(mode="json") 時改為JSON Lines，
+    不會安裝rich的全域traceback，也不渲染Markdown，格式化與寫出都在背景執行緒進行。
+    訊息可使用 %s 參數延遲格式化，例如 logger.log("開啟 %s", profile_id)
+    """
+
     def __init__(self):
-        self.logger = Console(color_system="windows")
-        install(show_locals=True)
+        self.mode = _config["mode"]
+        self.level = _level_no(_config["level"])
+        if self.mode == "json":
+            self.writer = _get_writer()
+            self.logger = None
+        else:
+            self.writer = None
+            self.logger = Console(color_system="windows")
+            install(show_locals=True)
 
-    def error(self, msg: str):
-        self.logger.log(f"[bold red]{msg}[/bold red]")
+    def is_enabled(self, level: str) -> bool:
+        return LEVELS[level] >= self.level
 
-    def log(self, msg: str):
-        self.logger.log(msg)
+    def __emit(self, level: str, msg, args: tuple, data=None, exc_info=None) -> bool:
+        """
+        json模式時放入佇列並回傳True，rich模式回傳False由呼叫端輸出
+        """
+        if self.writer is None:
+            return False
+        self.writer.emit(level, msg, args, data, exc_info)
+        return True
+
+    def error(self, msg: str, *args):
+        if LEVELS["ERROR"] < self.level or self.__emit("ERROR", msg, args):
+            return
+        self.logger.log(f"[bold red]{msg % args if args else msg}[/bold red]")
+
+    def log(self, msg: str, *args):
+        if LEVELS["INFO"] < self.level or self.__emit("INFO", msg, args):
+            return
+        self.logger.log(msg % args if args else msg)
 
-    def print(self, msg: str):
-        self.logger.print(msg)
+    def print(self, msg: str, *args):
+        if LEVELS["INFO"] < self.level or self.__emit("INFO", msg, args):
+            return
+        self.logger.print(msg % args if args else msg)
 
     def table(self, column: list, data: list, title: str = ""):
         """
@@ -26,6 +203,10 @@ class WrapperRichLogger:
         :param data: 数据
         :return:
         """
+        if LEVELS["INFO"] < self.level:
+            return
+        if self.__emit("INFO", title, (), {"columns": list(column), "rows": [[str(x) for x in i] for i in data]}):
+            return
         t = Table(title=title, box=box.DOUBLE_EDGE)
         for i in column:
             t.add_column(i)
@@ -44,17 +225,30 @@ class WrapperRichLogger:
         if not msg_list:
             msg_list = []
 
+        if LEVELS["INFO"] < self.level or self.__emit("INFO", title, (), [str(x) for x in msg_list]):
+            return
         msg = f"# {title}\n"
         for i in range(len(msg_list)):
             msg += f"{i + 1}. {msg_list[i]}\n"
         self.logger.print(Markdown(msg))
 
     def h1(self, msg: str = ""):
+        if LEVELS["INFO"] < self.level or self.__emit("INFO", msg, ()):
+            return
         self.logger.print(Markdown(f"# {msg}"))
 
-    def exception(self, msg: str = ""):
+    def exception(self, msg: str = "", *args):
+        if LEVELS["ERROR"] < self.level or self.__emit("ERROR", msg, args, exc_info=sys.exc_info()):
+            return
         self.logger.print_exception(show_locals=True)
-        self.error(msg)
+        self.error(msg, *args)
+
+    def flush(self):
+        """
+        json模式時等待背景執行緒寫出所有記錄
+        """
+        if self.writer is not None:
+            self.writer.flush()
 
 
 if __name__ == '__main__':
@@ -22,7 +22,12 @@ INSTALL_REQUIRES = [s.strip() for s in requirements.split("\n")]
 
 with open((HERE / "dev_requirements.txt"), encoding="utf8", errors='ignore') as f:
     dev_requirements = f.read()
-EXTRAS_REQUIRE = {"dev": [s.strip() for s in dev_requirements.split("\n")]}
+EXTRAS_REQUIRE = {
+    "dev": [s.strip() for s in dev_requirements.split("\n")],
+    "async": ["aiohttp"],
+    "fast": ["orjson"],
+    "fingerprint": ["numpy"],
+}
 
 CLASSIFIERS = [f"Programming Language :: Python :: 3.{str(v)}" for v in range(7, 12)]
 PYTHON_REQUIRES = ">=3.7"